@@ -9,7 +9,7 @@ Usage:
     python3 export_to_neo4j.py --source ../../../../_metadata/index_complet.json --neo4j-uri bolt://localhost:7687
 
 Arguments:
-    --source : Chemin vers index_complet.json (bible_notariale)
+    --source : Chemin vers index_complet.json ou index_complet.ndjson (bible_notariale)
     --neo4j-uri : URI Neo4j
     --neo4j-user : User Neo4j (défaut: neo4j)
     --neo4j-password : Password Neo4j
@@ -51,13 +51,7 @@ class MetadataExporter:
         3. Relations ontologiques
         """
 
-        # Charger index
-        with open(index_path, 'r', encoding='utf-8') as f:
-            index = json.load(f)
-
-        documents = index.get('documents', [])
-
-        print(f"\n📊 Export de {len(documents)} documents vers Neo4j")
+        print(f"\n📊 Export des documents de {Path(index_path).name} vers Neo4j")
         print(f"Timestamp : {datetime.now()}\n")
 
         # Statistiques
@@ -70,7 +64,7 @@ class MetadataExporter:
 
         async with self.driver.session() as session:
 
-            for doc in documents:
+            for doc in self._iter_documents(index_path):
                 try:
                     doc_id = doc['document_id']
 
@@ -85,7 +79,7 @@ class MetadataExporter:
                     stats['documents_updated'] += 1
 
                     if stats['documents_updated'] % 50 == 0:
-                        print(f"  ✓ {stats['documents_updated']}/{len(documents)} documents traités")
+                        print(f"  ✓ {stats['documents_updated']} documents traités")
 
                 except Exception as e:
                     print(f"  ❌ Erreur pour {doc.get('document_id')}: {e}")
@@ -99,6 +93,22 @@ class MetadataExporter:
 
         return stats
 
+    @staticmethod
+    def _iter_documents(index_path: str):
+        """
+        Itère les documents de l'index
+
+        Un fichier .ndjson (un document par ligne) est lu en flux ; un .json
+        est chargé entièrement.
+        """
+        with open(index_path, 'r', encoding='utf-8') as f:
+            if index_path.endswith('.ndjson'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from json.load(f).get('documents', [])
+
     async def _update_classification(self, session, doc_id: str, classification: dict):
         """
         Met à jour la classification d'un document dans Neo4j
@@ -173,7 +183,7 @@ async def main():
     """
 
     parser = argparse.ArgumentParser(description='Export métadonnées vers Neo4j')
-    parser.add_argument('--source', required=True, help='Chemin vers index_complet.json')
+    parser.add_argument('--source', required=True, help='Chemin vers index_complet.json ou .ndjson')
     parser.add_argument('--neo4j-uri', default='bolt://localhost:7687', help='URI Neo4j')
     parser.add_argument('--neo4j-user', default='neo4j', help='User Neo4j')
     parser.add_argument('--neo4j-password', required=True, help='Password Neo4j')
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Écriture sûre des fichiers de métadonnées
+
+- `write_if_changed` : le contenu est comparé au fichier existant (octets,
+  ou empreinte fournie par l'appelant) ; rien n'est écrit s'il est
+  identique. Sinon l'écriture est atomique : fichier temporaire dans le
+  même dossier, fsync, puis renommage. Un arrêt brutal laisse l'ancienne
+  ou la nouvelle version, jamais un fichier tronqué.
+- `BatchWriter` : même principe pour un lot de fichiers. Les fichiers
+  temporaires sont tous écrits avant d'être synchronisés (fsync de chacun
+  au moment de la validation), puis renommés ; chaque dossier concerné est
+  ensuite synchronisé une seule fois.
+
+Le fichier remplacé garde ses droits d'accès ; un nouveau fichier reçoit
+les droits par défaut (0666 moins le umask), comme avec `open()`.
+
+Les documents JSON sont sérialisés comme partout dans le dépôt :
+`ensure_ascii=False, indent=2`.
+"""
+
+import os
+import json
+import stat
+import tempfile
+from pathlib import Path
+
+
+def dumps_json(data):
+    """Sérialisation JSON des fichiers de métadonnées."""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def _encode(content):
+    return content.encode('utf-8') if isinstance(content, str) else content
+
+
+def is_unchanged(filepath, content, fingerprint=None):
+    """Vrai si le fichier existe avec ce contenu (ou la même empreinte)."""
+    try:
+        with open(filepath, 'rb') as f:
+            current = f.read()
+    except FileNotFoundError:
+        return False
+    if fingerprint is None:
+        return current == _encode(content)
+    if isinstance(content, bytes):
+        return fingerprint(current) == fingerprint(content)
+    return fingerprint(current.decode('utf-8')) == fingerprint(content)
+
+
+def _file_mode(filepath):
+    """Droits à donner au fichier : ceux du fichier existant, sinon 0666 moins le umask."""
+    try:
+        return stat.S_IMODE(os.stat(filepath).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_temp(filepath, data, fsync):
+    """Écrit `data` dans un fichier temporaire à côté de `filepath` ; retourne son chemin."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        # mkstemp crée le fichier en 0600, que os.replace conserverait
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, _file_mode(filepath))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def fsync_directory(directory):
+    """Rend durable le renommage d'un fichier du dossier (POSIX)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # Windows : pas de descripteur de dossier
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(filepath, content, fsync=True):
+    """Remplace atomiquement `filepath` par `content` (str ou bytes)."""
+    filepath = Path(filepath)
+    tmp_path = _write_temp(filepath, _encode(content), fsync)
+    try:
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if fsync:
+        fsync_directory(filepath.parent)
+
+
+def write_if_changed(filepath, content, fingerprint=None, fsync=True):
+    """Écrit `content` de façon atomique s'il diffère du fichier existant.
+
+    `fingerprint(texte)` permet d'ignorer des parties volatiles (horodatages)
+    dans la comparaison. Retourne True si le fichier a été écrit.
+    """
+    if is_unchanged(filepath, content, fingerprint):
+        return False
+    atomic_write(filepath, content, fsync)
+    return True
+
+
+def write_json_if_changed(filepath, data, fsync=True):
+    """Sérialise `data` et l'écrit si le fichier diffère. Retourne True si écrit."""
+    return write_if_changed(filepath, dumps_json(data), fsync=fsync)
+
+
+class BatchWriter:
+    """Lot d'écritures atomiques, synchronisées ensemble à la validation.
+
+    Usage :
+        with BatchWriter() as batch:
+            for path, data in ...:
+                batch.write_json(path, data)
+
+    Les fichiers inchangés sont ignorés. Les contenus sont écrits dans des
+    fichiers temporaires ; à la sortie du bloc (sans exception), le lot est
+    synchronisé puis chaque fichier est renommé à sa place. En cas
+    d'exception, les fichiers temporaires sont supprimés et aucun fichier
+    n'est remplacé.
+    """
+
+    def __init__(self, fsync=True):
+        self.fsync = fsync
+        self.pending = []
+        self.written = 0
+        self.unchanged = 0
+
+    def write(self, filepath, content, fingerprint=None):
+        """Ajoute un fichier au lot ; retourne True s'il sera écrit."""
+        filepath = Path(filepath)
+        # Un même fichier écrit deux fois dans le lot : seule la dernière version compte
+        self.discard(filepath)
+        if is_unchanged(filepath, content, fingerprint):
+            self.unchanged += 1
+            return False
+        self.pending.append((filepath, _write_temp(filepath, _encode(content), fsync=False)))
+        return True
+
+    def write_json(self, filepath, data):
+        return self.write(filepath, dumps_json(data))
+
+    def discard(self, filepath=None):
+        """Abandonne les écritures en attente (toutes, ou celle d'un fichier)."""
+        kept = []
+        for target, tmp_path in self.pending:
+            if filepath is None or target == filepath:
+                os.unlink(tmp_path)
+            else:
+                kept.append((target, tmp_path))
+        self.pending = kept
+
+    def _sync_pending(self):
+        # fsync des seuls fichiers du lot (os.sync() viderait tous les systèmes de fichiers montés)
+        for _, tmp_path in self.pending:
+            with open(tmp_path, 'r+b') as f:
+                os.fsync(f.fileno())
+
+    def commit(self):
+        """Synchronise le lot puis met chaque fichier en place. Retourne le nombre de fichiers écrits."""
+        if not self.pending:
+            return 0
+        if self.fsync:
+            self._sync_pending()
+        pending, self.pending = self.pending, []
+        directories = set()
+        for index, (target, tmp_path) in enumerate(pending):
+            try:
+                os.replace(tmp_path, target)
+            except BaseException:
+                for _, remaining in pending[index:]:
+                    os.unlink(remaining)
+                raise
+            directories.add(target.parent)
+            self.written += 1
+        if self.fsync:
+            for directory in directories:
+                fsync_directory(directory)
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
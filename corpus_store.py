@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Corpus plein texte des documents sources
+
+Le texte intégral de chaque document est conservé page par page dans
+`_metadata/corpus/` :
+- `texts.bin`  : fichier en ajout seul, pages encodées en UTF-8 bout à bout ;
+- `index.json` : pour chaque document_id, le fichier source, son empreinte
+                 SHA-256 et, par page, (décalage en octets, longueur en
+                 octets, décalage en caractères dans le document).
+
+La lecture passe par un mmap de `texts.bin` : accéder à une page ne charge
+que ses octets. Un document réextrait est ajouté en fin de fichier et
+l'ancienne version devient inaccessible ; `compact` réécrit le fichier sans
+ces versions mortes.
+
+`build` reconstruit aussi l'index des entités (`entity_index.py`).
+
+Les pages sont numérotées à partir de 0 et suivent les pages physiques du
+PDF (une page sans texte est une chaîne vide) ; DOCX, ODT et XLSX sont
+découpés en pages d'environ `document_text.PAGE_CHARS` caractères.
+
+Usage :
+    python3 corpus_store.py build [--workers N]
+    python3 corpus_store.py show <document_id> [--page N]
+    python3 corpus_store.py stats
+    python3 corpus_store.py compact
+"""
+
+import os
+import json
+import mmap
+import argparse
+from bisect import bisect_right
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_files import atomic_write
+from document_text import SUPPORTED_SUFFIXES, iter_document_pages, join_pages
+from entity_index import INDEX_FILENAME as ENTITY_INDEX_FILENAME, build_entity_index
+from extraction_runner import ExtractionAborted, Quarantine, run_isolated
+from metadata_store import open_store
+from text_cache import file_sha256
+
+BASE_DIR = Path(__file__).parent
+METADATA_DIR = BASE_DIR / "_metadata"
+CORPUS_DIR = METADATA_DIR / "corpus"
+DATA_FILENAME = "texts.bin"
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+
+
+class CorpusStore:
+    """Texte des documents, page par page, en accès direct."""
+
+    def __init__(self, directory=CORPUS_DIR):
+        self.directory = Path(directory)
+        self.data_path = self.directory / DATA_FILENAME
+        self.index_path = self.directory / INDEX_FILENAME
+        self.documents = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.documents = json.load(f)['documents']
+        self._data_file = None
+        self._mmap = None
+
+    def __contains__(self, document_id):
+        return document_id in self.documents
+
+    def __len__(self):
+        return len(self.documents)
+
+    def ids(self):
+        return list(self.documents)
+
+    # Lecture
+
+    def _buffer(self):
+        if self._mmap is None:
+            self._data_file = open(self.data_path, 'rb')
+            self._mmap = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _close_buffer(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._data_file.close()
+            self._mmap = None
+            self._data_file = None
+
+    def is_current(self, document_id, sha256):
+        """Vrai si le document est présent pour ce contenu de fichier source."""
+        entry = self.documents.get(document_id)
+        return entry is not None and entry['sha256'] == sha256
+
+    def page_count(self, document_id):
+        return len(self.documents[document_id]['pages'])
+
+    def page(self, document_id, number):
+        """Texte d'une page (numérotée à partir de 0)."""
+        offset, length, _ = self.documents[document_id]['pages'][number]
+        if not length:
+            return ""
+        return self._buffer()[offset:offset + length].decode('utf-8')
+
+    def iter_pages(self, document_id, start=0, stop=None):
+        """Génère le texte des pages [start, stop) d'un document."""
+        for number in range(*slice(start, stop).indices(self.page_count(document_id))):
+            yield self.page(document_id, number)
+
+    def text(self, document_id, max_pages=None):
+        """Texte des pages non vides, assemblé comme `enrich_metadata.read_document_text`."""
+        pages = (page for page in self.iter_pages(document_id, 0, max_pages) if page)
+        return join_pages(pages).strip()
+
+    def current_pages(self, document_id, source_path, max_pages=None, sha256=None):
+        """Pages non vides du document si le corpus est à jour pour `source_path`, sinon None.
+
+        `sha256` : empreinte du fichier source si l'appelant l'a déjà calculée.
+        """
+        if document_id not in self.documents:
+            return None
+        if not self.is_current(document_id, sha256 or file_sha256(source_path)):
+            return None
+        return (page for page in self.iter_pages(document_id, 0, max_pages) if page)
+
+    def page_at(self, document_id, char_offset):
+        """Numéro de la page contenant le caractère `char_offset` du document."""
+        starts = [char_start for _, _, char_start in self.documents[document_id]['pages']]
+        return max(0, bisect_right(starts, char_offset) - 1)
+
+    # Écriture
+
+    def add(self, document_id, pages, fichier=None, sha256=None):
+        """Ajoute (ou remplace) un document ; `save` rend l'ajout durable."""
+        self._close_buffer()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        char_offset = 0
+        with open(self.data_path, 'ab') as f:
+            for page_text in pages:
+                data = page_text.encode('utf-8')
+                entries.append([f.tell(), len(data), char_offset])
+                f.write(data)
+                char_offset += len(page_text)
+        self.documents[document_id] = {
+            'fichier': fichier,
+            'sha256': sha256,
+            'chars': char_offset,
+            'pages': entries,
+        }
+
+    def remove(self, document_id):
+        return self.documents.pop(document_id, None) is not None
+
+    def save(self):
+        """Écrit l'index (atomique), après avoir rendu les données durables."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.data_path.exists():
+            with open(self.data_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        atomic_write(self.index_path, json.dumps({'version': INDEX_VERSION, 'documents': self.documents},
+                                                 ensure_ascii=False))
+
+    def stats(self):
+        live = sum(length for entry in self.documents.values() for _, length, _ in entry['pages'])
+        total = self.data_path.stat().st_size if self.data_path.exists() else 0
+        return {
+            'documents': len(self.documents),
+            'pages': sum(len(entry['pages']) for entry in self.documents.values()),
+            'chars': sum(entry['chars'] for entry in self.documents.values()),
+            'bytes': total,
+            'dead_bytes': total - live,
+        }
+
+    def compact(self):
+        """Réécrit `texts.bin` sans les versions remplacées ou supprimées."""
+        if not self.data_path.exists():
+            return 0
+        before = self.data_path.stat().st_size
+        buffer = self._buffer() if before else b""
+        data = bytearray()
+        documents = {}
+        for document_id, entry in self.documents.items():
+            pages = []
+            for offset, length, char_offset in entry['pages']:
+                pages.append([len(data), length, char_offset])
+                data += buffer[offset:offset + length]
+            documents[document_id] = dict(entry, pages=pages)
+        self._close_buffer()
+        atomic_write(self.data_path, bytes(data))
+        self.documents = documents
+        self.save()
+        return before - self.data_path.stat().st_size
+
+    def close(self):
+        self._close_buffer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_all_pages(source_path):
+    """Toutes les pages d'un document, pages vides comprises."""
+    return list(iter_document_pages(source_path, skip_empty=False))
+
+
+def extract_document(job):
+    """Extrait un document en processus isolé (exécutable dans un processus fils)."""
+    document_id, source_path, sha256 = job
+    try:
+        return document_id, 'ok', run_isolated(read_all_pages, source_path)
+    except ExtractionAborted as e:
+        return document_id, 'interrompu', (e.reason, e.detail)
+    except Exception as e:
+        return document_id, 'erreur', str(e)[:100]
+
+
+def build_corpus(corpus, workers=1):
+    """Extrait les documents absents ou modifiés et retire ceux qui ont disparu."""
+    quarantine = Quarantine()
+    with open_store() as store:
+        documents = store.load_all()
+
+    jobs = []
+    sources = {}
+    known_ids = set()
+    for doc in documents:
+        document_id = doc['document_id']
+        source_path = BASE_DIR / doc['fichier']
+        if source_path.suffix.lower() not in SUPPORTED_SUFFIXES or not source_path.exists():
+            continue
+        known_ids.add(document_id)
+        sha256 = file_sha256(source_path)
+        if quarantine.get(source_path, sha256):
+            continue
+        if not corpus.is_current(document_id, sha256):
+            jobs.append((document_id, source_path, sha256))
+            sources[document_id] = (doc['fichier'], source_path, sha256)
+
+    removed = [document_id for document_id in corpus.ids() if document_id not in known_ids]
+    for document_id in removed:
+        corpus.remove(document_id)
+
+    print(f"{len(jobs)} documents à extraire, {len(removed)} retirés")
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(extract_document, jobs)
+    else:
+        executor = None
+        results = map(extract_document, jobs)
+
+    added = 0
+    try:
+        for i, (document_id, status, payload) in enumerate(results, 1):
+            fichier, source_path, sha256 = sources[document_id]
+            if status == 'ok':
+                corpus.add(document_id, payload, fichier, sha256)
+                added += 1
+                print(f"[{i}/{len(jobs)}] ✓ {fichier} ({len(payload)} pages)")
+            elif status == 'interrompu':
+                quarantine.add(source_path, *payload, sha256=sha256)
+                print(f"[{i}/{len(jobs)}] ⚠️  {fichier} : extraction interrompue ({payload[0]}), mis en quarantaine")
+            else:
+                print(f"[{i}/{len(jobs)}] ✗ {fichier} : {payload}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    corpus.save()
+    quarantine.save()
+
+    # L'index des entités se reconstruit depuis le corpus, sans relire les sources
+    if added or removed or not (corpus.directory / ENTITY_INDEX_FILENAME).exists():
+        keys, postings = build_entity_index(corpus)
+        print(f"Index des entités : {keys} entités, {postings} occurrences")
+    return added, len(removed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Corpus plein texte des documents sources.")
+    parser.add_argument('action', choices=['build', 'show', 'stats', 'compact'])
+    parser.add_argument('document_id', nargs='?')
+    parser.add_argument('--page', type=int, help="Page à afficher (à partir de 0)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus d'extraction (défaut : 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with CorpusStore() as corpus:
+        if args.action == 'build':
+            added, removed = build_corpus(corpus, args.workers)
+            print(f"{added} documents extraits, {removed} retirés")
+        elif args.action == 'compact':
+            print(f"{corpus.compact()} octets récupérés")
+        elif args.action == 'show':
+            if args.document_id not in corpus:
+                print(f"Document absent du corpus : {args.document_id}")
+                return
+            if args.page is None:
+                print(corpus.text(args.document_id))
+            else:
+                print(corpus.page(args.document_id, args.page))
+            return
+
+        stats = corpus.stats()
+        print(f"{stats['documents']} documents, {stats['pages']} pages, {stats['chars']} caractères")
+        print(f"{stats['bytes'] / 1024 / 1024:.1f} Mo dont {stats['dead_bytes'] / 1024 / 1024:.1f} Mo récupérables par compact")
+
+
+if __name__ == "__main__":
+    main()
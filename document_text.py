@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction de texte en flux des documents sources
+
+Les pages sont produites une à une par un générateur : le consommateur
+s'arrête dès que son besoin est couvert (nombre de caractères, de phrases…)
+et les pages suivantes ne sont jamais extraites. `join_pages` assemble le
+flux en une seule jointure au lieu de concaténations successives.
+
+Formats pris en charge (`iter_document_pages`) :
+- PDF  : pages PyPDF2 ;
+- DOCX : paragraphes de `word/document.xml` ;
+- ODT  : titres et paragraphes de `content.xml` ;
+- XLSX : lignes des feuilles, cellules séparées par « | ».
+
+DOCX, ODT et XLSX sont des archives zip de XML : le XML est lu en flux
+(`iterparse`) et chaque élément est libéré une fois traité. Leurs
+paragraphes ou lignes sont regroupés en pages d'environ `PAGE_CHARS`
+caractères pour que `max_pages` ait un sens comparable au PDF.
+"""
+
+import zipfile
+import posixpath
+from pathlib import Path
+from itertools import islice
+from xml.etree.ElementTree import iterparse
+
+PAGE_CHARS = 3000
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TEXT_NS = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def iter_pdf_pages(pdf_path, max_pages=None, skip_empty=True):
+    """Génère le texte des pages d'un PDF, dans l'ordre.
+
+    Avec `skip_empty=False`, les pages sans texte sont produites comme chaînes
+    vides : la position dans le flux est alors le numéro de page physique.
+    """
+    # PyPDF2 n'est requis que pour les PDF (DOCX, ODT et XLSX : bibliothèque standard)
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    for page in islice(reader.pages, max_pages):
+        page_text = page.extract_text() or ""
+        if page_text or not skip_empty:
+            yield page_text
+
+
+def join_pages(pages, separator="\n\n", max_chars=None):
+    """Assemble les pages, chacune suivie de `separator`.
+
+    Avec `max_chars`, le flux n'est plus consommé dès que ce nombre de
+    caractères est atteint, et le résultat est tronqué à `max_chars`.
+    """
+    parts = []
+    length = 0
+    for page_text in pages:
+        parts.append(page_text)
+        parts.append(separator)
+        length += len(page_text) + len(separator)
+        if max_chars is not None and length >= max_chars:
+            break
+    text = "".join(parts)
+    return text if max_chars is None else text[:max_chars]
+
+
+def iter_docx_paragraphs(docx_path):
+    """Génère le texte des paragraphes non vides d'un DOCX."""
+    with zipfile.ZipFile(docx_path) as archive, archive.open('word/document.xml') as xml:
+        parts = []
+        for event, elem in iterparse(xml, events=('end',)):
+            if elem.tag == f"{W_NS}t":
+                parts.append(elem.text or "")
+            elif elem.tag == f"{W_NS}tab":
+                parts.append("\t")
+            elif elem.tag in (f"{W_NS}br", f"{W_NS}cr"):
+                parts.append("\n")
+            elif elem.tag == f"{W_NS}p":
+                paragraph = "".join(parts).strip()
+                parts = []
+                elem.clear()
+                if paragraph:
+                    yield paragraph
+
+
+def _odt_text(elem):
+    """Texte d'un élément ODT, espaces et tabulations compris."""
+    parts = [elem.text or ""]
+    for child in elem:
+        if child.tag == f"{TEXT_NS}s":
+            parts.append(" " * int(child.get(f"{TEXT_NS}c", "1")))
+        elif child.tag == f"{TEXT_NS}tab":
+            parts.append("\t")
+        elif child.tag == f"{TEXT_NS}line-break":
+            parts.append("\n")
+        elif child.tag not in (f"{TEXT_NS}note", f"{TEXT_NS}p", f"{TEXT_NS}h"):
+            parts.append(_odt_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def iter_odt_paragraphs(odt_path):
+    """Génère le texte des titres et paragraphes non vides d'un ODT."""
+    with zipfile.ZipFile(odt_path) as archive, archive.open('content.xml') as xml:
+        depth = 0
+        for event, elem in iterparse(xml, events=('start', 'end')):
+            if elem.tag not in (f"{TEXT_NS}p", f"{TEXT_NS}h"):
+                continue
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            # Paragraphes imbriqués (notes) : traités avec leur paragraphe parent
+            if depth == 0:
+                paragraph = _odt_text(elem).strip()
+                elem.clear()
+                if paragraph:
+                    yield paragraph
+
+
+def _xlsx_shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as xml:
+        for event, elem in iterparse(xml, events=('end',)):
+            if elem.tag == f"{SHEET_NS}si":
+                strings.append("".join(t.text or "" for t in elem.iter(f"{SHEET_NS}t")))
+                elem.clear()
+    return strings
+
+
+def _xlsx_sheet_paths(archive):
+    """Chemins des feuilles dans l'ordre du classeur."""
+    with archive.open('xl/_rels/workbook.xml.rels') as xml:
+        targets = {
+            rel.get('Id'): rel.get('Target')
+            for event, rel in iterparse(xml, events=('end',))
+            if rel.tag == f"{PKG_REL_NS}Relationship"
+        }
+    paths = []
+    with archive.open('xl/workbook.xml') as xml:
+        for event, elem in iterparse(xml, events=('end',)):
+            if elem.tag == f"{SHEET_NS}sheet":
+                target = targets[elem.get(f"{REL_NS}id")]
+                paths.append(target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target))
+    return paths
+
+
+def iter_xlsx_rows(xlsx_path):
+    """Génère les lignes non vides des feuilles d'un XLSX, cellules séparées par « | ».
+
+    Seules les chaînes partagées sont gardées en mémoire ; les feuilles sont
+    lues ligne à ligne.
+    """
+    with zipfile.ZipFile(xlsx_path) as archive:
+        shared = _xlsx_shared_strings(archive)
+        for sheet_path in _xlsx_sheet_paths(archive):
+            with archive.open(sheet_path) as xml:
+                for event, elem in iterparse(xml, events=('end',)):
+                    if elem.tag != f"{SHEET_NS}row":
+                        continue
+                    cells = []
+                    for cell in elem.iter(f"{SHEET_NS}c"):
+                        cell_type = cell.get('t')
+                        if cell_type == 'inlineStr':
+                            value = "".join(t.text or "" for t in cell.iter(f"{SHEET_NS}t"))
+                        else:
+                            raw = cell.findtext(f"{SHEET_NS}v")
+                            if raw is None:
+                                continue
+                            if cell_type == 's':
+                                value = shared[int(raw)]
+                            elif cell_type == 'b':
+                                value = "VRAI" if raw == "1" else "FAUX"
+                            else:
+                                value = raw
+                        value = value.strip()
+                        if value:
+                            cells.append(value)
+                    elem.clear()
+                    if cells:
+                        yield " | ".join(cells)
+
+
+def paginate(blocks, separator="\n", page_chars=PAGE_CHARS):
+    """Regroupe des paragraphes ou lignes en pages d'environ `page_chars` caractères."""
+    parts = []
+    length = 0
+    for block in blocks:
+        parts.append(block)
+        length += len(block) + len(separator)
+        if length >= page_chars:
+            yield separator.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield separator.join(parts)
+
+
+BLOCK_EXTRACTORS = {
+    '.docx': iter_docx_paragraphs,
+    '.odt': iter_odt_paragraphs,
+    '.xlsx': iter_xlsx_rows,
+}
+
+SUPPORTED_SUFFIXES = frozenset(['.pdf', *BLOCK_EXTRACTORS])
+
+
+def iter_document_pages(file_path, max_pages=None, skip_empty=True):
+    """Génère les pages de texte d'un document, quel que soit son format."""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.pdf':
+        return iter_pdf_pages(file_path, max_pages, skip_empty)
+    if suffix in BLOCK_EXTRACTORS:
+        return islice(paginate(BLOCK_EXTRACTORS[suffix](file_path)), max_pages)
+    raise ValueError(f"Format non pris en charge : {file_path}")
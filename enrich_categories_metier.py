@@ -12,6 +12,9 @@ from pathlib import Path
 from collections import defaultdict, Counter
 from datetime import datetime
 
+from atomic_files import write_json_if_changed
+from metadata_store import open_store
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 METADATA_DIR = BASE_DIR / "_metadata"
@@ -100,13 +103,11 @@ def detect_categories_from_content(metadata):
     return [cat for cat, score in detected]
 
 
-def enrich_metadata_file(filepath):
+def enrich_metadata(metadata):
     """
-    Enrichit un fichier metadata.json avec les catégories métier
+    Enrichit les métadonnées d'un document avec les catégories métier
+    (modifiées en place, sauvegarde à la charge de l'appelant)
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-
     # Type de document (sources_document dans la nouvelle structure)
     type_doc = metadata.get('classification', {}).get('sources_document', '')
 
@@ -144,10 +145,6 @@ def enrich_metadata_file(filepath):
     metadata['classification']['domaines_metier'] = categories_metier
     metadata['classification']['domaine_metier_principal'] = categorie_principale
 
-    # Sauvegarder
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
     return {
         'document_id': metadata.get('document_id', ''),
         'sources_document': type_doc,
@@ -221,18 +218,21 @@ def main():
     print(f"\n🚀 Démarrage de l'enrichissement des catégories métier...")
     print(f"📁 Répertoire metadata : {DOCS_METADATA_DIR}")
 
-    # Lister tous les fichiers metadata.json
-    metadata_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    print(f"📄 {len(metadata_files)} fichiers metadata trouvés\n")
+    with open_store() as store:
+        documents = store.load_all()
+        print(f"📄 {len(documents)} fichiers metadata trouvés\n")
+
+        # Enrichir tous les documents
+        enrichment_results = []
+        for i, metadata in enumerate(documents, 1):
+            if i % 50 == 0:
+                print(f"  Traitement en cours : {i}/{len(documents)}...")
 
-    # Enrichir tous les fichiers
-    enrichment_results = []
-    for i, filepath in enumerate(metadata_files, 1):
-        if i % 50 == 0:
-            print(f"  Traitement en cours : {i}/{len(metadata_files)}...")
+            result = enrich_metadata(metadata)
+            enrichment_results.append(result)
 
-        result = enrich_metadata_file(filepath)
-        enrichment_results.append(result)
+        # Sauvegarder en une seule passe (une transaction avec le backend SQLite)
+        store.save_many(documents)
 
     print(f"\n✅ {len(enrichment_results)} fichiers enrichis")
 
@@ -257,8 +257,7 @@ def main():
                 doc['classification']['domaine_metier_principal'] = matching_result['domaine_principal']
 
         # Sauvegarder l'index mis à jour
-        with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        write_json_if_changed(INDEX_FILE, index_data)
 
         print(f"✅ Index complet mis à jour : {INDEX_FILE}")
 
@@ -1,21 +1,46 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Enrichissement des métadonnées par extraction de contenu PDF
+Enrichissement des métadonnées par extraction de contenu (PDF, DOCX, ODT, XLSX)
 """
 
+import io
 import os
 import re
 import json
+import time
+import argparse
 from datetime import datetime
 from pathlib import Path
-from collections import Counter
-from PyPDF2 import PdfReader
+from itertools import islice
+from contextlib import redirect_stdout
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from text_cache import TextCache, file_sha256
+from document_text import SUPPORTED_SUFFIXES, iter_document_pages, join_pages
+from corpus_store import CorpusStore
+from term_matcher import TermMatcher, fold
+from entity_scanner import scan_entities
+from metadata_store import open_store
+from extraction_runner import (DEFAULT_MEMORY_LIMIT, DEFAULT_TIMEOUT, ExtractionAborted,
+                               Quarantine, run_isolated)
 
 BASE_DIR = Path(__file__).parent
 SOURCES_DIR = BASE_DIR / "sources_documentaires"
 METADATA_DIR = BASE_DIR / "_metadata"
 DOCS_METADATA_DIR = METADATA_DIR / "documents"
+VOCABULAIRE_FILE = METADATA_DIR / "vocabulaire_notarial.json"
+
+TEXT_CACHE = TextCache()
+QUARANTINE = Quarantine()
+CORPUS = CorpusStore()
+
+# Documents en cours par processus en mode parallèle
+IN_FLIGHT_PER_WORKER = 2
+
+# Documents enrichis enregistrés par lot (`save_many`)
+SAVE_BATCH_SIZE = 50
 
 # Termes juridiques notariaux à détecter
 TERMES_NOTARIAUX = {
@@ -41,31 +66,60 @@ TERMES_NOTARIAUX = {
     "tarification": ["émoluments", "honoraires"],
 }
 
-# Patterns pour extraire des informations
-PATTERNS = {
-    'date': r'\b(\d{1,2})\s*(janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s*(\d{4})\b',
-    'article': r'\b[Aa]rticle\s+(\d+(?:\.\d+)?)\b',
-    'decret': r'\b[Dd]écret\s*n?°?\s*(\d{4}-\d+)\b',
-    'loi': r'\b[Ll]oi\s*n?°?\s*(\d{4}-\d+)\b',
-    'montant': r'\b(\d+(?:\s?\d{3})*(?:,\d+)?)\s*(?:€|euros?)\b',
-    'pourcentage': r'\b(\d+(?:,\d+)?)\s*%\b',
-}
 
+def load_terminology(vocabulary_file=VOCABULAIRE_FILE):
+    """Terminologie : TERMES_NOTARIAUX puis les termes du vocabulaire notarial absents de ceux-ci.
+
+    Retourne une liste de (terme, synonymes).
+    """
+    terminology = list(TERMES_NOTARIAUX.items())
+    known = {fold(term) for term in TERMES_NOTARIAUX}
+    if vocabulary_file.exists():
+        with open(vocabulary_file, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                if fold(entry['terme']) not in known:
+                    known.add(fold(entry['terme']))
+                    terminology.append((entry['terme'], entry.get('synonymes', [])))
+    return terminology
+
+
+TERMINOLOGY = load_terminology()
+
+# Clé (indice du terme, 0 pour le terme principal / n pour le n-ième synonyme)
+TERM_MATCHER = TermMatcher(
+    ((index, variant), phrase)
+    for index, (term, synonyms) in enumerate(TERMINOLOGY)
+    for variant, phrase in enumerate([term, *synonyms])
+)
+
+def read_document_text(source_path, max_pages=10):
+    """Lit le texte des premières pages d'un document source (sans cache).
+
+    Toutes les pages demandées sont lues : l'analyse des termes, dates et
+    références porte sur l'ensemble du texte.
+    """
+    return join_pages(iter_document_pages(source_path, max_pages)).strip()
 
-def extract_pdf_text(pdf_path, max_pages=10):
-    """Extrait le texte des premières pages d'un PDF."""
+
+def extract_document_text(source_path, max_pages=10, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT,
+                          sha256=None):
+    """Extrait le texte des premières pages d'un document (via le cache de texte).
+
+    En l'absence de cache, l'extraction tourne dans un processus isolé borné
+    en durée et en mémoire ; `ExtractionAborted` est propagée à l'appelant.
+    `sha256` : empreinte du fichier si l'appelant l'a déjà calculée.
+    """
     try:
-        text = ""
-        reader = PdfReader(pdf_path)
-        num_pages = min(len(reader.pages), max_pages)
-
-        for i in range(num_pages):
-            page_text = reader.pages[i].extract_text()
-            if page_text:
-                text += page_text + "\n\n"
-        return text.strip()
+        return TEXT_CACHE.get_or_extract(
+            source_path, 'enrich_metadata.pages', {'max_pages': max_pages},
+            lambda: run_isolated(read_document_text, source_path, max_pages,
+                                 timeout=timeout, memory_limit=memory_limit),
+            sha256,
+        )
+    except ExtractionAborted:
+        raise
     except Exception as e:
-        print(f"   Erreur extraction {pdf_path.name}: {str(e)[:50]}")
+        print(f"   Erreur extraction {source_path.name}: {str(e)[:50]}")
         return ""
 
 
@@ -97,90 +151,86 @@ def generate_summary(text, max_sentences=3):
 
 
 def extract_key_terms(text):
-    """Extrait les termes clés notariaux du texte."""
+    """Extrait les termes clés notariaux du texte.
+
+    Une seule passe sur le texte (`TERM_MATCHER`), sans tenir compte de la
+    casse ni des accents, sur des mots entiers. La fréquence est celle du
+    terme principal, à défaut celle du premier synonyme présent.
+    """
     if not text:
         return []
 
-    text_lower = text.lower()
+    counts = TERM_MATCHER.counts(text)
     found_terms = []
 
-    for term, synonyms in TERMES_NOTARIAUX.items():
-        # Chercher le terme principal
-        if term.lower() in text_lower:
+    for index, (term, synonyms) in enumerate(TERMINOLOGY):
+        frequency = next((counts[(index, variant)] for variant in range(len(synonyms) + 1)
+                          if counts[(index, variant)]), 0)
+        if frequency:
             found_terms.append({
                 "terme": term,
                 "synonymes": synonyms,
-                "frequence": text_lower.count(term.lower())
+                "frequence": frequency
             })
-        else:
-            # Chercher les synonymes
-            for syn in synonyms:
-                if syn.lower() in text_lower:
-                    found_terms.append({
-                        "terme": term,
-                        "synonymes": synonyms,
-                        "frequence": text_lower.count(syn.lower())
-                    })
-                    break
 
     # Trier par fréquence
     found_terms.sort(key=lambda x: x["frequence"], reverse=True)
     return found_terms[:10]
 
 
-def extract_dates_mentioned(text):
+def extract_dates_mentioned(text, entities=None):
     """Extrait les dates mentionnées dans le document."""
     if not text:
         return []
 
-    dates = []
-    matches = re.findall(PATTERNS['date'], text, re.IGNORECASE)
+    if entities is None:
+        entities = list(scan_entities(text))
 
-    mois_map = {
-        'janvier': '01', 'février': '02', 'mars': '03', 'avril': '04',
-        'mai': '05', 'juin': '06', 'juillet': '07', 'août': '08',
-        'septembre': '09', 'octobre': '10', 'novembre': '11', 'décembre': '12'
-    }
-
-    for jour, mois, annee in matches:
-        mois_num = mois_map.get(mois.lower(), '01')
-        date_str = f"{annee}-{mois_num}-{jour.zfill(2)}"
-        if date_str not in dates:
-            dates.append(date_str)
+    dates = []
+    for entity in entities:
+        if entity.type == 'date' and entity.valeur not in dates:
+            dates.append(entity.valeur)
 
     return sorted(dates)[:5]
 
 
-def extract_references(text):
+def extract_references(text, entities=None):
     """Extrait les références légales mentionnées."""
     if not text:
         return []
 
+    if entities is None:
+        entities = list(scan_entities(text))
+
     refs = []
 
     # Articles de loi
-    articles = re.findall(PATTERNS['article'], text)
+    articles = [e.valeur for e in entities if e.type == 'article']
     for art in articles[:5]:
         refs.append(f"Article {art}")
 
     # Décrets
-    decrets = re.findall(PATTERNS['decret'], text)
+    decrets = [e.valeur for e in entities if e.type == 'decret']
     for dec in decrets[:3]:
         refs.append(f"Décret {dec}")
 
     # Lois
-    lois = re.findall(PATTERNS['loi'], text)
+    lois = [e.valeur for e in entities if e.type == 'loi']
     for loi in lois[:3]:
         refs.append(f"Loi {loi}")
 
     return list(set(refs))
 
 
-def generate_questions_from_content(text, doc_type):
+def generate_questions_from_content(text, doc_type, entities=None):
     """Génère des questions typiques basées sur le contenu."""
     if not text:
         return []
 
+    if entities is None:
+        entities = list(scan_entities(text))
+    entity_types = {entity.type for entity in entities}
+
     questions = []
     text_lower = text.lower()
 
@@ -218,30 +268,33 @@ def generate_questions_from_content(text, doc_type):
         questions.append("Comment analyser ces données pour mon secteur ?")
 
     # Ajouter des questions basées sur les montants/pourcentages détectés
-    if re.search(PATTERNS['montant'], text):
+    if 'montant' in entity_types:
         questions.append("Quels sont les montants mentionnés dans ce document ?")
 
-    if re.search(PATTERNS['pourcentage'], text):
+    if 'pourcentage' in entity_types:
         questions.append("Quels pourcentages sont applicables ?")
 
     # Limiter à 5 questions uniques et pertinentes
     return list(set(questions))[:5]
 
 
-def extract_important_numbers(text):
+def extract_important_numbers(text, entities=None):
     """Extrait les montants et pourcentages importants."""
     if not text:
         return {}
 
+    if entities is None:
+        entities = list(scan_entities(text))
+
     numbers = {}
 
     # Montants en euros
-    montants = re.findall(PATTERNS['montant'], text)
+    montants = [e.valeur for e in entities if e.type == 'montant']
     if montants:
         numbers['montants_euros'] = list(set(montants))[:5]
 
     # Pourcentages
-    pourcentages = re.findall(PATTERNS['pourcentage'], text)
+    pourcentages = [e.valeur for e in entities if e.type == 'pourcentage']
     if pourcentages:
         numbers['pourcentages'] = list(set(pourcentages))[:5]
 
@@ -249,11 +302,17 @@ def extract_important_numbers(text):
 
 
 def enrich_metadata(metadata, pdf_text):
-    """Enrichit les métadonnées avec le contenu extrait du PDF."""
+    """Enrichit les métadonnées avec le contenu extrait du document."""
 
     if not pdf_text:
         return metadata
 
+    # Source modifiée signalée par l'indexation incrémentale : ré-enrichie ici
+    metadata.pop('a_reenrichir', None)
+
+    # Dates, références, montants et pourcentages : une seule passe sur le texte
+    entities = list(scan_entities(pdf_text))
+
     # 1. Générer un meilleur résumé
     summary = generate_summary(pdf_text)
     if summary and len(summary) > 50:
@@ -273,7 +332,7 @@ def enrich_metadata(metadata, pdf_text):
         ]
 
     # 3. Extraire les dates importantes
-    dates = extract_dates_mentioned(pdf_text)
+    dates = extract_dates_mentioned(pdf_text, entities)
     if dates:
         metadata['dates_mentionnees'] = dates
         # Mettre à jour la date d'effet si trouvée
@@ -282,7 +341,7 @@ def enrich_metadata(metadata, pdf_text):
 
     # 4. Générer de meilleures questions typiques
     doc_type = metadata['classification']['type_document']
-    new_questions = generate_questions_from_content(pdf_text, doc_type)
+    new_questions = generate_questions_from_content(pdf_text, doc_type, entities)
     if new_questions:
         # Combiner avec les questions existantes
         existing = metadata.get('questions_typiques', [])
@@ -290,12 +349,12 @@ def enrich_metadata(metadata, pdf_text):
         metadata['questions_typiques'] = all_questions[:8]
 
     # 5. Extraire les références légales
-    refs = extract_references(pdf_text)
+    refs = extract_references(pdf_text, entities)
     if refs:
         metadata['relations_documentaires']['reference'] = refs
 
     # 6. Extraire les chiffres importants
-    numbers = extract_important_numbers(pdf_text)
+    numbers = extract_important_numbers(pdf_text, entities)
     if numbers:
         metadata['donnees_chiffrees'] = numbers
 
@@ -325,72 +384,209 @@ def enrich_metadata(metadata, pdf_text):
     return metadata
 
 
-def process_all_documents():
+def enrich_document(metadata, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Extrait et enrichit un document (exécutable dans un processus fils).
+
+    N'écrit rien : retourne un dict avec le statut ('enrichi', 'non_supporte',
+    'introuvable', 'sans_texte', 'quarantaine' ou 'interrompu'), les
+    métadonnées enrichies, la durée, les messages émis pendant l'extraction
+    et l'activité du cache de texte.
+    """
+    start = time.perf_counter()
+    hits, misses = TEXT_CACHE.hits, TEXT_CACHE.misses
+
+    result = {
+        'document_id': metadata['document_id'],
+        'nom_fichier': metadata['nom_fichier'],
+        'source_path': None,
+        'metadata': None,
+        'log': '',
+    }
+
+    # Trouver le fichier source correspondant
+    source_path = BASE_DIR / metadata['fichier']
+
+    supported = source_path.suffix.lower() in SUPPORTED_SUFFIXES
+
+    # Empreinte calculée une fois pour la quarantaine, le corpus et le cache de texte
+    sha256 = file_sha256(source_path) if supported and source_path.exists() else None
+
+    if not supported:
+        result['status'] = 'non_supporte'
+    elif sha256 is None:
+        result['status'] = 'introuvable'
+    elif QUARANTINE.get(source_path, sha256):
+        # Fichier déjà fautif lors d'une exécution précédente (même contenu)
+        result['status'] = 'quarantaine'
+        result['reason'] = QUARANTINE.get(source_path, sha256)['raison']
+    else:
+        result['source_path'] = source_path
+        result['sha256'] = sha256
+        # Les messages d'erreur d'extraction sont restitués dans l'ordre par le parent
+        log = io.StringIO()
+        try:
+            # Texte déjà présent dans le corpus plein texte : pas d'extraction
+            pages = CORPUS.current_pages(metadata['document_id'], source_path, 5, sha256)
+            if pages is not None:
+                text = join_pages(pages).strip()
+            else:
+                with redirect_stdout(log):
+                    text = extract_document_text(source_path, 5, timeout, memory_limit, sha256)
+        except ExtractionAborted as e:
+            result.update(status='interrompu', reason=e.reason, detail=e.detail)
+        else:
+            if not text:
+                result['status'] = 'sans_texte'
+            else:
+                result['status'] = 'enrichi'
+                result['metadata'] = enrich_metadata(metadata, text)
+        result['log'] = log.getvalue()
+
+    result['cache_hits'] = TEXT_CACHE.hits - hits
+    result['cache_misses'] = TEXT_CACHE.misses - misses
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def iter_enriched(documents, workers=1, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Enrichit les documents, résultats dans l'ordre de `documents`.
+
+    Avec plusieurs processus, au plus `workers * IN_FLIGHT_PER_WORKER`
+    documents sont en cours à la fois : la mémoire reste bornée et les
+    résultats sont écrits au fil de l'eau par le processus principal.
+    """
+    if workers <= 1:
+        for metadata in documents:
+            yield enrich_document(metadata, timeout, memory_limit)
+        return
+
+    pending = deque()
+    documents = iter(documents)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for metadata in islice(documents, workers * IN_FLIGHT_PER_WORKER):
+            pending.append(executor.submit(enrich_document, metadata, timeout, memory_limit))
+        while pending:
+            result = pending.popleft().result()
+            for metadata in islice(documents, 1):
+                pending.append(executor.submit(enrich_document, metadata, timeout, memory_limit))
+            yield result
+
+
+def iter_store_documents(store):
+    """Charge les documents du store un par un (mémoire bornée)."""
+    for document_id in store.ids():
+        metadata = store.load(document_id)
+        if metadata is not None:
+            yield metadata
+
+
+def process_all_documents(workers=1, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
     """Traite tous les documents et enrichit leurs métadonnées."""
 
-    print("Enrichissement des métadonnées par analyse de contenu PDF")
+    print("Enrichissement des métadonnées par analyse de contenu")
     print("=" * 60)
     print()
 
-    # Charger tous les fichiers metadata
-    metadata_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    total = len(metadata_files)
+    # Documents du backend de métadonnées (JSON ou SQLite)
+    store = open_store()
+    total = store.count()
 
-    print(f"Documents à traiter : {total}")
+    print(f"Documents à traiter : {total} ({workers} processus)")
     print()
 
     processed = 0
     errors = 0
     skipped = 0
-
-    for i, meta_file in enumerate(metadata_files, 1):
-        # Charger les métadonnées existantes
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        # Trouver le fichier PDF correspondant
-        pdf_path = BASE_DIR / metadata['fichier']
-
-        print(f"[{i}/{total}] {metadata['nom_fichier'][:60]}...")
-
-        # Vérifier si c'est un PDF
-        if not pdf_path.suffix.lower() == '.pdf':
-            print(f"   Ignoré (non-PDF)")
+    quarantined = 0
+    new_quarantined = 0
+    timings = []
+    start = time.perf_counter()
+
+    enriched = []
+    for i, result in enumerate(iter_enriched(iter_store_documents(store), workers, timeout, memory_limit), 1):
+        print(f"[{i}/{total}] {result['nom_fichier'][:60]}...")
+        if result['log']:
+            print(result['log'], end='')
+
+        TEXT_CACHE.hits += result['cache_hits']
+        TEXT_CACHE.misses += result['cache_misses']
+        timings.append((result['elapsed'], result['nom_fichier']))
+
+        status = result['status']
+        if status == 'non_supporte':
+            print(f"   Ignoré (format non pris en charge)")
             skipped += 1
             continue
 
-        if not pdf_path.exists():
+        if status == 'introuvable':
             print(f"   Fichier non trouvé")
             errors += 1
             continue
 
-        # Extraire le texte du PDF
-        pdf_text = extract_pdf_text(pdf_path, max_pages=5)
+        if status == 'quarantaine':
+            print(f"   Ignoré (en quarantaine : {result['reason']})")
+            quarantined += 1
+            continue
 
-        if not pdf_text:
+        if status == 'interrompu':
+            print(f"   ⚠️  Extraction interrompue ({result['reason']} : {result['detail']}), mis en quarantaine")
+            QUARANTINE.add(result['source_path'], result['reason'], result['detail'], result['sha256'])
+            quarantined += 1
+            new_quarantined += 1
+            continue
+
+        if status == 'sans_texte':
             print(f"   Pas de texte extrait")
             skipped += 1
             continue
 
-        # Enrichir les métadonnées
-        metadata = enrich_metadata(metadata, pdf_text)
-
-        # Sauvegarder les métadonnées enrichies
-        with open(meta_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        # Sauvegarder les métadonnées enrichies, par lot
+        metadata = result['metadata']
+        enriched.append(metadata)
+        if len(enriched) >= SAVE_BATCH_SIZE:
+            store.save_many(enriched)
+            enriched = []
 
         print(f"   ✓ Enrichi (résumé: {len(metadata.get('resume', ''))} chars, "
-              f"{len(metadata.get('vocabulaire_specifique', []))} termes)")
+              f"{len(metadata.get('vocabulaire_specifique', []))} termes, {result['elapsed']:.2f} s)")
 
         processed += 1
 
+    store.save_many(enriched)
+    store.close()
+    elapsed = time.perf_counter() - start
+
     print()
     print("=" * 60)
     print(f"Traitement terminé !")
     print(f"  - Documents enrichis : {processed}")
-    print(f"  - Ignorés (non-PDF) : {skipped}")
+    print(f"  - Ignorés (format non pris en charge ou sans texte) : {skipped}")
     print(f"  - Erreurs : {errors}")
+    print(f"  - En quarantaine : {quarantined} (dont {new_quarantined} nouveaux)")
+    print(f"  - {TEXT_CACHE.format_stats()}")
+    if timings:
+        print(f"  - Durée : {elapsed:.1f} s ({len(timings) / elapsed:.1f} documents/s, "
+              f"{sum(t for t, _ in timings) / len(timings):.2f} s en moyenne par document)")
+        print(f"  - Documents les plus lents :")
+        for duration, name in sorted(timings, reverse=True)[:5]:
+            print(f"      {duration:.2f} s  {name[:60]}")
+
+    if new_quarantined:
+        QUARANTINE.save()
+    TEXT_CACHE.prune()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Enrichissement des métadonnées par analyse de contenu")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus d'extraction (défaut : 1)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Durée maximale d'extraction par document, en secondes (défaut : {DEFAULT_TIMEOUT})")
+    parser.add_argument('--memory-limit', type=int, default=DEFAULT_MEMORY_LIMIT // (1024 * 1024),
+                        help=f"Mémoire maximale par extraction, en Mo (défaut : {DEFAULT_MEMORY_LIMIT // (1024 * 1024)})")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    process_all_documents()
+    args = parse_args()
+    process_all_documents(args.workers, args.timeout, args.memory_limit * 1024 * 1024)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index des entités du corpus : où chaque date, article, décret… apparaît
+
+Pour chaque entité normalisée (« decret:2024-906 », « date:2024-07-01 »…),
+l'index donne ses occurrences : (document_id, page, décalage en caractères
+dans le document). Il est construit à partir du corpus plein texte
+(`corpus_store.py build` le reconstruit), sans relire les documents sources.
+
+Fichier unique `_metadata/corpus/entities.idx`, remplacé atomiquement :
+- en-tête : signature puis longueur du répertoire (8 octets) ;
+- répertoire JSON : documents et, par clé, (première occurrence, nombre) ;
+- occurrences : triplets d'entiers 32 bits (document, page, décalage),
+  regroupés par clé.
+
+Le répertoire est lu à l'ouverture ; les occurrences sont lues dans un
+mmap, seulement pour les clés demandées.
+
+Les entités à cheval sur deux pages ne sont pas indexées.
+
+Usage :
+    python3 entity_index.py find "Décret n° 2024-906"
+    python3 entity_index.py keys [--type decret]
+    python3 entity_index.py stats
+"""
+
+import re
+import json
+import mmap
+import struct
+import argparse
+from pathlib import Path
+
+from atomic_files import atomic_write
+from entity_scanner import ENTITY_TYPES, scan_entities
+
+BASE_DIR = Path(__file__).parent
+CORPUS_DIR = BASE_DIR / "_metadata" / "corpus"
+INDEX_FILENAME = "entities.idx"
+INDEX_FILE = CORPUS_DIR / INDEX_FILENAME
+
+MAGIC = b"BNENT001"
+HEADER = struct.Struct('<8sQ')
+POSTING = struct.Struct('<III')
+
+
+def entity_key(kind, valeur):
+    """Clé d'index d'une entité ; les espaces des nombres sont ignorés (« 1 500 » = « 1500 »)."""
+    if kind in ('montant', 'pourcentage'):
+        valeur = re.sub(r'\s', '', valeur)
+    return f"{kind}:{valeur}"
+
+
+def iter_document_entities(corpus, document_id):
+    """Génère (clé, page, décalage dans le document) pour les entités d'un document du corpus."""
+    for number, (_, _, char_offset) in enumerate(corpus.documents[document_id]['pages']):
+        for entity in scan_entities(corpus.page(document_id, number)):
+            yield entity_key(entity.type, entity.valeur), number, char_offset + entity.debut
+
+
+def build_entity_index(corpus, path=None):
+    """Reconstruit l'index des entités de tous les documents du corpus.
+
+    Retourne (nombre de clés, nombre d'occurrences).
+    """
+    path = Path(path) if path else corpus.directory / INDEX_FILENAME
+    documents = sorted(corpus.ids())
+    postings = {}
+    for doc_index, document_id in enumerate(documents):
+        for key, page, offset in iter_document_entities(corpus, document_id):
+            postings.setdefault(key, []).append((doc_index, page, offset))
+
+    keys = {}
+    data = bytearray()
+    start = 0
+    for key in sorted(postings):
+        for posting in postings[key]:
+            data += POSTING.pack(*posting)
+        keys[key] = [start, len(postings[key])]
+        start += len(postings[key])
+
+    directory = json.dumps({'documents': documents, 'keys': keys}, ensure_ascii=False).encode('utf-8')
+
+    atomic_write(path, HEADER.pack(MAGIC, len(directory)) + directory + bytes(data))
+    return len(keys), start
+
+
+class EntityIndex:
+    """Lecture de l'index des entités."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = Path(path)
+        self.documents = []
+        self._keys = {}
+        self._file = None
+        self._mmap = None
+        self._postings_start = 0
+        if not self.path.exists():
+            return
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, directory_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Index des entités illisible : {self.path}")
+        directory = json.loads(self._mmap[HEADER.size:HEADER.size + directory_length])
+        self.documents = directory['documents']
+        self._keys = directory['keys']
+        self._postings_start = HEADER.size + directory_length
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self, kind=None):
+        """Clés indexées, éventuellement d'un seul type."""
+        if kind is None:
+            return list(self._keys)
+        return [key for key in self._keys if key.startswith(f"{kind}:")]
+
+    def count(self, kind, valeur):
+        entry = self._keys.get(entity_key(kind, valeur))
+        return entry[1] if entry else 0
+
+    def postings(self, kind, valeur):
+        """Occurrences d'une entité : liste de (document_id, page, décalage)."""
+        entry = self._keys.get(entity_key(kind, valeur))
+        if entry is None:
+            return []
+        start, count = entry
+        offset = self._postings_start + start * POSTING.size
+        view = memoryview(self._mmap)[offset:offset + count * POSTING.size]
+        try:
+            return [(self.documents[doc_index], page, char_offset)
+                    for doc_index, page, char_offset in POSTING.iter_unpack(view)]
+        finally:
+            view.release()
+
+    def pages(self, kind, valeur):
+        """Pages citant une entité, par document : {document_id: [pages]}."""
+        result = {}
+        for document_id, page, _ in self.postings(kind, valeur):
+            pages = result.setdefault(document_id, [])
+            if not pages or pages[-1] != page:
+                pages.append(page)
+        return result
+
+    def find(self, text):
+        """Occurrences des entités reconnues dans `text` : {clé: occurrences}."""
+        return {
+            entity_key(entity.type, entity.valeur): self.postings(entity.type, entity.valeur)
+            for entity in scan_entities(text)
+        }
+
+    def stats(self):
+        counts = {kind: 0 for kind in ENTITY_TYPES}
+        for key in self._keys:
+            counts[key.split(':', 1)[0]] += 1
+        return {
+            'documents': len(self.documents),
+            'keys': len(self._keys),
+            'postings': sum(count for _, count in self._keys.values()),
+            'keys_by_type': counts,
+            'bytes': self.path.stat().st_size if self.path.exists() else 0,
+        }
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Index des entités du corpus.")
+    parser.add_argument('action', choices=['find', 'keys', 'stats'])
+    parser.add_argument('text', nargs='?', help="Texte contenant les entités à chercher (find)")
+    parser.add_argument('--type', choices=ENTITY_TYPES, help="Type d'entité (keys)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not INDEX_FILE.exists():
+        print("Index des entités absent : lancer 'python3 corpus_store.py build'")
+        return
+
+    with EntityIndex() as index:
+        if args.action == 'find':
+            results = index.find(args.text or "")
+            if not results:
+                print("Aucune entité reconnue dans le texte")
+            for key, postings in results.items():
+                kind, valeur = key.split(':', 1)
+                pages = index.pages(kind, valeur)
+                print(f"{key} : {len(postings)} occurrences dans {len(pages)} documents")
+                for document_id, document_pages in pages.items():
+                    print(f"  {document_id} : pages {', '.join(str(p) for p in document_pages)}")
+        elif args.action == 'keys':
+            for key in sorted(index.keys(args.type)):
+                kind, valeur = key.split(':', 1)
+                print(f"{key} ({index.count(kind, valeur)})")
+        else:
+            stats = index.stats()
+            print(f"{stats['keys']} entités, {stats['postings']} occurrences, "
+                  f"{stats['documents']} documents, {stats['bytes'] / 1024:.0f} Ko")
+            for kind, count in stats['keys_by_type'].items():
+                print(f"  {kind}: {count}")
+
+
+if __name__ == "__main__":
+    main()
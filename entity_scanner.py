@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repérage des entités typées du texte
+
+Les motifs (dates, articles, décrets, lois, montants, pourcentages) sont
+compilés une fois. `scan_entities` produit les entités typées de tous les
+motifs, fusionnées dans l'ordre du texte, avec leur position : les
+extracteurs d'`enrich_metadata` se partagent ce résultat au lieu de
+relancer chacun leurs recherches.
+
+Chaque type est cherché indépendamment, comme avec un `re.findall` par
+motif : des entités de types différents peuvent se chevaucher (dans
+« article 5 mars 2024 », l'article et la date sont tous deux repérés).
+"""
+
+import re
+import heapq
+from collections import namedtuple
+
+# Une entité : type, valeur normalisée, position [debut, fin) et texte d'origine
+Entity = namedtuple('Entity', ['type', 'valeur', 'debut', 'fin', 'texte'])
+
+ENTITY_PATTERNS = {
+    'date': r'(?i:\b(?P<date_jour>\d{1,2})\s*(?P<date_mois>janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s*(?P<date_annee>\d{4})\b)',
+    'article': r'\b[Aa]rticle\s+(?P<article_numero>\d+(?:\.\d+)?)\b',
+    'decret': r'\b[Dd]écret\s*n?°?\s*(?P<decret_numero>\d{4}-\d+)\b',
+    'loi': r'\b[Ll]oi\s*n?°?\s*(?P<loi_numero>\d{4}-\d+)\b',
+    'montant': r'\b(?P<montant_valeur>\d+(?:\s?\d{3})*(?:,\d+)?)\s*(?:€|euros?)\b',
+    'pourcentage': r'\b(?P<pourcentage_valeur>\d+(?:,\d+)?)\s*%\b',
+}
+
+ENTITY_TYPES = tuple(ENTITY_PATTERNS)
+TYPE_ORDER = {kind: index for index, kind in enumerate(ENTITY_TYPES)}
+
+ENTITY_REGEXES = {name: re.compile(pattern) for name, pattern in ENTITY_PATTERNS.items()}
+
+MOIS = {
+    'janvier': '01', 'février': '02', 'mars': '03', 'avril': '04',
+    'mai': '05', 'juin': '06', 'juillet': '07', 'août': '08',
+    'septembre': '09', 'octobre': '10', 'novembre': '11', 'décembre': '12'
+}
+
+# Groupe portant la valeur de chaque type (hors dates)
+VALUE_GROUPS = {
+    'article': 'article_numero',
+    'decret': 'decret_numero',
+    'loi': 'loi_numero',
+    'montant': 'montant_valeur',
+    'pourcentage': 'pourcentage_valeur',
+}
+
+
+def _scan_type(kind, text):
+    for match in ENTITY_REGEXES[kind].finditer(text):
+        if kind == 'date':
+            mois = MOIS.get(match.group('date_mois').lower(), '01')
+            value = f"{match.group('date_annee')}-{mois}-{match.group('date_jour').zfill(2)}"
+        else:
+            value = match.group(VALUE_GROUPS[kind])
+        yield Entity(kind, value, match.start(), match.end(), match.group())
+
+
+def scan_entities(text):
+    """Génère les entités du texte, dans l'ordre du texte.
+
+    À position égale, les types suivent l'ordre de `ENTITY_PATTERNS`. La
+    valeur d'une date est normalisée en AAAA-MM-JJ ; celle des autres types
+    est le numéro ou nombre tel qu'écrit (« 2023-1234 », « 1 500,50 »).
+    """
+    if not text:
+        return
+    yield from heapq.merge(*(_scan_type(kind, text) for kind in ENTITY_TYPES),
+                           key=lambda entity: (entity.debut, TYPE_ORDER[entity.type]))
+
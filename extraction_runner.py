@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction isolée des documents sources
+
+Un PDF malformé ou démesuré peut bloquer `extract_text()` de PyPDF2 pendant
+des minutes ou faire exploser la mémoire. `run_isolated` exécute l'extraction
+dans un processus fils avec :
+- un délai maximal (le fils est tué au-delà) ;
+- un plafond de mémoire (RLIMIT_AS, systèmes POSIX).
+
+Les fichiers fautifs sont consignés dans une liste de quarantaine
+(`_metadata/extraction_quarantine.json`), indexée par empreinte de contenu :
+ils sont ignorés aux exécutions suivantes tant que leur contenu ne change pas.
+
+Usage :
+    python3 extraction_runner.py list
+    python3 extraction_runner.py clear
+"""
+
+import json
+import argparse
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows : pas de plafond mémoire
+    resource = None
+
+from atomic_files import write_json_if_changed
+from text_cache import file_sha256
+
+BASE_DIR = Path(__file__).parent
+METADATA_DIR = BASE_DIR / "_metadata"
+QUARANTINE_FILE = METADATA_DIR / "extraction_quarantine.json"
+
+DEFAULT_TIMEOUT = 60                       # secondes par document
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024  # octets par document
+
+
+class ExtractionAborted(Exception):
+    """Extraction interrompue : délai dépassé, mémoire épuisée ou processus tué."""
+
+    def __init__(self, reason, detail=""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+
+def _run_child(conn, func, args, memory_limit):
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        conn.send(('ok', func(*args)))
+    except MemoryError:
+        conn.send(('memoire', f"plafond de {memory_limit // (1024 * 1024)} Mo atteint"))
+    except Exception as e:
+        conn.send(('erreur', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_isolated(func, *args, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Exécute `func(*args)` dans un processus fils et retourne son résultat.
+
+    Lève `ExtractionAborted` (raison 'delai', 'memoire' ou 'crash') si le fils
+    dépasse ses limites ou meurt sans répondre, et `RuntimeError` si `func`
+    lève une exception ordinaire.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_child, args=(sender, func, args, memory_limit))
+    process.start()
+    sender.close()
+
+    try:
+        if not receiver.poll(timeout):
+            raise ExtractionAborted('delai', f"plus de {timeout:g} s")
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            process.join()
+            raise ExtractionAborted('crash', f"code de sortie {process.exitcode}") from None
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+
+    if status == 'ok':
+        return payload
+    if status == 'memoire':
+        raise ExtractionAborted('memoire', payload)
+    raise RuntimeError(payload)
+
+
+class Quarantine:
+    """Liste persistante des fichiers dont l'extraction a été interrompue."""
+
+    def __init__(self, path=QUARANTINE_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self._digests = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _digest(self, file_path):
+        key = str(file_path)
+        if key not in self._digests:
+            self._digests[key] = file_sha256(file_path)
+        return self._digests[key]
+
+    def get(self, file_path, sha256=None):
+        """Entrée de quarantaine du fichier (selon son contenu actuel), ou None.
+
+        `sha256` : empreinte du fichier si l'appelant l'a déjà calculée.
+        """
+        if not self.entries:
+            return None
+        return self.entries.get(sha256 or self._digest(file_path))
+
+    def add(self, file_path, reason, detail="", sha256=None):
+        file_path = Path(file_path)
+        try:
+            fichier = str(file_path.relative_to(BASE_DIR))
+        except ValueError:
+            fichier = str(file_path)
+        self.entries[sha256 or self._digest(file_path)] = {
+            'fichier': fichier,
+            'raison': reason,
+            'detail': detail,
+            'date': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def clear(self):
+        self.entries = {}
+
+    def save(self):
+        """Écrit la liste (écriture atomique) ; supprime le fichier si elle est vide."""
+        if not self.entries:
+            if self.path.exists():
+                self.path.unlink()
+            return
+        write_json_if_changed(self.path, self.entries)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gestion de la quarantaine d'extraction.")
+    parser.add_argument('action', choices=['list', 'clear'])
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    quarantine = Quarantine()
+
+    if args.action == 'clear':
+        count = len(quarantine)
+        quarantine.clear()
+        quarantine.save()
+        print(f"{count} fichiers retirés de la quarantaine")
+        return
+
+    print(f"{len(quarantine)} fichiers en quarantaine")
+    for entry in sorted(quarantine.entries.values(), key=lambda e: e['fichier']):
+        print(f"  [{entry['raison']}] {entry['fichier']} ({entry['date']}) {entry['detail']}")
+
+
+if __name__ == "__main__":
+    main()
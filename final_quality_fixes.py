@@ -4,12 +4,9 @@
 Corrections finales de qualité - Priorité 1 à 5
 """
 
-import json
 import re
-from pathlib import Path
 
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 # =============================================================================
 # PRIORITÉ 1 : Dates spécifiques pour documents restants
@@ -91,218 +88,179 @@ QUESTIONS_TO_REMOVE = {
 # FONCTIONS DE CORRECTION
 # =============================================================================
 
-def fix_specific_dates():
-    """Corrige les dates spécifiques pour les documents identifiés."""
-    print("\n1. CORRECTION DES DATES SPÉCIFIQUES")
-    print("-" * 50)
-
-    fixed = 0
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        doc_id = metadata.get('document_id', '')
-
-        # Vérifier si ce document a une date spécifique à corriger
-        for key, new_date in SPECIFIC_DATES.items():
-            if key in doc_id:
-                old_date = metadata['metadata'].get('date_publication', '')
-                if old_date != new_date:
-                    metadata['metadata']['date_publication'] = new_date
-                    metadata['metadata']['date_effet'] = new_date
-
-                    with open(meta_file, 'w', encoding='utf-8') as f:
-                        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                    print(f"✓ {doc_id[:40]:40} {old_date} → {new_date}")
-                    fixed += 1
-                break
-
-    print(f"\n   Total dates corrigées: {fixed}")
-    return fixed
-
-
-def enrich_vocabulary_definitions():
-    """Ajoute les définitions aux termes du vocabulaire."""
-    print("\n2. ENRICHISSEMENT DES DÉFINITIONS DU VOCABULAIRE")
-    print("-" * 50)
-
-    enriched_count = 0
-    terms_enriched = 0
-
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        vocab = metadata.get('vocabulaire_specifique', [])
-        if not vocab:
-            continue
-
-        modified = False
-        for item in vocab:
-            terme = item.get('terme', '').lower()
-            current_def = item.get('definition', '')
-
-            # Si définition vide ou trop courte, enrichir
-            if len(current_def) < 20:
-                # Chercher dans notre dictionnaire
-                for key, definition in VOCABULAIRE_DEFINITIONS.items():
-                    if key in terme or terme in key:
-                        item['definition'] = definition
-                        modified = True
-                        terms_enriched += 1
-                        break
-
-        if modified:
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            enriched_count += 1
-
-    print(f"   Documents enrichis: {enriched_count}")
-    print(f"   Termes avec définitions ajoutées: {terms_enriched}")
-    return enriched_count
-
-
-def filter_irrelevant_questions():
-    """Supprime les questions non pertinentes selon le type de document."""
-    print("\n3. FILTRAGE DES QUESTIONS NON PERTINENTES")
-    print("-" * 50)
-
-    filtered_count = 0
-    questions_removed = 0
-
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        doc_type = metadata['classification']['type_document']
-        questions = metadata.get('questions_typiques', [])
-
-        if doc_type not in QUESTIONS_TO_REMOVE or not questions:
-            continue
+@register('dates_specifiques')
+def fix_specific_dates(metadata, context):
+    """Dates spécifiques des documents identifiés (SPECIFIC_DATES)."""
+    doc_id = metadata.get('document_id', '')
+
+    # Vérifier si ce document a une date spécifique à corriger
+    for key, new_date in SPECIFIC_DATES.items():
+        if key in doc_id:
+            old_date = metadata['metadata'].get('date_publication', '')
+            if old_date == new_date:
+                return False
+            metadata['metadata']['date_publication'] = new_date
+            metadata['metadata']['date_effet'] = new_date
+
+            print(f"✓ {doc_id[:40]:40} {old_date} → {new_date}")
+            return True
+    return False
+
+
+@register('definitions_vocabulaire')
+def enrich_vocabulary_definitions(metadata, context):
+    """Définitions ajoutées aux termes du vocabulaire (VOCABULAIRE_DEFINITIONS)."""
+    modified = False
+    for item in metadata.get('vocabulaire_specifique', []):
+        terme = item.get('terme', '').lower()
+        current_def = item.get('definition', '')
+
+        # Si définition vide ou trop courte, enrichir
+        if len(current_def) < 20:
+            # Chercher dans notre dictionnaire
+            for key, definition in VOCABULAIRE_DEFINITIONS.items():
+                if key in terme or terme in key:
+                    item['definition'] = definition
+                    modified = True
+                    context.counts['termes_definis'] += 1
+                    break
+    return modified
 
-        patterns_to_remove = QUESTIONS_TO_REMOVE[doc_type]
 
-        new_questions = []
-        removed = 0
+@register('questions_non_pertinentes')
+def filter_irrelevant_questions(metadata, context):
+    """Questions non pertinentes pour le type de document retirées (QUESTIONS_TO_REMOVE)."""
+    doc_type = metadata['classification']['type_document']
+    questions = metadata.get('questions_typiques', [])
 
-        for q in questions:
-            should_keep = True
-            for pattern in patterns_to_remove:
-                if pattern.lower() in q.lower():
-                    should_keep = False
-                    removed += 1
-                    break
-            if should_keep:
-                new_questions.append(q)
+    if doc_type not in QUESTIONS_TO_REMOVE or not questions:
+        return False
 
-        if removed > 0:
-            metadata['questions_typiques'] = new_questions
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+    patterns_to_remove = QUESTIONS_TO_REMOVE[doc_type]
 
-            filtered_count += 1
-            questions_removed += removed
+    new_questions = []
+    removed = 0
 
-    print(f"   Documents filtrés: {filtered_count}")
-    print(f"   Questions supprimées: {questions_removed}")
-    return filtered_count
+    for q in questions:
+        should_keep = True
+        for pattern in patterns_to_remove:
+            if pattern.lower() in q.lower():
+                should_keep = False
+                removed += 1
+                break
+        if should_keep:
+            new_questions.append(q)
 
+    if not removed:
+        return False
+    metadata['questions_typiques'] = new_questions
+    context.counts['questions_supprimees'] += removed
+    return True
 
-def enrich_document_relations():
-    """Enrichit les relations entre documents."""
-    print("\n4. ENRICHISSEMENT DES RELATIONS DOCUMENTAIRES")
-    print("-" * 50)
 
-    # Charger tous les documents pour trouver les relations
-    all_docs = {}
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-        all_docs[metadata['document_id']] = {
-            'file': meta_file,
-            'metadata': metadata
-        }
-
-    # Trouver les avenants et créer des liens
+def index_avenants(context):
+    """Numéro d'avenant → document_id, pour les documents dont l'identifiant le porte."""
     avenants = {}
-    for doc_id, doc_data in all_docs.items():
+    for doc_id in context.by_id:
         if 'avenant' in doc_id.lower():
             # Extraire le numéro
             match = re.search(r'avenant[_\s]*n?°?\s*(\d+)', doc_id, re.IGNORECASE)
             if match:
-                num = int(match.group(1))
-                avenants[num] = doc_id
-
-    # Créer les relations pour les avenants
-    relations_created = 0
-    for num in sorted(avenants.keys()):
-        doc_id = avenants[num]
-        doc_data = all_docs[doc_id]
-        metadata = doc_data['metadata']
-
-        # Chercher les avenants précédents
-        relations = metadata.get('relations_documentaires', {})
-        if 'modifie' not in relations:
-            relations['modifie'] = []
-
-        # Lier aux avenants proches (1-5 numéros avant)
-        modified = False
-        for prev_num in range(num - 5, num):
-            if prev_num in avenants and prev_num > 0:
-                prev_id = avenants[prev_num]
-                if prev_id not in relations['modifie']:
-                    relations['modifie'].append(prev_id)
-                    modified = True
-                    relations_created += 1
-
-        if modified:
-            metadata['relations_documentaires'] = relations
-            with open(doc_data['file'], 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+                avenants[int(match.group(1))] = doc_id
+    context.avenants = avenants
+    context.avenant_numbers = {doc_id: num for num, doc_id in avenants.items()}
+
+
+@register('relations_avenants', prepare=index_avenants)
+def enrich_document_relations(metadata, context):
+    """Relations « modifie » vers les 5 avenants précédents."""
+    num = context.avenant_numbers.get(metadata['document_id'])
+    if num is None:
+        return False
+
+    # Chercher les avenants précédents
+    relations = metadata.get('relations_documentaires', {})
+    if 'modifie' not in relations:
+        relations['modifie'] = []
+
+    # Lier aux avenants proches (1-5 numéros avant)
+    modified = False
+    for prev_num in range(num - 5, num):
+        if prev_num in context.avenants and prev_num > 0:
+            prev_id = context.avenants[prev_num]
+            if prev_id not in relations['modifie']:
+                relations['modifie'].append(prev_id)
+                modified = True
+                context.counts['relations_creees'] += 1
+
+    if modified:
+        metadata['relations_documentaires'] = relations
+    return modified
+
+
+@register('controle_resumes')
+def check_truncated_summaries(metadata, context):
+    """Signale les résumés tronqués ou courts (ne modifie rien)."""
+    resume = metadata.get('resume', '')
+    titre = metadata['metadata']['titre']
+
+    if 'truncated' in resume.lower() or '[...]' in resume:
+        context.report['resumes_tronques'].append(titre)
+    elif len(resume) < 100:
+        context.report['resumes_courts'].append((titre, len(resume)))
+    return False
+
+
+FINAL_TRANSFORMS = [
+    'dates_specifiques',
+    'definitions_vocabulaire',
+    'questions_non_pertinentes',
+    'relations_avenants',
+    'controle_resumes',
+]
 
-    print(f"   Relations créées: {relations_created}")
-    return relations_created
 
+def main():
+    print("=" * 60)
+    print("CORRECTIONS FINALES DE QUALITÉ")
+    print("=" * 60)
 
-def check_and_fix_truncated_summaries():
-    """Vérifie et corrige les résumés tronqués."""
-    print("\n5. VÉRIFICATION DES RÉSUMÉS TRONQUÉS")
+    print("\n1. CORRECTION DES DATES SPÉCIFIQUES")
     print("-" * 50)
+    context = run_pipeline(FINAL_TRANSFORMS)
+    print(f"\n   Total dates corrigées: {context.applied['dates_specifiques']}")
 
-    truncated = 0
-    short_summaries = 0
-
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        resume = metadata.get('resume', '')
-        titre = metadata['metadata']['titre']
-
-        if 'truncated' in resume.lower() or '[...]' in resume:
-            print(f"   ⚠️  Tronqué: {titre[:50]}")
-            truncated += 1
-        elif len(resume) < 100:
-            print(f"   ⚠️  Court ({len(resume)} chars): {titre[:50]}")
-            short_summaries += 1
+    print("\n2. ENRICHISSEMENT DES DÉFINITIONS DU VOCABULAIRE")
+    print("-" * 50)
+    print(f"   Documents enrichis: {context.applied['definitions_vocabulaire']}")
+    print(f"   Termes avec définitions ajoutées: {context.counts['termes_definis']}")
 
-    print(f"\n   Résumés tronqués: {truncated}")
-    print(f"   Résumés courts (<100 chars): {short_summaries}")
-    return truncated + short_summaries
+    print("\n3. FILTRAGE DES QUESTIONS NON PERTINENTES")
+    print("-" * 50)
+    print(f"   Documents filtrés: {context.applied['questions_non_pertinentes']}")
+    print(f"   Questions supprimées: {context.counts['questions_supprimees']}")
 
+    print("\n4. ENRICHISSEMENT DES RELATIONS DOCUMENTAIRES")
+    print("-" * 50)
+    print(f"   Relations créées: {context.counts['relations_creees']}")
 
-def main():
-    print("=" * 60)
-    print("CORRECTIONS FINALES DE QUALITÉ")
-    print("=" * 60)
+    print("\n5. VÉRIFICATION DES RÉSUMÉS TRONQUÉS")
+    print("-" * 50)
+    truncated = context.report['resumes_tronques']
+    short_summaries = context.report['resumes_courts']
+    for titre in truncated:
+        print(f"   ⚠️  Tronqué: {titre[:50]}")
+    for titre, length in short_summaries:
+        print(f"   ⚠️  Court ({length} chars): {titre[:50]}")
+    print(f"\n   Résumés tronqués: {len(truncated)}")
+    print(f"   Résumés courts (<100 chars): {len(short_summaries)}")
 
     stats = {
-        'dates': fix_specific_dates(),
-        'vocab': enrich_vocabulary_definitions(),
-        'questions': filter_irrelevant_questions(),
-        'relations': enrich_document_relations(),
-        'summaries': check_and_fix_truncated_summaries(),
+        'dates': context.applied['dates_specifiques'],
+        'vocab': context.applied['definitions_vocabulaire'],
+        'questions': context.applied['questions_non_pertinentes'],
+        'relations': context.counts['relations_creees'],
+        'summaries': len(truncated) + len(short_summaries),
     }
 
     print("\n" + "=" * 60)
@@ -4,12 +4,9 @@
 Correction des documents avec '25' ou '2025' dans le titre.
 """
 
-import json
 import re
-from pathlib import Path
 
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 
 def detect_year_in_title(titre):
@@ -31,36 +28,27 @@ def detect_year_in_title(titre):
     return None
 
 
-def fix_2025_dates():
-    """Corrige les documents avec 2025 dans le titre."""
-    stats = {'fixed': 0}
+@register('dates_2025')
+def fix_2025_date(metadata, context):
+    """Dates 2025-01-01 corrigées depuis l'année ('25', '2025', CSN20XX) du titre."""
+    current_date = metadata['metadata'].get('date_publication', '')
+    if current_date != '2025-01-01':
+        return False
 
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+    titre = metadata['metadata']['titre']
+    year = detect_year_in_title(titre)
 
-        current_date = metadata['metadata'].get('date_publication', '')
-        if current_date != '2025-01-01':
-            continue
+    if not year:
+        print(f"  {titre[:45]:45} (pas de date)")
+        return False
 
-        titre = metadata['metadata']['titre']
-        year = detect_year_in_title(titre)
+    new_date = f"{year}-01-01"
+    metadata['metadata']['date_publication'] = new_date
+    metadata['metadata']['date_effet'] = new_date
+    metadata['classification']['annee_reference'] = int(year)
 
-        if year:
-            new_date = f"{year}-01-01"
-            metadata['metadata']['date_publication'] = new_date
-            metadata['metadata']['date_effet'] = new_date
-            metadata['classification']['annee_reference'] = int(year)
-
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            print(f"✓ {titre[:45]:45} → {new_date}")
-            stats['fixed'] += 1
-        else:
-            print(f"  {titre[:45]:45} (pas de date)")
-
-    return stats
+    print(f"✓ {titre[:45]:45} → {new_date}")
+    return True
 
 
 def main():
@@ -68,9 +56,9 @@ def main():
     print("=" * 60)
     print()
 
-    stats = fix_2025_dates()
+    context = run_pipeline(['dates_2025'])
     print()
-    print(f"Corrigés: {stats['fixed']}")
+    print(f"Corrigés: {context.applied['dates_2025']}")
 
 
 if __name__ == "__main__":
@@ -4,11 +4,7 @@
 Correction des classifications incorrectes
 """
 
-import json
-from pathlib import Path
-
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 # Corrections manuelles basées sur l'analyse
 CORRECTIONS = {
@@ -107,48 +103,49 @@ CORRECTIONS = {
 }
 
 
-def apply_corrections():
-    """Applique les corrections de classification."""
+def report_missing(context):
+    """Signale les documents de CORRECTIONS absents."""
+    for filename in CORRECTIONS:
+        if filename[:-len(".metadata.json")] not in context.by_id:
+            print(f"⚠️  Fichier non trouvé: {filename}")
 
-    print("Correction des classifications")
-    print("=" * 60)
-    print()
 
-    corrected = 0
+@register('classifications', prepare=report_missing)
+def fix_classification(metadata, context):
+    """Classifications corrigées manuellement (DOS, brochures, fiches réflexes…)."""
+    filename = f"{metadata['document_id']}.metadata.json"
+    correction = CORRECTIONS.get(filename)
+    if correction is None:
+        return False
 
-    for filename, correction in CORRECTIONS.items():
-        filepath = DOCS_METADATA_DIR / filename
+    old_type = metadata['classification']['type_document']
+    new_type = correction['type']
 
-        if not filepath.exists():
-            print(f"⚠️  Fichier non trouvé: {filename}")
-            continue
+    if old_type == new_type:
+        print(f"✓  {filename[:50]} - déjà correct")
+        return False
 
-        # Charger le fichier
-        with open(filepath, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+    # Appliquer la correction
+    metadata['classification']['type_document'] = correction['type']
+    metadata['classification']['label'] = correction['label']
+    metadata['classification']['domaines_juridiques'] = correction['domaines']
 
-        old_type = metadata['classification']['type_document']
-        new_type = correction['type']
+    print(f"✓  {filename[:50]}")
+    print(f"   {old_type} → {new_type}")
+    return True
 
-        if old_type == new_type:
-            print(f"✓  {filename[:50]} - déjà correct")
-            continue
 
-        # Appliquer la correction
-        metadata['classification']['type_document'] = correction['type']
-        metadata['classification']['label'] = correction['label']
-        metadata['classification']['domaines_juridiques'] = correction['domaines']
+def apply_corrections():
+    """Applique les corrections de classification."""
 
-        # Sauvegarder
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+    print("Correction des classifications")
+    print("=" * 60)
+    print()
 
-        print(f"✓  {filename[:50]}")
-        print(f"   {old_type} → {new_type}")
-        corrected += 1
+    context = run_pipeline(['classifications'])
 
     print()
-    print(f"Corrections appliquées: {corrected}")
+    print(f"Corrections appliquées: {context.applied['classifications']}")
 
 
 if __name__ == "__main__":
@@ -4,12 +4,9 @@
 Correction finale des dates - extraction depuis titre et nom de fichier.
 """
 
-import json
 import re
-from pathlib import Path
 
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 
 def extract_date_from_context(titre, nom_fichier, resume, annee_reference):
@@ -51,39 +48,30 @@ def extract_date_from_context(titre, nom_fichier, resume, annee_reference):
     return None
 
 
-def fix_remaining_dates():
-    """Corrige les dates restantes."""
-    stats = {'fixed': 0, 'remaining': []}
+@register('dates_contexte')
+def fix_date_from_context(metadata, context):
+    """Dates 2025-01-01 restantes déduites du titre, du nom de fichier ou du résumé."""
+    current_date = metadata['metadata'].get('date_publication', '')
+    if current_date != '2025-01-01':
+        return False
 
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+    titre = metadata['metadata']['titre']
+    nom_fichier = metadata.get('nom_fichier', '')
+    resume = metadata.get('resume', '')
+    annee_ref = metadata['classification'].get('annee_reference', 2025)
 
-        current_date = metadata['metadata'].get('date_publication', '')
-        if current_date != '2025-01-01':
-            continue
+    new_date = extract_date_from_context(titre, nom_fichier, resume, annee_ref)
 
-        titre = metadata['metadata']['titre']
-        nom_fichier = metadata.get('nom_fichier', '')
-        resume = metadata.get('resume', '')
-        annee_ref = metadata['classification'].get('annee_reference', 2025)
+    if not new_date or new_date == '2025-01-01':
+        context.report['dates_sans_contexte'].append((titre, f"{metadata['document_id']}.metadata.json"))
+        return False
 
-        new_date = extract_date_from_context(titre, nom_fichier, resume, annee_ref)
+    metadata['metadata']['date_publication'] = new_date
+    metadata['metadata']['date_effet'] = new_date
+    metadata['classification']['annee_reference'] = int(new_date[:4])
 
-        if new_date and new_date != '2025-01-01':
-            metadata['metadata']['date_publication'] = new_date
-            metadata['metadata']['date_effet'] = new_date
-            metadata['classification']['annee_reference'] = int(new_date[:4])
-
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            print(f"✓ {titre[:40]:40} → {new_date}")
-            stats['fixed'] += 1
-        else:
-            stats['remaining'].append((titre, meta_file.name))
-
-    return stats
+    print(f"✓ {titre[:40]:40} → {new_date}")
+    return True
 
 
 def main():
@@ -92,14 +80,15 @@ def main():
     print("=" * 60)
     print()
 
-    stats = fix_remaining_dates()
+    context = run_pipeline(['dates_contexte'])
+    remaining = context.report['dates_sans_contexte']
 
     print()
-    print(f"Dates corrigées: {stats['fixed']}")
+    print(f"Dates corrigées: {context.applied['dates_contexte']}")
 
-    if stats['remaining']:
-        print(f"\nDocuments sans date identifiable ({len(stats['remaining'])}):")
-        for titre, fname in stats['remaining']:
+    if remaining:
+        print(f"\nDocuments sans date identifiable ({len(remaining)}):")
+        for titre, fname in remaining:
             print(f"  - {titre[:50]}")
 
 
@@ -8,13 +8,10 @@ Correction des problèmes de qualité identifiés dans l'analyse
 - Questions typiques non-pertinentes
 """
 
-import json
 import re
-from pathlib import Path
 from datetime import datetime
 
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 # Mois français → numéro
 MOIS_FR = {
@@ -127,85 +124,94 @@ def filter_questions_by_type(questions, doc_type):
     return filtered
 
 
+@register('qualite_filinfo_dates')
+def fix_filinfo_date(metadata, context):
+    """Dates des Fil-Infos extraites du résumé (« Semaine du … »)."""
+    if metadata['classification']['type_document'] != 'fil_info':
+        return False
+    current_date = metadata['metadata'].get('date_publication', '')
+    if current_date != '2025-01-01' and current_date:
+        return False
+    new_date = extract_filinfo_date(metadata.get('resume', ''))
+    if not new_date:
+        return False
+    metadata['metadata']['date_publication'] = new_date
+    metadata['metadata']['date_effet'] = new_date
+    return True
+
+
+@register('qualite_filinfo_titres')
+def fix_filinfo_title(metadata, context):
+    """Titres des Fil-Infos enrichis du sujet extrait du résumé."""
+    if metadata['classification']['type_document'] != 'fil_info':
+        return False
+    titre = metadata['metadata']['titre']
+    if not (titre.lower().startswith('fil info') or titre.lower().startswith('fil-info')):
+        return False
+    # Extraire le numéro
+    num_match = re.search(r'(\d+)', titre)
+    if not num_match:
+        return False
+    numero = num_match.group(1)
+    subject = extract_filinfo_subject(metadata.get('resume', ''))
+    if not subject:
+        return False
+    new_title = f"Fil-Info N°{numero} - {subject}"
+    if len(new_title) > 100:
+        new_title = new_title[:97] + "..."
+    metadata['metadata']['titre'] = new_title
+    # Titre court
+    short_subject = subject[:30] + "..." if len(subject) > 30 else subject
+    metadata['metadata']['titre_court'] = f"Fil-Info {numero} - {short_subject}"
+    return True
+
+
+@register('qualite_auteurs')
+def fix_author(metadata, context):
+    """Auteurs génériques remplacés selon le type de document."""
+    current_author = metadata['metadata'].get('auteur', '')
+    if current_author != 'Profession notariale' and current_author:
+        return False
+    new_author = determine_author(
+        metadata['classification']['type_document'],
+        metadata['classification'].get('categorie_dossier', ''),
+        metadata['metadata']['titre'],
+    )
+    if new_author == current_author:
+        return False
+    metadata['metadata']['auteur'] = new_author
+    return True
+
+
+@register('qualite_questions')
+def filter_questions(metadata, context):
+    """Questions typiques non pertinentes pour le type de document retirées (regex)."""
+    questions = metadata.get('questions_typiques', [])
+    if not questions:
+        return False
+    filtered_questions = filter_questions_by_type(questions, metadata['classification']['type_document'])
+    if len(filtered_questions) == len(questions):
+        return False
+    metadata['questions_typiques'] = filtered_questions
+    return True
+
+
+QUALITY_TRANSFORMS = ['qualite_filinfo_dates', 'qualite_filinfo_titres', 'qualite_auteurs', 'qualite_questions']
+
+
 def fix_all_metadata():
     """Corrige tous les problèmes de qualité identifiés."""
-    stats = {
-        'dates_fixed': 0,
-        'titles_enriched': 0,
-        'authors_fixed': 0,
-        'questions_filtered': 0,
-        'total_processed': 0
+    context = run_pipeline(QUALITY_TRANSFORMS)
+    print(f"Documents traités: {len(context.documents)}\n")
+
+    return {
+        'dates_fixed': context.applied['qualite_filinfo_dates'],
+        'titles_enriched': context.applied['qualite_filinfo_titres'],
+        'authors_fixed': context.applied['qualite_auteurs'],
+        'questions_filtered': context.applied['qualite_questions'],
+        'total_processed': len(context.changed)
     }
 
-    meta_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    print(f"Documents à traiter: {len(meta_files)}\n")
-
-    for meta_file in meta_files:
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        modified = False
-        doc_type = metadata['classification']['type_document']
-        titre = metadata['metadata']['titre']
-        resume = metadata.get('resume', '')
-        categorie = metadata['classification'].get('categorie_dossier', '')
-
-        # 1. Corriger les dates pour les Fil-Infos
-        if doc_type == 'fil_info':
-            current_date = metadata['metadata'].get('date_publication', '')
-            if current_date == '2025-01-01' or not current_date:
-                new_date = extract_filinfo_date(resume)
-                if new_date:
-                    metadata['metadata']['date_publication'] = new_date
-                    metadata['metadata']['date_effet'] = new_date
-                    stats['dates_fixed'] += 1
-                    modified = True
-
-        # 2. Enrichir les titres des Fil-Infos
-        if doc_type == 'fil_info':
-            if titre.lower().startswith('fil info') or titre.lower().startswith('fil-info'):
-                # Extraire le numéro
-                num_match = re.search(r'(\d+)', titre)
-                if num_match:
-                    numero = num_match.group(1)
-                    subject = extract_filinfo_subject(resume)
-                    if subject:
-                        new_title = f"Fil-Info N°{numero} - {subject}"
-                        if len(new_title) > 100:
-                            new_title = new_title[:97] + "..."
-                        metadata['metadata']['titre'] = new_title
-                        # Titre court
-                        short_subject = subject[:30] + "..." if len(subject) > 30 else subject
-                        metadata['metadata']['titre_court'] = f"Fil-Info {numero} - {short_subject}"
-                        stats['titles_enriched'] += 1
-                        modified = True
-
-        # 3. Corriger les auteurs génériques
-        current_author = metadata['metadata'].get('auteur', '')
-        if current_author == 'Profession notariale' or not current_author:
-            new_author = determine_author(doc_type, categorie, titre)
-            if new_author != current_author:
-                metadata['metadata']['auteur'] = new_author
-                stats['authors_fixed'] += 1
-                modified = True
-
-        # 4. Filtrer les questions non-pertinentes
-        questions = metadata.get('questions_typiques', [])
-        if questions:
-            filtered_questions = filter_questions_by_type(questions, doc_type)
-            if len(filtered_questions) < len(questions):
-                metadata['questions_typiques'] = filtered_questions
-                stats['questions_filtered'] += 1
-                modified = True
-
-        # Sauvegarder si modifié
-        if modified:
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            stats['total_processed'] += 1
-
-    return stats
-
 
 def main():
     print("=" * 60)
@@ -5,13 +5,10 @@ Correction des dates restantes pour les Fil-Infos sans pattern standard.
 Utilise le numéro du Fil-Info pour estimer la date approximative.
 """
 
-import json
 import re
-from pathlib import Path
 from datetime import datetime, timedelta
 
-BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+from metadata_pipeline import register, run_pipeline
 
 # Référence connue: Fil-Info 2870 = Semaine du 15 juillet 2024
 # Les Fil-Infos sont hebdomadaires
@@ -39,59 +36,51 @@ def extract_year_from_content(resume, titre):
     return None
 
 
-def fix_remaining_dates():
-    """Corrige les dates restantes des Fil-Infos."""
-    stats = {'fixed': 0, 'errors': []}
+@register('dates_filinfo_numero')
+def fix_filinfo_date(metadata, context):
+    """Dates 2025-01-01 des Fil-Infos estimées depuis leur numéro (hebdomadaire)."""
+    if metadata['classification']['type_document'] != 'fil_info':
+        return False
 
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+    current_date = metadata['metadata'].get('date_publication', '')
+    if current_date != '2025-01-01':
+        return False  # Déjà corrigé
 
-        if metadata['classification']['type_document'] != 'fil_info':
-            continue
+    titre = metadata['metadata']['titre']
+    resume = metadata.get('resume', '')
+    meta_name = f"{metadata['document_id']}.metadata.json"
 
-        current_date = metadata['metadata'].get('date_publication', '')
-        if current_date != '2025-01-01':
-            continue  # Déjà corrigé
+    # Extraire le numéro du Fil-Info
+    num_match = re.search(r'N°?(\d+)', titre)
+    if not num_match:
+        num_match = re.search(r'info[_\s](\d+)', meta_name.lower())
 
-        titre = metadata['metadata']['titre']
-        resume = metadata.get('resume', '')
+    if not num_match:
+        context.report['filinfo_sans_numero'].append(meta_name)
+        print(f"⚠️  Numéro non trouvé: {meta_name}")
+        return False
 
-        # Extraire le numéro du Fil-Info
-        num_match = re.search(r'N°?(\d+)', titre)
-        if not num_match:
-            num_match = re.search(r'info[_\s](\d+)', meta_file.name.lower())
+    fil_num = int(num_match.group(1))
 
-        if num_match:
-            fil_num = int(num_match.group(1))
+    # Estimer la date
+    estimated_date = estimate_date_from_number(fil_num)
 
-            # Estimer la date
-            estimated_date = estimate_date_from_number(fil_num)
+    # Vérifier si l'année extraite du contenu correspond
+    content_year = extract_year_from_content(resume, titre)
+    if content_year:
+        # Ajuster si l'année estimée ne correspond pas
+        est_year = int(estimated_date[:4])
+        if abs(content_year - est_year) <= 1:
+            # Garder l'année du contenu mais utiliser la date estimée
+            estimated_date = str(content_year) + estimated_date[4:]
 
-            # Vérifier si l'année extraite du contenu correspond
-            content_year = extract_year_from_content(resume, titre)
-            if content_year:
-                # Ajuster si l'année estimée ne correspond pas
-                est_year = int(estimated_date[:4])
-                if abs(content_year - est_year) <= 1:
-                    # Garder l'année du contenu mais utiliser la date estimée
-                    estimated_date = str(content_year) + estimated_date[4:]
+    metadata['metadata']['date_publication'] = estimated_date
+    metadata['metadata']['date_effet'] = estimated_date
+    # Mettre à jour l'année de référence
+    metadata['classification']['annee_reference'] = int(estimated_date[:4])
 
-            metadata['metadata']['date_publication'] = estimated_date
-            metadata['metadata']['date_effet'] = estimated_date
-            # Mettre à jour l'année de référence
-            metadata['classification']['annee_reference'] = int(estimated_date[:4])
-
-            with open(meta_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            print(f"✓ {titre[:50]} → {estimated_date}")
-            stats['fixed'] += 1
-        else:
-            stats['errors'].append(meta_file.name)
-            print(f"⚠️  Numéro non trouvé: {meta_file.name}")
-
-    return stats
+    print(f"✓ {titre[:50]} → {estimated_date}")
+    return True
 
 
 def main():
@@ -100,13 +89,13 @@ def main():
     print("=" * 60)
     print()
 
-    stats = fix_remaining_dates()
+    context = run_pipeline(['dates_filinfo_numero'])
 
     print()
     print("=" * 60)
-    print(f"Dates corrigées: {stats['fixed']}")
-    if stats['errors']:
-        print(f"Erreurs: {len(stats['errors'])}")
+    print(f"Dates corrigées: {context.applied['dates_filinfo_numero']}")
+    if context.report['filinfo_sans_numero']:
+        print(f"Erreurs: {len(context.report['filinfo_sans_numero'])}")
     print()
 
 
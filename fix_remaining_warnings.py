@@ -4,12 +4,17 @@
 Correction des derniers avertissements de validation
 """
 
-import json
 from pathlib import Path
-from PyPDF2 import PdfReader
+
+from metadata_pipeline import register, run_pipeline
 
 BASE_DIR = Path(__file__).parent
-DOCS_METADATA_DIR = BASE_DIR / "_metadata" / "documents"
+
+# Outils d'extraction, chargés par `prepare_generic_summary` : seule la
+# transformation avertissements_resumes lit les PDF (corpus, cache, PyPDF2)
+TEXT_CACHE = None
+QUARANTINE = None
+CORPUS = None
 
 # Corrections de classification (pas des circulaires)
 CLASSIFICATION_FIXES = {
@@ -73,17 +78,79 @@ RESUME_ENRICHMENTS = {
     },
 }
 
+# Circulaires dont le résumé générique est à extraire du PDF
+CIRCULAIRE_FILES = [
+    "csn2022_circulaire_02_22_av_be.metadata.json",
+    "csn2023_circulaire_n_2020_3_du_22_septembre_2020.metadata.json",
+    "csn2025_circulaire_01_25.metadata.json",
+    "csn2020_circulaire_n_2020_3_du_22_septembre_2020.metadata.json",
+    "csn2025_circulaire_02_25.metadata.json",
+]
+
+
+def meta_filename(metadata):
+    return f"{metadata['document_id']}.metadata.json"
+
+
+def report_missing(context, filenames):
+    for filename in filenames:
+        if filename[:-len(".metadata.json")] not in context.by_id:
+            print(f"   ⚠️  Non trouvé: {filename}")
+
+
+def load_extraction_tools():
+    """Crée le cache de texte, la quarantaine et l'accès au corpus (une fois)."""
+    global TEXT_CACHE, QUARANTINE, CORPUS
+    if TEXT_CACHE is None:
+        from text_cache import TextCache
+        from corpus_store import CorpusStore
+        from extraction_runner import Quarantine
+
+        TEXT_CACHE = TextCache()
+        QUARANTINE = Quarantine()
+        CORPUS = CorpusStore()
+
+
+def prepare_generic_summary(context):
+    load_extraction_tools()
+    report_missing(context, RESUME_ENRICHMENTS)
+
+
+def read_text_from_pdf(pdf_path, max_chars=2000):
+    """Lit au plus `max_chars` caractères des 3 premières pages d'un PDF (sans cache).
+
+    Les pages suivantes ne sont pas extraites dès que `max_chars` est atteint.
+    """
+    from document_text import iter_pdf_pages, join_pages
 
-def extract_text_from_pdf(pdf_path, max_chars=2000):
-    """Extrait le texte d'un PDF."""
+    return join_pages(iter_pdf_pages(pdf_path, 3), " ", max_chars).strip()
+
+
+def extract_text_from_pdf(pdf_path, max_chars=2000, document_id=None):
+    """Extrait le texte d'un PDF (corpus plein texte, sinon cache de texte et processus isolé)."""
+    from document_text import join_pages
+    from extraction_runner import ExtractionAborted, run_isolated
+    from text_cache import file_sha256
+
+    load_extraction_tools()
+    # Empreinte calculée une fois pour le corpus, la quarantaine et le cache
+    sha256 = file_sha256(pdf_path)
+    pages = CORPUS.current_pages(document_id, pdf_path, 3, sha256) if document_id else None
+    if pages is not None:
+        return join_pages(pages, " ", max_chars).strip()
+    entry = QUARANTINE.get(pdf_path, sha256)
+    if entry:
+        return f"Erreur: en quarantaine ({entry['raison']})"
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for i in range(min(3, len(reader.pages))):
-            page_text = reader.pages[i].extract_text()
-            if page_text:
-                text += page_text + " "
-        return text[:max_chars].strip()
+        return TEXT_CACHE.get_or_extract(
+            pdf_path, 'fix_remaining_warnings.pdf_pages', {'max_pages': 3, 'max_chars': max_chars},
+            lambda: run_isolated(read_text_from_pdf, pdf_path, max_chars),
+            sha256,
+        )
+    except ExtractionAborted as e:
+        QUARANTINE.add(pdf_path, e.reason, e.detail, sha256)
+        QUARANTINE.save()
+        return f"Erreur: {e}"
     except Exception as e:
         return f"Erreur: {e}"
 
@@ -112,138 +179,95 @@ def generate_summary_from_text(text, title, doc_type):
     return None
 
 
-def fix_classifications():
-    """Corrige les classifications incorrectes."""
-    print("1. Correction des classifications")
-    print("-" * 50)
+@register('avertissements_classifications',
+          prepare=lambda context: report_missing(context, CLASSIFICATION_FIXES))
+def fix_classification(metadata, context):
+    """Notes CSN/ANC reclassées en guides pratiques (pas des circulaires)."""
+    filename = meta_filename(metadata)
+    correction = CLASSIFICATION_FIXES.get(filename)
+    if correction is None:
+        return False
 
-    fixed = 0
-    for filename, correction in CLASSIFICATION_FIXES.items():
-        filepath = DOCS_METADATA_DIR / filename
-        if not filepath.exists():
-            print(f"   ⚠️  Non trouvé: {filename}")
-            continue
+    old_type = metadata['classification']['type_document']
+    new_type = correction['type']
+
+    if old_type == new_type:
+        print(f"   ✓ {filename[:50]} - déjà correct")
+        return False
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+    metadata['classification']['type_document'] = correction['type']
+    metadata['classification']['label'] = correction['label']
+    metadata['classification']['domaines_juridiques'] = correction['domaines']
 
-        old_type = metadata['classification']['type_document']
-        new_type = correction['type']
+    print(f"   ✓ {filename[:50]}")
+    print(f"     {old_type} → {new_type}")
+    return True
 
-        if old_type == new_type:
-            print(f"   ✓ {filename[:50]} - déjà correct")
-            continue
 
-        metadata['classification']['type_document'] = correction['type']
-        metadata['classification']['label'] = correction['label']
-        metadata['classification']['domaines_juridiques'] = correction['domaines']
+@register('avertissements_resumes', prepare=prepare_generic_summary)
+def fix_generic_summary(metadata, context):
+    """Résumés génériques (« Document de type… ») enrichis manuellement ou depuis le PDF."""
+    filename = meta_filename(metadata)
+    old_resume = metadata.get('resume', '')
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+    # D'abord les enrichissements manuels
+    enrichment = RESUME_ENRICHMENTS.get(filename)
+    if enrichment is not None:
+        if not old_resume.startswith('Document de type'):
+            return False
+        metadata['resume'] = enrichment['resume']
+        metadata['mots_cles'] = enrichment['mots_cles']
+        metadata['questions_typiques'] = enrichment['questions_typiques']
 
         print(f"   ✓ {filename[:50]}")
-        print(f"     {old_type} → {new_type}")
-        fixed += 1
+        print(f"     Résumé enrichi manuellement")
+        return True
 
-    print(f"\n   Corrections: {fixed}")
-    return fixed
+    # Puis les circulaires à enrichir depuis le PDF
+    if filename not in CIRCULAIRE_FILES:
+        return False
 
+    if not old_resume.startswith('Document de type'):
+        print(f"   ✓ {filename[:50]} - résumé déjà enrichi")
+        return False
 
-def fix_generic_summaries():
-    """Corrige les résumés génériques."""
-    print("\n2. Enrichissement des résumés génériques")
-    print("-" * 50)
+    # Tenter d'extraire du PDF
+    pdf_path = BASE_DIR / metadata['fichier']
+    if not pdf_path.exists():
+        print(f"   ⚠️  PDF non trouvé: {pdf_path}")
+        return False
 
-    enriched = 0
+    text = extract_text_from_pdf(pdf_path, document_id=metadata['document_id'])
+    new_summary = generate_summary_from_text(text, metadata['metadata']['titre'], metadata['classification']['type_document'])
 
-    # D'abord les enrichissements manuels
-    for filename, enrichment in RESUME_ENRICHMENTS.items():
-        filepath = DOCS_METADATA_DIR / filename
-        if not filepath.exists():
-            print(f"   ⚠️  Non trouvé: {filename}")
-            continue
+    if new_summary and len(new_summary) > 50:
+        metadata['resume'] = new_summary
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        print(f"   ✓ {filename[:50]}")
+        print(f"     Résumé extrait du PDF")
+        return True
 
-        old_resume = metadata.get('resume', '')
-        if old_resume.startswith('Document de type'):
-            metadata['resume'] = enrichment['resume']
-            metadata['mots_cles'] = enrichment['mots_cles']
-            metadata['questions_typiques'] = enrichment['questions_typiques']
+    # Créer un résumé basé sur le titre et le type
+    titre = metadata['metadata']['titre']
+    if 'circulaire' not in titre.lower():
+        return False
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+    num_match = None
+    for part in titre.split():
+        if part.replace('°', '').replace('N', '').replace('-', '').isdigit():
+            num_match = part
+            break
 
-            print(f"   ✓ {filename[:50]}")
-            print(f"     Résumé enrichi manuellement")
-            enriched += 1
+    if num_match:
+        metadata['resume'] = f"Circulaire {num_match} du CSN contenant des instructions officielles pour la profession notariale. Ce document définit les modalités d'application des dispositions réglementaires et les recommandations pratiques à mettre en œuvre par les offices notariaux."
+    else:
+        metadata['resume'] = f"Circulaire du CSN intitulée '{titre}'. Ce document contient des instructions officielles et des recommandations pour la mise en conformité des pratiques notariales avec les évolutions réglementaires."
 
-    # Puis les circulaires à enrichir depuis le PDF
-    circulaire_files = [
-        "csn2022_circulaire_02_22_av_be.metadata.json",
-        "csn2023_circulaire_n_2020_3_du_22_septembre_2020.metadata.json",
-        "csn2025_circulaire_01_25.metadata.json",
-        "csn2020_circulaire_n_2020_3_du_22_septembre_2020.metadata.json",
-        "csn2025_circulaire_02_25.metadata.json",
-    ]
-
-    for filename in circulaire_files:
-        filepath = DOCS_METADATA_DIR / filename
-        if not filepath.exists():
-            continue
-
-        with open(filepath, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        old_resume = metadata.get('resume', '')
-        if not old_resume.startswith('Document de type'):
-            print(f"   ✓ {filename[:50]} - résumé déjà enrichi")
-            continue
-
-        # Tenter d'extraire du PDF
-        pdf_path = BASE_DIR / metadata['fichier']
-        if pdf_path.exists():
-            text = extract_text_from_pdf(pdf_path)
-            new_summary = generate_summary_from_text(text, metadata['metadata']['titre'], metadata['classification']['type_document'])
-
-            if new_summary and len(new_summary) > 50:
-                metadata['resume'] = new_summary
-
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                print(f"   ✓ {filename[:50]}")
-                print(f"     Résumé extrait du PDF")
-                enriched += 1
-            else:
-                # Créer un résumé basé sur le titre et le type
-                titre = metadata['metadata']['titre']
-                if 'circulaire' in titre.lower():
-                    num_match = None
-                    for part in titre.split():
-                        if part.replace('°', '').replace('N', '').replace('-', '').isdigit():
-                            num_match = part
-                            break
-
-                    if num_match:
-                        metadata['resume'] = f"Circulaire {num_match} du CSN contenant des instructions officielles pour la profession notariale. Ce document définit les modalités d'application des dispositions réglementaires et les recommandations pratiques à mettre en œuvre par les offices notariaux."
-                    else:
-                        metadata['resume'] = f"Circulaire du CSN intitulée '{titre}'. Ce document contient des instructions officielles et des recommandations pour la mise en conformité des pratiques notariales avec les évolutions réglementaires."
-
-                    metadata['mots_cles'] = list(set(metadata.get('mots_cles', []) + ['circulaire CSN', 'instructions professionnelles', 'conformité']))
-
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                    print(f"   ✓ {filename[:50]}")
-                    print(f"     Résumé généré depuis le titre")
-                    enriched += 1
-        else:
-            print(f"   ⚠️  PDF non trouvé: {pdf_path}")
-
-    print(f"\n   Enrichissements: {enriched}")
-    return enriched
+    metadata['mots_cles'] = list(set(metadata.get('mots_cles', []) + ['circulaire CSN', 'instructions professionnelles', 'conformité']))
+
+    print(f"   ✓ {filename[:50]}")
+    print(f"     Résumé généré depuis le titre")
+    return True
 
 
 def main():
@@ -252,8 +276,9 @@ def main():
     print("=" * 60)
     print()
 
-    classifications_fixed = fix_classifications()
-    summaries_enriched = fix_generic_summaries()
+    context = run_pipeline(['avertissements_classifications', 'avertissements_resumes'])
+    classifications_fixed = context.applied['avertissements_classifications']
+    summaries_enriched = context.applied['avertissements_resumes']
 
     print()
     print("=" * 60)
@@ -262,6 +287,8 @@ def main():
     print(f"Classifications corrigées: {classifications_fixed}")
     print(f"Résumés enrichis: {summaries_enriched}")
     print(f"Total corrections: {classifications_fixed + summaries_enriched}")
+    if TEXT_CACHE is not None:
+        print(TEXT_CACHE.format_stats())
     print()
 
 
@@ -7,9 +7,20 @@ Index Bible Notariale - Génération d'index et métadonnées KM
 import os
 import re
 import json
+import hashlib
+import argparse
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import atomic_files
+from enrich_categories_metier import enrich_metadata as enrich_domaines_metier
+from index_reader import write_ndjson
+from metadata_store import open_store
+from migrate_metadata_structure import migrate_metadata
+from source_watcher import DEFAULT_DEBOUNCE, iter_change_batches, open_watcher
+from text_cache import file_sha256
 
 # Configuration
 BASE_DIR = Path(__file__).parent
@@ -17,6 +28,12 @@ SOURCES_DIR = BASE_DIR / "sources_documentaires"
 METADATA_DIR = BASE_DIR / "_metadata"
 DOCS_METADATA_DIR = METADATA_DIR / "documents"
 CATEGORIES_DIR = BASE_DIR / "docs" / "categories"
+INDEX_FILE = METADATA_DIR / "index_complet.json"
+INDEX_NDJSON_FILE = METADATA_DIR / "index_complet.ndjson"
+MANIFEST_FILE = METADATA_DIR / "manifest.json"
+
+# Document dont la source a changé depuis l'enrichissement (effacé par enrich_metadata.py)
+REENRICH_FLAG = "a_reenrichir"
 
 # Patterns de détection
 DATE_PATTERNS = [
@@ -255,81 +272,284 @@ def extract_reference(filename):
             }
     return None
 
+# Paire de casse d'une même lettre, ex. [Cc]
+_CASE_PAIR = re.compile(r'\[(\w)(\w)\]')
+
+
+def literal_prefix(pattern):
+    """Texte, en minuscules, par lequel commence toute correspondance de `pattern` ('' si inconnu).
+
+    Reconnaît les lettres, chiffres, espaces, '-' et '_' littéraux et les
+    paires de casse ([Cc]), après un éventuel `\\A` ou groupe `(?i:...)`.
+    """
+    if pattern.startswith('(?i:') and pattern.endswith(')'):
+        pattern = pattern[4:-1]
+    if pattern.startswith('\\A'):
+        pattern = pattern[2:]
+    if '|' in pattern:
+        return ''
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        pair = _CASE_PAIR.match(pattern, i)
+        if pair and pair.group(1).lower() == pair.group(2).lower():
+            char, end = pair.group(1).lower(), pair.end()
+        elif pattern[i].isalnum() or pattern[i] in ' -_':
+            char, end = pattern[i].lower(), i + 1
+        else:
+            break
+        if end < len(pattern) and pattern[end] in '?*{':
+            break  # Caractère facultatif
+        prefix.append(char)
+        i = end
+    return ''.join(prefix)
+
+
+class PriorityMatcher:
+    """Règle la plus prioritaire présente dans un texte, en un parcours.
+
+    Chaque règle (résultat, pattern) est indexée par le littéral qui commence
+    ses correspondances (`literal_prefix`). Le texte en minuscules est
+    parcouru une fois à la recherche de ces littéraux ; à chaque occurrence,
+    seules les règles correspondantes plus prioritaires que la meilleure déjà
+    trouvée sont vérifiées (`match` à cette position). Les règles sans
+    littéral reconnu sont cherchées directement.
+    """
+
+    def __init__(self, rules):
+        self.results = [result for result, _ in rules]
+        self.regexes = [re.compile(pattern) for _, pattern in rules]
+        self.untriggered = []
+        by_trigger = {}
+        for index, (_, pattern) in enumerate(rules):
+            trigger = literal_prefix(pattern)
+            if trigger:
+                by_trigger.setdefault(trigger, []).append(index)
+            else:
+                self.untriggered.append(index)
+        # Déclencheurs par premier caractère : (littéral, règles par priorité)
+        self.by_first = {}
+        for trigger, indexes in by_trigger.items():
+            self.by_first.setdefault(trigger[0], []).append((trigger, indexes))
+        self.trigger = re.compile('|'.join(
+            re.escape(trigger) for trigger in sorted(by_trigger, key=len, reverse=True)
+        )) if by_trigger else None
+
+    def first(self, text):
+        """Résultat de la règle la plus prioritaire présente dans `text`, ou None."""
+        regexes = self.regexes
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Minuscules de longueur différente : positions non comparables, cascade simple
+            for index, regex in enumerate(regexes):
+                if regex.search(text):
+                    return self.results[index]
+            return None
+
+        best = len(regexes)
+        for index in self.untriggered:
+            if regexes[index].search(text):
+                best = index
+                break
+        pos = 0
+        while best and self.trigger is not None:
+            hit = self.trigger.search(lowered, pos)
+            if hit is None:
+                break
+            start = hit.start()
+            for trigger, indexes in self.by_first[lowered[start]]:
+                if not lowered.startswith(trigger, start):
+                    continue
+                for index in indexes:
+                    if index >= best:
+                        break
+                    if regexes[index].match(text, start):
+                        best = index
+                        break
+            pos = start + 1
+        return self.results[best] if best < len(regexes) else None
+
+
+class DocumentClassifier:
+    """Moteur de classification précompilé.
+
+    Les règles sur le dossier et sur le nom de fichier sont compilées une seule
+    fois en `PriorityMatcher`, dans l'ordre de priorité de la cascade
+    historique : un nom est parcouru une fois et la règle la plus prioritaire
+    qui y figure l'emporte. La décision sur le dossier est mise en cache par
+    dossier ; un dossier fil-info décide seul.
+    """
+
+    FIL_INFO_RULE = ('fil_info', r'(?i:fil-info)')
+
+    # (type ou sous-cascade, pattern) évalués sur le nom du dossier parent
+    FOLDER_RULES = [
+        ('fil_info', r'(?i:fil-info)'),
+        ('@convention', r'(?i:convention collective)'),
+        ('@csn', r'\ACSN\d{4}'),
+        ('assurance', r'(?i:assurance)'),
+        ('immobilier', r'(?i:observatoire|immobilier)'),
+        ('guide_pratique', r'(?i:rpn)'),
+        ('guide_pratique', r'(?i:bonnes pratiques|fiche)'),
+    ]
+
+    def __init__(self, document_types=None, sources_dir=None):
+        document_types = DOCUMENT_TYPES if document_types is None else document_types
+        self.sources_dir = SOURCES_DIR if sources_dir is None else sources_dir
+
+        self._folder_matcher = PriorityMatcher(self.FOLDER_RULES)
+        self._folder_cache = {}
+
+        # Cascade sur le nom de fichier selon la règle de dossier retenue
+        # (le motif fil-info dans le nom de fichier reste prioritaire partout)
+        filename_patterns = [
+            (doc_type, pattern)
+            for doc_type, config in document_types.items()
+            for pattern in config['patterns']
+        ]
+        self._filename_matchers = {
+            '@convention': (PriorityMatcher([self.FIL_INFO_RULE, ('avenant_ccn', r'(?i:avenant)')]),
+                            'accord_branche'),
+            '@csn': (PriorityMatcher([self.FIL_INFO_RULE,
+                                      ('circulaire_csn', r'[Cc]irculaire'),
+                                      ('avenant_ccn', r'[Aa]venant'),
+                                      ('accord_branche', r'[Aa]ccord')]),
+                     'circulaire_csn'),
+            None: (PriorityMatcher([self.FIL_INFO_RULE] + filename_patterns), 'guide_pratique'),
+        }
+        self._fil_info_matcher = PriorityMatcher([self.FIL_INFO_RULE])
+
+    def _folder_rule(self, folder_path):
+        rule = self._folder_cache.get(folder_path, self)
+        if rule is self:
+            folder_name = folder_path.name if folder_path != self.sources_dir else ""
+            rule = self._folder_cache[folder_path] = self._folder_matcher.first(folder_name)
+        return rule
+
+    def classify(self, filename, folder_path):
+        """Classifie le document selon son type."""
+        rule = self._folder_rule(folder_path)
+        if rule == 'fil_info':
+            return rule
+
+        if rule in self._filename_matchers:
+            matcher, default = self._filename_matchers[rule]
+            return matcher.first(filename) or default
+
+        # Règle de dossier terminale : seul un nom de fichier fil-info la précède
+        return self._fil_info_matcher.first(filename) or rule
+
+    def classify_many(self, items):
+        """Classifie un lot de couples (nom de fichier, dossier parent)."""
+        return [self.classify(filename, folder_path) for filename, folder_path in items]
+
+
+CLASSIFIER = DocumentClassifier()
+
+
 def classify_document(filename, folder_path):
     """Classifie le document selon son type."""
-    # Vérifier d'abord le dossier parent
-    folder_name = folder_path.name if folder_path != SOURCES_DIR else ""
-
-    # Fil-infos
-    if 'fil-info' in folder_name.lower() or 'fil-info' in filename.lower():
-        return 'fil_info'
-
-    # Convention Collective
-    if 'convention collective' in folder_name.lower():
-        if re.search(r'avenant', filename, re.IGNORECASE):
-            return 'avenant_ccn'
-        return 'accord_branche'
-
-    # CSN par année
-    if re.match(r'CSN\d{4}', folder_name):
-        # Déterminer le sous-type
-        if re.search(r'[Cc]irculaire', filename):
-            return 'circulaire_csn'
-        if re.search(r'[Aa]venant', filename):
-            return 'avenant_ccn'
-        if re.search(r'[Aa]ccord', filename):
-            return 'accord_branche'
-        return 'circulaire_csn'  # Par défaut pour CSN
-
-    # Assurances
-    if 'assurance' in folder_name.lower():
-        return 'assurance'
-
-    # Observatoire immobilier
-    if 'observatoire' in folder_name.lower() or 'immobilier' in folder_name.lower():
-        return 'immobilier'
-
-    # RPN
-    if 'rpn' in folder_name.lower():
-        return 'guide_pratique'
-
-    # Bonnes pratiques
-    if 'bonnes pratiques' in folder_name.lower() or 'fiche' in folder_name.lower():
-        return 'guide_pratique'
-
-    # Recherche par pattern dans le nom de fichier
-    for doc_type, config in DOCUMENT_TYPES.items():
-        for pattern in config['patterns']:
-            if re.search(pattern, filename):
-                return doc_type
-
-    return 'guide_pratique'  # Type par défaut
+    return CLASSIFIER.classify(filename, folder_path)
+
+class _IdTranslationTable(dict):
+    """Table de traduction pour `str.translate` : a-z et 0-9 inchangés, accents
+    repliés selon `folding`, tout autre caractère remplacé par '_'.
+
+    Les caractères rencontrés sont mis en cache à la volée (__missing__)."""
+
+    def __init__(self, folding=None):
+        super().__init__()
+        for char in 'abcdefghijklmnopqrstuvwxyz0123456789':
+            self[ord(char)] = char
+        for accented, plain in (folding or {}).items():
+            for char in accented:
+                self[ord(char)] = plain
+
+    def __missing__(self, codepoint):
+        self[codepoint] = '_'
+        return '_'
+
+
+ACCENT_FOLDING = {
+    'àáâãäå': 'a',
+    'èéêë': 'e',
+    'ìíîï': 'i',
+    'òóôõö': 'o',
+    'ùúûü': 'u',
+    'ýÿ': 'y',
+    'ç': 'c',
+    'ñ': 'n',
+}
+
+DOCUMENT_ID_TABLE = _IdTranslationTable(ACCENT_FOLDING)
+FOLDER_ID_TABLE = _IdTranslationTable()
+DOCUMENT_ID_MAX_LENGTH = 100
+
 
 def generate_document_id(filename, folder_path):
     """Génère un ID unique pour le document."""
-    # Nettoyer le nom
-    base_name = Path(filename).stem
-    # Enlever les accents et caractères spéciaux
-    doc_id = base_name.lower()
-    doc_id = re.sub(r'[àáâãäå]', 'a', doc_id)
-    doc_id = re.sub(r'[èéêë]', 'e', doc_id)
-    doc_id = re.sub(r'[ìíîï]', 'i', doc_id)
-    doc_id = re.sub(r'[òóôõö]', 'o', doc_id)
-    doc_id = re.sub(r'[ùúûü]', 'u', doc_id)
-    doc_id = re.sub(r'[ýÿ]', 'y', doc_id)
-    doc_id = re.sub(r'[ç]', 'c', doc_id)
-    doc_id = re.sub(r'[ñ]', 'n', doc_id)
-    doc_id = re.sub(r'[^a-z0-9]', '_', doc_id)
-    doc_id = re.sub(r'_+', '_', doc_id)
-    doc_id = doc_id.strip('_')
+    # Enlever les accents et caractères spéciaux en une passe, puis fusionner
+    # les '_' consécutifs et retirer ceux des extrémités
+    doc_id = Path(filename).stem.lower().translate(DOCUMENT_ID_TABLE)
+    doc_id = '_'.join(part for part in doc_id.split('_') if part)
 
     # Ajouter le dossier parent si pertinent
     if folder_path != SOURCES_DIR:
-        folder_clean = folder_path.name.lower()
-        folder_clean = re.sub(r'[^a-z0-9]', '_', folder_clean)
+        folder_clean = folder_path.name.lower().translate(FOLDER_ID_TABLE)
         doc_id = f"{folder_clean}_{doc_id}"
 
-    return doc_id[:100]  # Limiter la longueur
+    return doc_id[:DOCUMENT_ID_MAX_LENGTH]  # Limiter la longueur
+
+
+def suffix_document_id(doc_id, fichier):
+    """Rend un ID unique en lui ajoutant un suffixe court dérivé du chemin du fichier."""
+    suffix = hashlib.sha1(fichier.encode('utf-8')).hexdigest()[:8]
+    return f"{doc_id[:DOCUMENT_ID_MAX_LENGTH - len(suffix) - 1]}_{suffix}"
+
+
+def resolve_id_collisions(documents):
+    """Détecte et résout les collisions d'ID sur l'ensemble du corpus.
+
+    Dans chaque groupe de documents partageant un ID, le premier par chemin de
+    fichier conserve l'ID, les suivants reçoivent un suffixe déterministe.
+    Retourne la liste des collisions résolues.
+    """
+    by_id = defaultdict(list)
+    for doc in documents:
+        by_id[doc['document_id']].append(doc)
+
+    collisions = []
+    for doc_id, docs in by_id.items():
+        if len(docs) < 2:
+            continue
+        docs.sort(key=lambda d: d['fichier'])
+        for doc in docs[1:]:
+            doc['document_id'] = suffix_document_id(doc_id, doc['fichier'])
+        collisions.append({
+            "document_id": doc_id,
+            "documents": [{"fichier": d['fichier'], "document_id": d['document_id']} for d in docs],
+        })
+    return collisions
+
+
+def allocate_document_id(file_path, used_ids):
+    """Génère l'ID d'un nouveau fichier, suffixé s'il est déjà attribué."""
+    doc_id = generate_document_id(file_path.name, file_path.parent)
+    if doc_id in used_ids:
+        doc_id = suffix_document_id(doc_id, str(file_path.relative_to(BASE_DIR)))
+    used_ids.add(doc_id)
+    return doc_id
+
+
+def print_id_collisions(collisions):
+    """Affiche le rapport des collisions d'ID résolues."""
+    if not collisions:
+        return
+    print(f"   ⚠️  {len(collisions)} collision(s) d'ID résolue(s) :")
+    for collision in collisions:
+        print(f"     {collision['document_id']}")
+        for doc in collision['documents']:
+            print(f"       - {doc['fichier']} → {doc['document_id']}")
 
 def generate_title(filename):
     """Génère un titre lisible à partir du nom de fichier."""
@@ -451,120 +671,219 @@ def extract_keywords(filename, doc_type):
         if re.search(pattern, filename_lower):
             keywords.add(keyword)
 
-    return list(keywords)
-
-def scan_documents():
-    """Scanne tous les documents et génère les métadonnées."""
-    documents = []
+    # Trié pour une sortie stable d'une exécution (ou d'un processus) à l'autre
+    return sorted(keywords)
 
-    for root, dirs, files in os.walk(SOURCES_DIR):
+def iter_source_files(directory=SOURCES_DIR):
+    """Parcourt les fichiers sources (hors fichiers cachés) dans l'ordre de os.walk."""
+    for root, dirs, files in os.walk(directory):
         root_path = Path(root)
         for filename in files:
             if filename.startswith('.'):
                 continue
+            yield root_path / filename
+
+
+def build_document_metadata(file_path):
+    """Construit les métadonnées KM d'un fichier source."""
+    root_path = file_path.parent
+    filename = file_path.name
+    relative_path = file_path.relative_to(BASE_DIR)
+
+    # Extraire les métadonnées
+    doc_type = classify_document(filename, root_path)
+    doc_id = generate_document_id(filename, root_path)
+    date_pub = extract_date_from_filename(filename)
+    reference = extract_reference(filename)
+    year = extract_year_from_path(root_path, filename)
+
+    # Construire les métadonnées KM
+    return {
+        "document_id": doc_id,
+        "fichier": str(relative_path),
+        "nom_fichier": filename,
+        "metadata": {
+            "titre": generate_title(filename),
+            "titre_court": generate_title(filename)[:50],
+            "date_publication": date_pub or f"{year}-01-01",
+            "date_effet": date_pub or f"{year}-01-01",
+            "version": "1.0",
+            "langue": "fr",
+            "auteur": "CSN" if 'csn' in doc_type or doc_type == 'circulaire_csn' else "Profession notariale",
+            "statut": "en_vigueur"
+        },
+        "classification": {
+            "type_document": doc_type,
+            "label": DOCUMENT_TYPES.get(doc_type, {}).get('label', doc_type),
+            "domaines_juridiques": DOCUMENT_TYPES.get(doc_type, {}).get('domaines', []),
+            "public_cible": ["notaires", "clercs", "collaborateurs d'office"],
+            "annee_reference": year,
+            "categorie_dossier": root_path.name if root_path != SOURCES_DIR else "racine"
+        },
+        "reference": reference,
+        "vocabulaire_specifique": [],  # À enrichir manuellement
+        "questions_typiques": generate_questions_typiques(doc_type, reference),
+        "relations_documentaires": {
+            "remplace": [],
+            "modifie": [],
+            "reference": [],
+            "complete": []
+        },
+        "resume": f"Document de type {DOCUMENT_TYPES.get(doc_type, {}).get('label', doc_type)}",
+        "mots_cles": extract_keywords(filename, doc_type)
+    }
 
-            file_path = root_path / filename
-            relative_path = file_path.relative_to(BASE_DIR)
-
-            # Extraire les métadonnées
-            doc_type = classify_document(filename, root_path)
-            doc_id = generate_document_id(filename, root_path)
-            date_pub = extract_date_from_filename(filename)
-            reference = extract_reference(filename)
-            year = extract_year_from_path(root_path, filename)
-
-            # Construire les métadonnées KM
-            doc_metadata = {
-                "document_id": doc_id,
-                "fichier": str(relative_path),
-                "nom_fichier": filename,
-                "metadata": {
-                    "titre": generate_title(filename),
-                    "titre_court": generate_title(filename)[:50],
-                    "date_publication": date_pub or f"{year}-01-01",
-                    "date_effet": date_pub or f"{year}-01-01",
-                    "version": "1.0",
-                    "langue": "fr",
-                    "auteur": "CSN" if 'csn' in doc_type or doc_type == 'circulaire_csn' else "Profession notariale",
-                    "statut": "en_vigueur"
-                },
-                "classification": {
-                    "type_document": doc_type,
-                    "label": DOCUMENT_TYPES.get(doc_type, {}).get('label', doc_type),
-                    "domaines_juridiques": DOCUMENT_TYPES.get(doc_type, {}).get('domaines', []),
-                    "public_cible": ["notaires", "clercs", "collaborateurs d'office"],
-                    "annee_reference": year,
-                    "categorie_dossier": root_path.name if root_path != SOURCES_DIR else "racine"
-                },
-                "reference": reference,
-                "vocabulaire_specifique": [],  # À enrichir manuellement
-                "questions_typiques": generate_questions_typiques(doc_type, reference),
-                "relations_documentaires": {
-                    "remplace": [],
-                    "modifie": [],
-                    "reference": [],
-                    "complete": []
-                },
-                "resume": f"Document de type {DOCUMENT_TYPES.get(doc_type, {}).get('label', doc_type)}",
-                "mots_cles": extract_keywords(filename, doc_type)
-            }
 
-            documents.append(doc_metadata)
+def build_documents_metadata(file_paths, workers=1):
+    """Construit les métadonnées d'une liste de fichiers.
+
+    Avec `workers` > 1, la construction est répartie sur un pool de processus ;
+    le résultat suit toujours l'ordre de `file_paths`.
+    """
+    file_paths = list(file_paths)
+    if workers <= 1 or len(file_paths) < 2:
+        return [build_document_metadata(file_path) for file_path in file_paths]
+
+    chunksize = max(1, len(file_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(build_document_metadata, file_paths, chunksize=chunksize))
+
+
+def scan_documents(workers=1):
+    """Scanne tous les documents et génère les métadonnées.
+
+    Retourne (documents, collisions d'ID résolues)."""
+    documents = build_documents_metadata(iter_source_files(), workers)
+    return documents, resolve_id_collisions(documents)
+
+# Horodatages ignorés pour décider si un artefact généré a réellement changé
+VOLATILE_CONTENT = re.compile(
+    r'"generated_at": "[^"]*"'
+    r'|Mise à jour : \d{2}/\d{2}/\d{4}'
+    r'|automatiquement le \d{2}/\d{2}/\d{4} à \d{2}:\d{2}'
+)
+
+
+def content_fingerprint(content):
+    """Empreinte du contenu rendu, horodatages exclus."""
+    return hashlib.sha256(VOLATILE_CONTENT.sub('', content).encode('utf-8')).hexdigest()
+
+
+def write_if_changed(filepath, content):
+    """Écrit `content` (atomiquement) uniquement si son empreinte diffère de celle du fichier existant.
+
+    Retourne True si le fichier a été écrit.
+    """
+    return atomic_files.write_if_changed(filepath, content, fingerprint=content_fingerprint)
 
-    return documents
 
 def save_individual_metadata(documents):
-    """Sauvegarde les métadonnées individuelles."""
-    DOCS_METADATA_DIR.mkdir(parents=True, exist_ok=True)
+    """Sauvegarde les métadonnées individuelles (backend de `metadata_store`)."""
+    with open_store() as store:
+        store.save_many(documents)
 
-    for doc in documents:
-        filepath = DOCS_METADATA_DIR / f"{doc['document_id']}.metadata.json"
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(doc, f, ensure_ascii=False, indent=2)
 
 def save_global_index(documents):
-    """Sauvegarde l'index global."""
+    """Sauvegarde l'index global. Retourne True si le fichier a changé.
+
+    Une variante NDJSON (un document par ligne) est écrite à côté, après le
+    JSON, pour les consommateurs qui lisent l'index en flux (`index_reader`).
+    """
     index = {
         "generated_at": datetime.now().isoformat(),
         "total_documents": len(documents),
         "documents": documents
     }
 
-    with open(METADATA_DIR / "index_complet.json", 'w', encoding='utf-8') as f:
-        json.dump(index, f, ensure_ascii=False, indent=2)
+    changed = write_if_changed(INDEX_FILE, json.dumps(index, ensure_ascii=False, indent=2))
+    write_ndjson(documents, INDEX_NDJSON_FILE)
+    return changed
 
 def save_vocabulary():
-    """Sauvegarde le vocabulaire notarial."""
-    with open(METADATA_DIR / "vocabulaire_notarial.json", 'w', encoding='utf-8') as f:
-        json.dump(VOCABULAIRE_NOTARIAL, f, ensure_ascii=False, indent=2)
+    """Sauvegarde le vocabulaire notarial. Retourne True si le fichier a changé."""
+    return write_if_changed(METADATA_DIR / "vocabulaire_notarial.json",
+                            json.dumps(VOCABULAIRE_NOTARIAL, ensure_ascii=False, indent=2))
+
+
+def save_readme(documents, aggregates=None):
+    """Génère et sauvegarde le README.md. Retourne True si le fichier a changé."""
+    return write_if_changed(BASE_DIR / "README.md", generate_readme(documents, aggregates))
+
+def aggregate_documents(documents):
+    """Construit en une seule passe les regroupements utilisés pour le rendu.
+
+    Par catégorie : documents, dossiers, années, mots-clés, références et bornes
+    de dates ; pour le corpus : nombre de documents par année. Les pages de
+    catégories et le README sont rendus à partir de ces agrégats.
+    """
+    types = {}
+    by_year = defaultdict(int)
+
+    for doc in documents:
+        classification = doc['classification']
+        doc_type = classification['type_document']
+        year = classification['annee_reference']
+        date = doc['metadata']['date_publication']
+
+        group = types.get(doc_type)
+        if group is None:
+            group = types[doc_type] = {
+                'docs': [],
+                'folders': defaultdict(int),
+                'years': defaultdict(int),
+                'keywords': set(),
+                'references': [],
+                'min_date': date,
+                'max_date': date,
+            }
+
+        group['docs'].append(doc)
+        group['folders'][classification['categorie_dossier']] += 1
+        group['years'][year] += 1
+        group['keywords'].update(doc.get('mots_cles', []))
+        if doc.get('reference'):
+            group['references'].append(doc)
+        group['min_date'] = min(group['min_date'], date)
+        group['max_date'] = max(group['max_date'], date)
+        by_year[year] += 1
+
+    # Tri par date décroissante (tri stable : les références gardent l'ordre
+    # qu'elles auraient dans la liste triée des documents)
+    for group in types.values():
+        group['docs'].sort(key=lambda x: x['metadata']['date_publication'], reverse=True)
+        group['references'].sort(key=lambda x: x['metadata']['date_publication'], reverse=True)
+
+    return {
+        'total': len(documents),
+        'types': types,
+        'by_year': by_year,
+    }
 
-def generate_category_page(doc_type, docs):
-    """Génère une page markdown pour une catégorie de documents."""
+
+def generate_category_page(doc_type, group):
+    """Génère une page markdown pour une catégorie de documents.
+
+    `group` est l'agrégat de la catégorie produit par `aggregate_documents`.
+    """
     config = DOCUMENT_TYPES.get(doc_type, {})
     label = config.get('label', doc_type)
     description = config.get('description', '')
     usage = config.get('usage', '')
     domaines = config.get('domaines', [])
 
-    # Trier par date décroissante
-    docs.sort(key=lambda x: x['metadata']['date_publication'], reverse=True)
+    # Documents triés par date décroissante
+    docs = group['docs']
 
     # Statistiques
-    years = [doc['classification']['annee_reference'] for doc in docs]
+    years = group['years']
     min_year = min(years) if years else 2019
     max_year = max(years) if years else 2025
 
-    dates = [doc['metadata']['date_publication'] for doc in docs]
-    latest_date = max(dates) if dates else "N/A"
-    oldest_date = min(dates) if dates else "N/A"
-
-    # Collecter tous les mots-clés
-    all_keywords = set()
-    for doc in docs:
-        all_keywords.update(doc.get('mots_cles', []))
+    latest_date = group['max_date'] if docs else "N/A"
+    oldest_date = group['min_date'] if docs else "N/A"
 
-    # Collecter les catégories de dossiers
-    folders = set(doc['classification']['categorie_dossier'] for doc in docs)
+    all_keywords = group['keywords']
+    folders = group['folders']
 
     page = []
     page.append(f"# {label}")
@@ -605,18 +924,19 @@ def generate_category_page(doc_type, docs):
     page.append("### Sources")
     page.append("")
     for folder in sorted(folders):
-        folder_docs = [d for d in docs if d['classification']['categorie_dossier'] == folder]
-        page.append(f"- **{folder}** : {len(folder_docs)} documents")
+        page.append(f"- **{folder}** : {folders[folder]} documents")
     page.append("")
 
     if all_keywords:
         page.append("### Thématiques principales")
         page.append("")
-        page.append(", ".join(sorted(list(all_keywords)[:15])))
+        # Les 15 premiers par ordre alphabétique : l'ancien tirage de 15 mots-clés
+        # dans l'ordre (aléatoire) d'un set changeait la page à chaque exécution
+        page.append(", ".join(sorted(all_keywords)[:15]))
         page.append("")
 
     # Références extraites
-    refs = [doc for doc in docs if doc.get('reference')]
+    refs = group['references']
     if refs:
         page.append("### Références identifiées")
         page.append("")
@@ -634,13 +954,9 @@ def generate_category_page(doc_type, docs):
     page.append("## Chronologie")
     page.append("")
 
-    docs_by_year = defaultdict(list)
-    for doc in docs:
-        docs_by_year[doc['classification']['annee_reference']].append(doc)
-
-    for year in sorted(docs_by_year.keys(), reverse=True):
+    for year in sorted(years, reverse=True):
         page.append(f"### {year}")
-        page.append(f"*{len(docs_by_year[year])} documents*")
+        page.append(f"*{years[year]} documents*")
         page.append("")
 
     page.append("---")
@@ -675,42 +991,35 @@ def generate_category_page(doc_type, docs):
     return "\n".join(page)
 
 
-def save_category_pages(documents):
-    """Génère et sauvegarde les pages par catégorie."""
-    CATEGORIES_DIR.mkdir(parents=True, exist_ok=True)
+def save_category_pages(documents, doc_types=None, aggregates=None):
+    """Génère et sauvegarde les pages par catégorie.
 
-    by_type = defaultdict(list)
-    for doc in documents:
-        doc_type = doc['classification']['type_document']
-        by_type[doc_type].append(doc)
+    Si `doc_types` est fourni, seules les pages de ces catégories sont régénérées.
+    """
+    CATEGORIES_DIR.mkdir(parents=True, exist_ok=True)
+    aggregates = aggregates or aggregate_documents(documents)
 
     pages_created = []
-    for doc_type, docs in by_type.items():
+    for doc_type, group in aggregates['types'].items():
+        if doc_types is not None and doc_type not in doc_types:
+            continue
+        docs = group['docs']
         if docs:
-            page_content = generate_category_page(doc_type, docs)
+            page_content = generate_category_page(doc_type, group)
             filename = f"{doc_type}.md"
-            filepath = CATEGORIES_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(page_content)
-            pages_created.append((doc_type, filename, len(docs)))
+            changed = write_if_changed(CATEGORIES_DIR / filename, page_content)
+            pages_created.append((doc_type, filename, len(docs), changed))
 
     return pages_created
 
 
-def generate_readme(documents):
+def generate_readme(documents, aggregates=None):
     """Génère le README.md avec présentation globale et liens vers catégories."""
 
     # Statistiques
-    stats = defaultdict(int)
-    by_type = defaultdict(list)
-    by_year = defaultdict(list)
-
-    for doc in documents:
-        doc_type = doc['classification']['type_document']
-        year = doc['classification']['annee_reference']
-        stats[doc_type] += 1
-        by_type[doc_type].append(doc)
-        by_year[year].append(doc)
+    aggregates = aggregates or aggregate_documents(documents)
+    by_type = aggregates['types']
+    by_year = aggregates['by_year']
 
     # Ordre d'affichage des types
     type_order = [
@@ -724,7 +1033,7 @@ def generate_readme(documents):
     readme.append("")
     readme.append("**Base documentaire complète pour les professionnels du notariat français**")
     readme.append("")
-    readme.append(f"📚 **{len(documents)} documents** | 📅 **2019-2025** | 🔄 Mise à jour : {datetime.now().strftime('%d/%m/%Y')}")
+    readme.append(f"📚 **{aggregates['total']} documents** | 📅 **2019-2025** | 🔄 Mise à jour : {datetime.now().strftime('%d/%m/%Y')}")
     readme.append("")
     readme.append("---")
     readme.append("")
@@ -753,11 +1062,11 @@ def generate_readme(documents):
     readme.append("")
 
     for doc_type in type_order:
-        if doc_type in stats:
+        if doc_type in by_type:
             config = DOCUMENT_TYPES.get(doc_type, {})
             label = config.get('label', doc_type)
             description_short = config.get('description', '').split('.')[0] + '.'
-            count = stats[doc_type]
+            count = len(by_type[doc_type]['docs'])
 
             readme.append(f"### [{label}](docs/categories/{doc_type}.md)")
             readme.append(f"**{count} documents**")
@@ -779,8 +1088,8 @@ def generate_readme(documents):
     for doc_type in type_order:
         if doc_type in by_type:
             label = DOCUMENT_TYPES.get(doc_type, {}).get('label', doc_type)
-            docs = by_type[doc_type]
-            years = [d['classification']['annee_reference'] for d in docs]
+            docs = by_type[doc_type]['docs']
+            years = by_type[doc_type]['years']
             min_y = min(years) if years else 2019
             max_y = max(years) if years else 2025
             readme.append(f"| [{label}](docs/categories/{doc_type}.md) | {len(docs)} | {min_y}-{max_y} |")
@@ -793,7 +1102,7 @@ def generate_readme(documents):
     readme.append("|-------|-----------|")
 
     for year in sorted(by_year.keys(), reverse=True):
-        readme.append(f"| {year} | {len(by_year[year])} |")
+        readme.append(f"| {year} | {by_year[year]} |")
 
     readme.append("")
     readme.append("---")
@@ -815,6 +1124,7 @@ def generate_readme(documents):
     readme.append("│   └── ...")
     readme.append("├── _metadata/                          # Métadonnées KM")
     readme.append("│   ├── index_complet.json             # Index global")
+    readme.append("│   ├── index_complet.ndjson           # Index global, un document par ligne")
     readme.append("│   ├── documents/*.metadata.json      # Métadonnées par document")
     readme.append("│   └── vocabulaire_notarial.json      # Lexique avec synonymes")
     readme.append("├── _INSTRUCTIONS/                      # Documentation technique")
@@ -885,6 +1195,11 @@ def generate_readme(documents):
     readme.append("- Classifie les documents par type")
     readme.append("- Génère les fichiers JSON pour le KM tool")
     readme.append("- Met à jour le README et les pages de catégories")
+    readme.append("- Ne retraite que les fichiers ajoutés, modifiés ou supprimés depuis la dernière exécution (`_metadata/manifest.json`)")
+    readme.append("")
+    readme.append("Pour forcer une reconstruction complète : `python3 index_bible_notariale.py --full`")
+    readme.append("")
+    readme.append("Pour réindexer automatiquement à chaque dépôt de fichier : `python3 index_bible_notariale.py --watch`")
     readme.append("")
 
     readme.append("---")
@@ -896,24 +1211,295 @@ def generate_readme(documents):
 
 def load_existing_metadata():
     """Charge les métadonnées existantes au lieu de les régénérer."""
-    documents = []
+    with open_store() as store:
+        return store.load_all()
+
+
+def build_manifest_entry(file_path, document_id, stat=None, sha256=None):
+    """Construit l'entrée du manifeste pour un fichier source."""
+    stat = stat or file_path.stat()
+    return {
+        "document_id": document_id,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(file_path),
+    }
 
-    for meta_file in DOCS_METADATA_DIR.glob("*.metadata.json"):
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-        documents.append(metadata)
 
-    return documents
+def load_manifest():
+    """Charge le manifeste des fichiers sources (None s'il n'existe pas)."""
+    if not MANIFEST_FILE.exists():
+        return None
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f).get('files', {})
 
 
-def main():
-    print("Indexation de la Bible Notariale...")
-    print(f"Dossier source : {SOURCES_DIR}")
-    print(f"Dossier métadonnées : {METADATA_DIR}")
+def save_manifest(files):
+    """Sauvegarde le manifeste (chemin, taille, mtime, empreinte) des fichiers sources.
+
+    Retourne True si le fichier a changé."""
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "total_files": len(files),
+        "files": dict(sorted(files.items())),
+    }
+    return write_if_changed(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def build_manifest(documents):
+    """Construit le manifeste complet à partir des fichiers sources présents."""
+    ids_by_path = {doc['fichier']: doc['document_id'] for doc in documents}
+    used_ids = set(ids_by_path.values())
+    files = {}
+    for file_path in iter_source_files():
+        relative = str(file_path.relative_to(BASE_DIR))
+        document_id = ids_by_path.get(relative)
+        if document_id is None:
+            document_id = allocate_document_id(file_path, used_ids)
+        files[relative] = build_manifest_entry(file_path, document_id)
+    return files
+
+
+def detect_changes(manifest, paths=None):
+    """Compare les fichiers sources au manifeste.
+
+    La taille et le mtime servent de filtre rapide : l'empreinte n'est recalculée
+    que pour les fichiers dont l'un des deux a changé. Si `paths` est fourni,
+    seuls ces chemins relatifs sont examinés.
+
+    Retourne (ajoutés, modifiés, supprimés, manifeste mis à jour).
+    """
+    added, modified = [], []
+    files = dict(manifest)
+
+    if paths is None:
+        candidates = list(iter_source_files())
+        seen = {str(p.relative_to(BASE_DIR)) for p in candidates}
+        deleted = [relative for relative in manifest if relative not in seen]
+    else:
+        candidates = []
+        deleted = []
+        for relative in sorted(set(paths)):
+            file_path = BASE_DIR / relative
+            if file_path.is_file() and not file_path.name.startswith('.'):
+                candidates.append(file_path)
+            elif relative in manifest:
+                deleted.append(relative)
+
+    for file_path in candidates:
+        relative = str(file_path.relative_to(BASE_DIR))
+        stat = file_path.stat()
+        entry = manifest.get(relative)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            continue
+
+        sha256 = file_sha256(file_path)
+        if entry and entry['sha256'] == sha256:
+            # Fichier simplement touché : mettre à jour le mtime sans réindexer
+            files[relative] = dict(entry, mtime=stat.st_mtime_ns)
+            continue
+
+        document_id = entry['document_id'] if entry else None
+        files[relative] = build_manifest_entry(file_path, document_id, stat, sha256)
+        (modified if entry else added).append(file_path)
+
+    for relative in deleted:
+        files.pop(relative, None)
+
+    # Les nouveaux fichiers reçoivent un ID qui n'écrase aucun document connu
+    used_ids = {entry['document_id'] for entry in files.values() if entry['document_id']}
+    for file_path in added:
+        relative = str(file_path.relative_to(BASE_DIR))
+        files[relative]['document_id'] = allocate_document_id(file_path, used_ids)
+
+    return added, modified, deleted, files
+
+
+def load_index_documents():
+    """Charge les documents depuis l'index global (ou les métadonnées individuelles)."""
+    if INDEX_FILE.exists():
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('documents', [])
+    return load_existing_metadata()
+
+
+def incremental_update(manifest, paths=None, workers=1):
+    """Réindexe uniquement les documents ajoutés, modifiés ou supprimés.
+
+    Les métadonnées individuelles concernées sont écrites ou supprimées, l'index
+    global est patché en place et seules les pages de catégories touchées sont
+    régénérées. Les nouveaux documents passent par `migrate_metadata` et
+    l'enrichissement des domaines métier, comme le reste du corpus. Retourne (documents, ajoutés, modifiés, supprimés, manifeste,
+    artefacts générés réellement modifiés).
+    """
+    added, modified, deleted, files = detect_changes(manifest, paths)
+    documents = load_index_documents()
+
+    if not (added or modified or deleted):
+        return documents, added, modified, deleted, files, []
+
+    by_id = {doc['document_id']: doc for doc in documents}
+    touched_types = set()
+
+    with open_store() as store:
+        for relative in deleted:
+            document_id = manifest[relative]['document_id']
+            old_doc = by_id.pop(document_id, None)
+            if old_doc:
+                touched_types.add(old_doc['classification']['type_document'])
+            store.delete(document_id)
+
+    changed_docs = []
+    with open_store() as store:
+        for file_path, doc in zip(added + modified, build_documents_metadata(added + modified, workers)):
+            relative = str(file_path.relative_to(BASE_DIR))
+            doc['document_id'] = files[relative]['document_id']
+            old_doc = by_id.get(doc['document_id'])
+            if old_doc:
+                touched_types.add(old_doc['classification']['type_document'])
+            stored = store.load(doc['document_id'])
+            if stored is not None:
+                # Contenu modifié : comme pour --full, les métadonnées enrichies
+                # sont conservées ; le document est signalé pour ré-enrichissement
+                stored['fichier'] = doc['fichier']
+                stored['nom_fichier'] = doc['nom_fichier']
+                stored[REENRICH_FLAG] = True
+                doc = stored
+            else:
+                # Nouveau document : même structure que le reste du corpus
+                # (type métier, sources_document, domaines métier)
+                migrate_metadata(doc)
+                enrich_domaines_metier(doc)
+            touched_types.add(doc['classification']['type_document'])
+            by_id[doc['document_id']] = doc
+            changed_docs.append(doc)
+
+        store.save_many(changed_docs)
+        # Même ordre que `load_existing_metadata` : --full produit alors le même résultat
+        position = {document_id: i for i, document_id in enumerate(store.ids())}
+
+    documents = sorted(by_id.values(), key=lambda doc: position.get(doc['document_id'], len(position)))
+    aggregates = aggregate_documents(documents)
+    artifacts = []
+    if save_global_index(documents):
+        artifacts.append(str(INDEX_FILE.relative_to(BASE_DIR)))
+    for doc_type, filename, count, changed in save_category_pages(documents, doc_types=touched_types,
+                                                                  aggregates=aggregates):
+        if changed:
+            artifacts.append(str((CATEGORIES_DIR / filename).relative_to(BASE_DIR)))
+    # Catégories vidées par une suppression ou un reclassement : page retirée
+    for doc_type in touched_types:
+        if aggregates['types'].get(doc_type, {}).get('docs'):
+            continue
+        page_path = CATEGORIES_DIR / f"{doc_type}.md"
+        if page_path.exists():
+            page_path.unlink()
+            artifacts.append(str(page_path.relative_to(BASE_DIR)))
+    if save_readme(documents, aggregates):
+        artifacts.append("README.md")
+
+    return documents, added, modified, deleted, files, artifacts
+
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Indexation de la Bible Notariale")
+    parser.add_argument('--full', action='store_true',
+                        help="Reconstruction complète (ignore le manifeste)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus pour le scan des documents (défaut : 1)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Après l'indexation, surveiller sources_documentaires/ et réindexer à chaque changement")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"Secondes de calme avant de traiter une rafale de changements (défaut : {DEFAULT_DEBOUNCE})")
+    parser.add_argument('--poll', action='store_true',
+                        help="Surveillance par scrutation périodique plutôt qu'inotify")
+    return parser.parse_args(argv)
+
+
+def run_incremental(manifest, workers=1, paths=None):
+    """Mise à jour incrémentale guidée par le manifeste.
+
+    Si `paths` est fourni, seuls ces chemins relatifs sont examinés.
+    """
+    print("1. Détection des changements (manifeste)...")
+    documents, added, modified, deleted, files, artifacts = incremental_update(manifest, paths, workers)
+    print(f"   {len(added)} ajoutés, {len(modified)} modifiés, {len(deleted)} supprimés")
     print()
 
+    save_manifest(files)
+
+    if not (added or modified or deleted):
+        print("Aucun changement détecté : index, pages et README conservés.")
+        return
+
+    for file_path in added + modified:
+        relative = str(file_path.relative_to(BASE_DIR))
+        print(f"   ✓ {relative}")
+        if files[relative]['document_id'] != generate_document_id(file_path.name, file_path.parent):
+            print(f"     ⚠️  ID déjà attribué, suffixé : {files[relative]['document_id']}")
+    for relative in deleted:
+        print(f"   ✗ {relative}")
+    print()
+    if modified:
+        print(f"{len(modified)} documents modifiés conservés, à ré-enrichir : python3 enrich_metadata.py")
+        print()
+    print(f"Artefacts modifiés : {len(artifacts)}")
+    for artifact in artifacts:
+        print(f"   {artifact}")
+    print()
+    print("Indexation incrémentale terminée !")
+    print(f"Total : {len(documents)} documents indexés")
+
+
+def changed_source_paths(changes, manifest):
+    """Chemins relatifs à réexaminer pour des chemins absolus signalés par le watcher.
+
+    Un dossier ajouté, déplacé ou supprimé couvre tous les fichiers qu'il
+    contient sur disque et toutes les entrées du manifeste sous son chemin.
+    """
+    relatives = set()
+    for path in changes:
+        path = Path(path)
+        relative = str(path.relative_to(BASE_DIR))
+        relatives.add(relative)
+        if path.is_dir():
+            relatives.update(str(p.relative_to(BASE_DIR)) for p in iter_source_files(path))
+        prefix = relative + os.sep
+        relatives.update(r for r in manifest if r.startswith(prefix))
+    return relatives
+
+
+def watch_sources(workers=1, debounce=DEFAULT_DEBOUNCE, polling=False):
+    """Surveille les sources et lance une mise à jour incrémentale par rafale de changements."""
+    watcher = open_watcher(SOURCES_DIR, polling=polling)
+    print(f"Surveillance de {SOURCES_DIR} ({watcher.name}, regroupement {debounce:g} s) - Ctrl+C pour arrêter")
+    print()
+
+    try:
+        for changes in iter_change_batches(watcher, debounce):
+            manifest = load_manifest() or {}
+            # None : la file d'événements a débordé, tout réexaminer
+            paths = None if changes is None else changed_source_paths(changes, manifest)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Changements détectés")
+            try:
+                run_incremental(manifest, workers, paths)
+            except Exception as e:
+                # Manifeste non sauvegardé : la prochaine rafale réexamine ces fichiers
+                print(f"⚠️  Mise à jour interrompue ({type(e).__name__}: {e}), nouvel essai au prochain changement")
+            print()
+    except KeyboardInterrupt:
+        print("Surveillance arrêtée.")
+    finally:
+        watcher.close()
+
+
+def run_full(workers=1):
+    """Reconstruction complète de l'index, des pages et du manifeste."""
     # Vérifier si des métadonnées existent déjà
-    existing_meta = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
+    with open_store() as store:
+        existing_meta = store.count()
 
     if existing_meta:
         print("1. Chargement des métadonnées existantes...")
@@ -927,8 +1513,9 @@ def main():
     else:
         # 1. Scanner les documents
         print("1. Scan des documents...")
-        documents = scan_documents()
+        documents, collisions = scan_documents(workers=workers)
         print(f"   {len(documents)} documents trouvés")
+        print_id_collisions(collisions)
         print()
 
         # 2. Sauvegarder les métadonnées individuelles
@@ -938,35 +1525,70 @@ def main():
         print()
 
     # 3. Sauvegarder l'index global
+    artifacts = []
     print("3. Génération de l'index global...")
-    save_global_index(documents)
-    print("   index_complet.json créé")
+    changed = save_global_index(documents)
+    print(f"   index_complet.json {'mis à jour' if changed else 'inchangé'}")
+    if changed:
+        artifacts.append("index_complet.json")
     print()
 
     # 4. Sauvegarder le vocabulaire
     print("4. Export du vocabulaire notarial...")
-    save_vocabulary()
-    print("   vocabulaire_notarial.json créé")
+    changed = save_vocabulary()
+    print(f"   vocabulaire_notarial.json {'mis à jour' if changed else 'inchangé'}")
+    if changed:
+        artifacts.append("vocabulaire_notarial.json")
     print()
 
     # 5. Générer les pages par catégorie
     print("5. Génération des pages par catégorie...")
-    pages = save_category_pages(documents)
-    for doc_type, filename, count in pages:
-        print(f"   {filename} ({count} documents)")
+    aggregates = aggregate_documents(documents)
+    pages = save_category_pages(documents, aggregates=aggregates)
+    for doc_type, filename, count, changed in pages:
+        print(f"   {filename} ({count} documents){'' if changed else ' - inchangé'}")
+        if changed:
+            artifacts.append(filename)
     print()
 
     # 6. Générer le README
     print("6. Génération du README.md global...")
-    readme_content = generate_readme(documents)
-    with open(BASE_DIR / "README.md", 'w', encoding='utf-8') as f:
-        f.write(readme_content)
-    print("   README.md créé")
+    changed = save_readme(documents, aggregates)
+    print(f"   README.md {'mis à jour' if changed else 'inchangé'}")
+    if changed:
+        artifacts.append("README.md")
+    print()
+
+    # 7. Sauvegarder le manifeste pour les prochaines exécutions incrémentales
+    print("7. Génération du manifeste des fichiers sources...")
+    save_manifest(build_manifest(documents))
+    print("   manifest.json créé")
     print()
 
     print("Indexation terminée !")
     print(f"Total : {len(documents)} documents indexés")
     print(f"Pages de catégories : {len(pages)}")
+    print(f"Artefacts modifiés : {len(artifacts)}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("Indexation de la Bible Notariale...")
+    print(f"Dossier source : {SOURCES_DIR}")
+    print(f"Dossier métadonnées : {METADATA_DIR}")
+    print()
+
+    manifest = None if args.full else load_manifest()
+    if manifest is not None:
+        run_incremental(manifest, args.workers)
+    else:
+        run_full(args.workers)
+
+    if args.watch:
+        print()
+        watch_sources(args.workers, args.debounce, args.poll)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture paresseuse de l'index global des documents
+
+`index_complet.json` contient tous les documents dans un seul objet JSON :
+il faut le charger entièrement avant de traiter le premier document.
+`index_bible_notariale.py` produit aussi `index_complet.ndjson` (un document
+JSON par ligne) que ce module lit ligne à ligne, en mémoire constante.
+"""
+
+import json
+from pathlib import Path
+
+from atomic_files import write_if_changed
+
+BASE_DIR = Path(__file__).parent
+METADATA_DIR = BASE_DIR / "_metadata"
+INDEX_FILE = METADATA_DIR / "index_complet.json"
+INDEX_NDJSON_FILE = METADATA_DIR / "index_complet.ndjson"
+
+
+def ndjson_path_for(index_path):
+    """Chemin de la variante NDJSON associée à un index JSON."""
+    index_path = Path(index_path)
+    return index_path.with_suffix('.ndjson')
+
+
+def iter_ndjson(ndjson_path):
+    """Itère les documents d'un fichier NDJSON, un par ligne."""
+    with open(ndjson_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_documents(index_path=INDEX_FILE):
+    """Itère les documents de l'index.
+
+    Accepte un chemin `.ndjson` ou `.json`. Pour un `.json`, la variante NDJSON
+    voisine est utilisée si elle existe et est strictement plus récente que le
+    JSON (sinon, un autre script a pu modifier le JSON depuis : lecture
+    complète). Avec des horodatages grossiers, deux écritures dans le même
+    intervalle sont à égalité : le JSON fait alors foi.
+    """
+    index_path = Path(index_path)
+    if index_path.suffix == '.ndjson':
+        yield from iter_ndjson(index_path)
+        return
+
+    ndjson_path = ndjson_path_for(index_path)
+    if ndjson_path.exists() and (
+        not index_path.exists() or ndjson_path.stat().st_mtime_ns > index_path.stat().st_mtime_ns
+    ):
+        yield from iter_ndjson(ndjson_path)
+        return
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        yield from json.load(f).get('documents', [])
+
+
+def write_ndjson(documents, ndjson_path=INDEX_NDJSON_FILE):
+    """Écrit les documents au format NDJSON (atomique, seulement si le contenu change).
+
+    Retourne True si le fichier a été écrit.
+    """
+    return write_if_changed(ndjson_path, "".join(json.dumps(doc, ensure_ascii=False) + "\n" for doc in documents))
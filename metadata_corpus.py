@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Corpus en mémoire avec index inversés et API de requêtes
+
+Le corpus est construit une fois depuis `index_complet.json` (ou toute liste
+de documents) ; chaque champ indexé associe ses valeurs à l'ensemble des
+positions des documents qui les portent. Les requêtes se composent avec
+`&` (ET), `|` (OU) et `~` (NON) et se résolvent par opérations sur ces
+ensembles, sans parcourir les documents.
+
+    corpus = Corpus.from_index()
+    avenants_2023 = corpus.select(Term('sources_document', 'avenant_ccn') & Term('annee', 2023))
+    rh_recents = corpus.select(Term('domaines_metier', 'RH') & Range('annee', 2023),
+                               order_by='date_publication', descending=True, limit=10)
+
+`Range` ne s'applique qu'aux champs de `RANGE_KEYS`, comparés numériquement.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from index_reader import INDEX_FILE, iter_documents
+
+
+def _document_year(doc):
+    year = doc.get('classification', {}).get('annee_reference')
+    if isinstance(year, int):
+        return [year]
+    date = doc.get('metadata', {}).get('date_publication', '')
+    if date[:4].isdigit():
+        return [int(date[:4])]
+    return []
+
+
+def _scalar(value):
+    return [value] if value not in (None, '') else []
+
+
+def _values(values):
+    return [value for value in values if value not in (None, '')]
+
+
+# Champ indexé → valeurs portées par un document
+INDEXED_FIELDS = {
+    'document_id': lambda doc: _scalar(doc.get('document_id')),
+    'type_document': lambda doc: _scalar(doc.get('classification', {}).get('type_document')),
+    'sources_document': lambda doc: _scalar(doc.get('classification', {}).get('sources_document')),
+    'categorie_dossier': lambda doc: _scalar(doc.get('classification', {}).get('categorie_dossier')),
+    'domaines_metier': lambda doc: _values(doc.get('classification', {}).get('domaines_metier', [])),
+    'domaine_metier_principal': lambda doc: _scalar(doc.get('classification', {}).get('domaine_metier_principal')),
+    'thematiques': lambda doc: _values(doc.get('classification', {}).get('thematiques', [])),
+    'mots_cles': lambda doc: _values(doc.get('mots_cles', [])),
+    'annee': _document_year,
+    'reference_type': lambda doc: _scalar((doc.get('reference') or {}).get('type')),
+    'reference_numero': lambda doc: _scalar((doc.get('reference') or {}).get('numero')),
+}
+
+def _numero_key(value):
+    """Clé numérique d'un numéro de référence : '2020-1' → (2020, 1), '224' → (224,)."""
+    numbers = re.findall(r'\d+', str(value))
+    return tuple(int(number) for number in numbers) if numbers else None
+
+
+# Champs interrogeables par `Range` → clé de comparaison d'une valeur (ou d'une borne)
+RANGE_KEYS = {
+    'annee': int,
+    'reference_numero': _numero_key,
+}
+
+# Clés de tri nommées pour `Corpus.select(order_by=...)`
+SORT_KEYS = {
+    'document_id': lambda doc: doc.get('document_id', ''),
+    'date_publication': lambda doc: doc.get('metadata', {}).get('date_publication', ''),
+    'titre': lambda doc: doc.get('metadata', {}).get('titre', ''),
+    'annee': lambda doc: (_document_year(doc) or [0])[0],
+    'nb_mots_cles': lambda doc: len(doc.get('mots_cles', [])),
+}
+
+
+class Query:
+    """Requête composable ; `evaluate` retourne un ensemble de positions."""
+
+    def evaluate(self, corpus):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class All(Query):
+    """Tous les documents."""
+
+    def evaluate(self, corpus):
+        return set(range(len(corpus)))
+
+
+class Term(Query):
+    """Documents dont le champ porte la valeur."""
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def evaluate(self, corpus):
+        return set(corpus.index(self.field).get(self.value, ()))
+
+    def __repr__(self):
+        return f"Term({self.field!r}, {self.value!r})"
+
+
+class AnyOf(Query):
+    """Documents dont le champ porte au moins une des valeurs."""
+
+    def __init__(self, field, values):
+        self.field = field
+        self.values = list(values)
+
+    def evaluate(self, corpus):
+        index = corpus.index(self.field)
+        result = set()
+        for value in self.values:
+            result.update(index.get(value, ()))
+        return result
+
+    def __repr__(self):
+        return f"AnyOf({self.field!r}, {self.values!r})"
+
+
+class Range(Query):
+    """Documents dont le champ a une valeur dans [low, high] (bornes optionnelles).
+
+    Valeurs et bornes sont comparées par la clé numérique de `RANGE_KEYS` :
+    `Range('reference_numero', 1, 300)` retient '224' mais pas '2020-1'.
+    """
+
+    def __init__(self, field, low=None, high=None):
+        if field not in RANGE_KEYS:
+            raise ValueError(f"Plage impossible sur le champ non numérique : {field}")
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def evaluate(self, corpus):
+        index = corpus.index(self.field)
+        keys, values = corpus.range_keys(self.field)
+        key = RANGE_KEYS[self.field]
+        start = 0 if self.low is None else bisect_left(keys, key(self.low))
+        stop = len(keys) if self.high is None else bisect_right(keys, key(self.high))
+        result = set()
+        for value in values[start:stop]:
+            result.update(index[value])
+        return result
+
+    def __repr__(self):
+        return f"Range({self.field!r}, {self.low!r}, {self.high!r})"
+
+
+class And(Query):
+    def __init__(self, *queries):
+        self.queries = queries
+
+    def evaluate(self, corpus):
+        # Les ensembles les plus petits d'abord : l'intersection se réduit vite
+        results = sorted((q.evaluate(corpus) for q in self.queries), key=len)
+        if not results:
+            return All().evaluate(corpus)
+        result = results[0]
+        for other in results[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def __repr__(self):
+        return f"And{self.queries!r}"
+
+
+class Or(Query):
+    def __init__(self, *queries):
+        self.queries = queries
+
+    def evaluate(self, corpus):
+        result = set()
+        for query in self.queries:
+            result |= query.evaluate(corpus)
+        return result
+
+    def __repr__(self):
+        return f"Or{self.queries!r}"
+
+
+class Not(Query):
+    def __init__(self, query):
+        self.query = query
+
+    def evaluate(self, corpus):
+        return All().evaluate(corpus) - self.query.evaluate(corpus)
+
+    def __repr__(self):
+        return f"Not({self.query!r})"
+
+
+class Corpus:
+    """Documents en mémoire et index inversés champ → valeur → positions."""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self._indexes = {}
+        self._sorted_values = {}
+        self._range_keys = {}
+        for field, extract in INDEXED_FIELDS.items():
+            index = defaultdict(set)
+            for position, doc in enumerate(self.documents):
+                for value in extract(doc):
+                    index[value].add(position)
+            self._indexes[field] = dict(index)
+
+    @classmethod
+    def from_index(cls, index_path=INDEX_FILE):
+        """Construit le corpus depuis l'index global (NDJSON si disponible)."""
+        return cls(iter_documents(index_path))
+
+    def __len__(self):
+        return len(self.documents)
+
+    def index(self, field):
+        """Index inversé d'un champ : valeur → ensemble de positions."""
+        try:
+            return self._indexes[field]
+        except KeyError:
+            raise ValueError(f"Champ non indexé : {field}") from None
+
+    def sorted_values(self, field):
+        """Valeurs distinctes d'un champ, triées (pour les requêtes par plage)."""
+        if field not in self._sorted_values:
+            self._sorted_values[field] = sorted(self.index(field))
+        return self._sorted_values[field]
+
+    def range_keys(self, field):
+        """(clés de `RANGE_KEYS` triées, valeurs correspondantes) d'un champ numérique.
+
+        Les valeurs sans clé numérique sont ignorées.
+        """
+        if field not in self._range_keys:
+            key = RANGE_KEYS[field]
+            pairs = sorted((key(value), value) for value in self.index(field) if key(value) is not None)
+            self._range_keys[field] = ([k for k, _ in pairs], [value for _, value in pairs])
+        return self._range_keys[field]
+
+    def values(self, field):
+        """Valeurs distinctes d'un champ, triées."""
+        return list(self.sorted_values(field))
+
+    def facets(self, field, query=None):
+        """Nombre de documents par valeur d'un champ, éventuellement restreint à une requête."""
+        positions = None if query is None else query.evaluate(self)
+        counts = {}
+        for value, members in self.index(field).items():
+            count = len(members) if positions is None else len(members & positions)
+            if count:
+                counts[value] = count
+        return counts
+
+    def get(self, document_id):
+        positions = self.index('document_id').get(document_id)
+        return self.documents[min(positions)] if positions else None
+
+    def count(self, query=None):
+        return len(self) if query is None else len(query.evaluate(self))
+
+    def select(self, query=None, order_by=None, descending=False, limit=None):
+        """Documents satisfaisant la requête.
+
+        Sans `order_by`, l'ordre est celui du corpus. `order_by` est un nom de
+        `SORT_KEYS` ou une fonction document → clé ; le tri est stable.
+        """
+        positions = range(len(self)) if query is None else sorted(query.evaluate(self))
+        documents = [self.documents[p] for p in positions]
+        if order_by is not None:
+            key = SORT_KEYS[order_by] if isinstance(order_by, str) else order_by
+            documents.sort(key=key, reverse=descending)
+        if limit is not None:
+            documents = documents[:limit]
+        return documents
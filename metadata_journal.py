@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journal des mises à jour en lot des métadonnées (transactions et retour arrière)
+
+Une `Transaction` s'utilise comme un `atomic_files.BatchWriter` : les
+fichiers modifiés sont préparés dans des fichiers temporaires, et rien n'est
+remplacé si le bloc échoue. Avec le backend SQLite de `metadata_store`,
+`save_many(documents, batch=transaction)` ajoute de même les lignes à la
+transaction au lieu de les écrire. À la validation :
+1. la génération est écrite dans le journal (`_metadata/journal/`) avec,
+   pour chaque fichier, l'empreinte avant/après et un delta inverse par
+   lignes (de quoi reconstruire l'ancienne version depuis la nouvelle), et
+   pour chaque ligne SQLite, le JSON d'avant et l'empreinte d'après ;
+   compressée, elle est marquée « en_cours » ;
+2. les fichiers sont mis en place (`BatchWriter.commit`), puis les lignes
+   écrites en une transaction SQLite ;
+3. la génération est marquée « validee ».
+
+Un arrêt brutal pendant l'étape 2 laisse une génération « en_cours » :
+`recover` (appelé à l'ouverture de chaque transaction) remet les fichiers
+déjà remplacés dans leur état précédent. `rollback` annule de même les
+dernières générations validées, de la plus récente à la plus ancienne.
+Seules les `KEEP_GENERATIONS` dernières générations sont conservées. Les
+numéros de génération ne sont jamais réutilisés, même après un retour
+arrière (dernier numéro attribué conservé dans `journal.json`).
+
+Un fichier ou une ligne modifié depuis la génération (empreinte différente
+de l'état « après ») bloque le retour arrière : rien n'est écrit.
+
+Usage :
+    python3 metadata_journal.py list
+    python3 metadata_journal.py rollback [--generations N]
+    python3 metadata_journal.py recover
+"""
+
+import json
+import gzip
+import hashlib
+import argparse
+import difflib
+from datetime import datetime
+from pathlib import Path
+
+from atomic_files import BatchWriter, atomic_write, dumps_json
+from metadata_store import SqliteMetadataStore, dumps_document
+
+BASE_DIR = Path(__file__).parent
+METADATA_DIR = BASE_DIR / "_metadata"
+JOURNAL_DIR = METADATA_DIR / "journal"
+JOURNAL_FILENAME = "journal.json"
+
+KEEP_GENERATIONS = 5
+
+ETAT_EN_COURS = 'en_cours'
+ETAT_VALIDEE = 'validee'
+
+
+def _digest(data):
+    if data is None:
+        return None
+    return hashlib.sha256(data.encode('utf-8') if isinstance(data, str) else data).hexdigest()
+
+
+def _read(filepath):
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _lines(data):
+    return data.decode('utf-8').splitlines(keepends=True)
+
+
+def reverse_delta(old, new):
+    """Delta inverse par lignes : [début, fin, lignes] à substituer dans `new` pour retrouver `old`."""
+    old_lines = _lines(old)
+    new_lines = _lines(new)
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines)
+    return [
+        [i1, i2, old_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_delta(new, delta):
+    """Reconstruit l'ancienne version à partir de la nouvelle et du delta inverse."""
+    lines = _lines(new)
+    for start, end, replacement in reversed(delta):
+        lines[start:end] = replacement
+    return ''.join(lines).encode('utf-8')
+
+
+class Transaction(BatchWriter):
+    """Lot d'écritures journalisé : validé en une génération, ou abandonné.
+
+    Usage :
+        with Journal().transaction("migration") as transaction:
+            store.save_many(documents, batch=transaction)
+            transaction.write_json(INDEX_FILE, index_data)
+        transaction.generation  # None si rien n'a changé
+    """
+
+    def __init__(self, journal, name):
+        super().__init__()
+        self.journal = journal
+        self.name = name
+        # Chemin → (contenu avant, contenu après), en octets
+        self.changes = {}
+        # Base SQLite → (store, {document_id: (JSON avant, JSON après)})
+        self.rows = {}
+        self.generation = None
+
+    def write(self, filepath, content, fingerprint=None):
+        """Ajoute un fichier à la transaction ; retourne True s'il sera écrit."""
+        filepath = Path(filepath)
+        self.changes.pop(filepath, None)
+        if not super().write(filepath, content, fingerprint):
+            return False
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        self.changes[filepath] = (_read(filepath), data)
+        return True
+
+    def write_rows(self, store, documents):
+        """Ajoute des documents d'un `SqliteMetadataStore` ; retourne le nombre de lignes à écrire."""
+        _, rows = self.rows.setdefault(store.db_path.resolve(), (store, {}))
+        count = 0
+        for document in documents:
+            document_id = document['document_id']
+            old = rows[document_id][0] if document_id in rows else store.load_data(document_id)
+            new = dumps_document(document)
+            if new == old:
+                rows.pop(document_id, None)
+                self.unchanged += 1
+                continue
+            rows[document_id] = (old, new)
+            count += 1
+        return count
+
+    def discard(self, filepath=None):
+        super().discard(filepath)
+        if filepath is None:
+            self.changes.clear()
+            self.rows.clear()
+        else:
+            self.changes.pop(Path(filepath), None)
+
+    def commit(self):
+        """Journalise la génération puis met les fichiers et les lignes en place.
+
+        Retourne le nombre de fichiers et de lignes écrits.
+        """
+        rows = {db_path: entry for db_path, entry in self.rows.items() if entry[1]}
+        self.rows = {}
+        if not self.pending and not rows:
+            return 0
+        files = []
+        for filepath, (old, new) in self.changes.items():
+            files.append({
+                'chemin': self.journal.relative(filepath),
+                'avant': _digest(old),
+                'apres': _digest(new),
+                # Fichier créé par la transaction : supprimé au retour arrière
+                'delta': reverse_delta(old, new) if old is not None else None,
+            })
+        self.changes = {}
+        lines = [
+            {
+                'base': self.journal.relative(db_path),
+                'document_id': document_id,
+                'avant': old,
+                'apres': _digest(new),
+            }
+            for db_path, (_, changes) in rows.items()
+            for document_id, (old, new) in changes.items()
+        ]
+        self.generation = self.journal.begin(self.name, files, lines)
+        written = super().commit()
+        for store, changes in rows.values():
+            written += store.write_data({document_id: new for document_id, (_, new) in changes.items()})
+        self.journal.validate(self.generation)
+        return written
+
+
+class Journal:
+    """Générations de mises à jour, de la plus ancienne à la plus récente."""
+
+    def __init__(self, directory=JOURNAL_DIR, root=BASE_DIR, keep=KEEP_GENERATIONS):
+        self.directory = Path(directory)
+        self.root = Path(root)
+        self.keep = keep
+        self.index_file = self.directory / JOURNAL_FILENAME
+
+    def relative(self, filepath):
+        filepath = Path(filepath).resolve()
+        try:
+            return filepath.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(filepath)
+
+    def absolute(self, chemin):
+        return self.root / chemin
+
+    def _read_index(self):
+        if not self.index_file.exists():
+            return {'generations': [], 'dernier_id': 0}
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        # Journal antérieur au compteur : dernier numéro encore présent
+        index.setdefault('dernier_id', max((entry['id'] for entry in index['generations']), default=0))
+        return index
+
+    def generations(self):
+        return self._read_index()['generations']
+
+    def _save_generations(self, generations, last_id=None):
+        if last_id is None:
+            last_id = self._read_index()['dernier_id']
+        atomic_write(self.index_file, dumps_json({'generations': generations, 'dernier_id': last_id}))
+
+    def _generation_file(self, generation_id):
+        return self.directory / f"generation-{generation_id:06d}.json.gz"
+
+    def _load(self, generation):
+        """Fichiers et lignes SQLite d'une génération."""
+        with open(self._generation_file(generation['id']), 'rb') as f:
+            data = json.loads(gzip.decompress(f.read()))
+        return data['fichiers'], data.get('lignes', [])
+
+    def transaction(self, name):
+        """Nouvelle transaction ; une génération interrompue est d'abord annulée."""
+        self.recover()
+        return Transaction(self, name)
+
+    def begin(self, name, files, lines=()):
+        """Écrit une génération « en_cours » ; retourne son entrée."""
+        index = self._read_index()
+        generations = index['generations']
+        generation = {
+            'id': index['dernier_id'] + 1,
+            'nom': name,
+            'date': datetime.now().isoformat(),
+            'fichiers': len(files),
+            'lignes': len(lines),
+            'etat': ETAT_EN_COURS,
+        }
+        data = json.dumps({'fichiers': files, 'lignes': list(lines)}, ensure_ascii=False).encode('utf-8')
+        atomic_write(self._generation_file(generation['id']), gzip.compress(data, mtime=0))
+        self._save_generations(generations + [generation], generation['id'])
+        return generation
+
+    def validate(self, generation):
+        """Marque une génération validée et supprime les plus anciennes au-delà de `keep`."""
+        generations = self.generations()
+        for entry in generations:
+            if entry['id'] == generation['id']:
+                entry['etat'] = generation['etat'] = ETAT_VALIDEE
+        validated = [entry for entry in generations if entry['etat'] == ETAT_VALIDEE]
+        expired = validated[:max(len(validated) - self.keep, 0)]
+        expired_ids = {entry['id'] for entry in expired}
+        self._save_generations([entry for entry in generations if entry['id'] not in expired_ids])
+        for entry in expired:
+            self._generation_file(entry['id']).unlink(missing_ok=True)
+
+    def _undo(self, generation):
+        """Remet les fichiers et les lignes d'une génération dans leur état précédent."""
+        files, lines = self._load(generation)
+        restore = []
+        conflicts = []
+        for entry in files:
+            filepath = self.absolute(entry['chemin'])
+            current = _read(filepath)
+            digest = _digest(current)
+            if digest == entry['avant']:
+                continue  # Pas (encore) remplacé
+            if digest != entry['apres']:
+                conflicts.append(entry['chemin'])
+                continue
+            old = apply_delta(current, entry['delta']) if entry['delta'] is not None else None
+            restore.append((filepath, old))
+
+        stores = {}
+        restore_rows = {}
+        try:
+            for entry in lines:
+                if entry['base'] not in stores:
+                    stores[entry['base']] = SqliteMetadataStore(self.absolute(entry['base']))
+                    restore_rows[entry['base']] = {}
+                digest = _digest(stores[entry['base']].load_data(entry['document_id']))
+                if digest == _digest(entry['avant']):
+                    continue  # Pas (encore) écrite
+                if digest != entry['apres']:
+                    conflicts.append(f"{entry['base']}:{entry['document_id']}")
+                    continue
+                restore_rows[entry['base']][entry['document_id']] = entry['avant']
+            if conflicts:
+                raise RuntimeError(
+                    f"Génération {generation['id']} : fichiers ou lignes modifiés depuis, "
+                    "retour arrière impossible : " + ", ".join(conflicts)
+                )
+
+            with BatchWriter() as batch:
+                for filepath, old in restore:
+                    if old is not None:
+                        batch.write(filepath, old)
+            for filepath, old in restore:
+                if old is None:
+                    filepath.unlink()
+            for base, rows in restore_rows.items():
+                stores[base].write_data(rows)
+        finally:
+            for store in stores.values():
+                store.close()
+
+        generations = [entry for entry in self.generations() if entry['id'] != generation['id']]
+        self._save_generations(generations)
+        self._generation_file(generation['id']).unlink(missing_ok=True)
+        return len(restore) + sum(len(rows) for rows in restore_rows.values())
+
+    def recover(self):
+        """Annule les générations interrompues ; retourne le nombre de fichiers restaurés."""
+        restored = 0
+        for generation in reversed(self.generations()):
+            if generation['etat'] == ETAT_EN_COURS:
+                restored += self._undo(generation)
+        return restored
+
+    def rollback(self, count=1):
+        """Annule les `count` dernières générations validées ; retourne les générations annulées."""
+        self.recover()
+        validated = [entry for entry in self.generations() if entry['etat'] == ETAT_VALIDEE]
+        if count > len(validated):
+            raise ValueError(f"Seulement {len(validated)} génération(s) conservée(s)")
+        undone = []
+        for generation in reversed(validated[len(validated) - count:]):
+            self._undo(generation)
+            undone.append(generation)
+        return undone
+
+    def size(self, generation):
+        path = self._generation_file(generation['id'])
+        return path.stat().st_size if path.exists() else 0
+
+
+def describe(generation):
+    """Contenu d'une génération, pour l'affichage."""
+    text = f"{generation['fichiers']} fichiers"
+    if generation.get('lignes'):
+        text += f", {generation['lignes']} lignes SQLite"
+    return text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Journal des mises à jour des métadonnées.")
+    parser.add_argument('action', choices=['list', 'rollback', 'recover'])
+    parser.add_argument('--generations', type=int, default=1,
+                        help="Nombre de générations à annuler (rollback, défaut : 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    journal = Journal()
+
+    if args.action == 'list':
+        generations = journal.generations()
+        if not generations:
+            print("Aucune génération dans le journal")
+        for generation in generations:
+            print(f"  {generation['id']:4}  {generation['date'][:19]}  {generation['nom']:32} "
+                  f"{describe(generation)}, {journal.size(generation) / 1024:.0f} Ko "
+                  f"({generation['etat']})")
+    elif args.action == 'recover':
+        restored = journal.recover()
+        print(f"{restored} fichiers ou lignes restaurés")
+    else:
+        for generation in journal.rollback(args.generations):
+            print(f"Génération {generation['id']} ({generation['nom']}) annulée : "
+                  f"{describe(generation)} restaurés")
+
+
+if __name__ == "__main__":
+    main()
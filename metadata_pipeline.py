@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chaîne de corrections des métadonnées en une passe
+
+Chaque correction des scripts `fix_*.py`, `final_quality_fixes.py` et
+`remove_questions_typiques.py` est une transformation enregistrée
+(`@register`) qui modifie un document en mémoire et retourne True si elle
+l'a changé.
+
+`run_pipeline` charge tous les documents une fois (`metadata_store`),
+applique à chacun les transformations choisies dans l'ordre déclaré, puis
+n'écrit qu'une fois les seuls documents réellement modifiés.
+
+Un script de correction lancé seul n'exécute que ses propres
+transformations ; ce module les enchaîne toutes (ou une sélection).
+
+Usage :
+    python3 metadata_pipeline.py --list
+    python3 metadata_pipeline.py                       # toutes, dans l'ordre
+    python3 metadata_pipeline.py dates_2025 dates_contexte
+    python3 metadata_pipeline.py --dry-run
+"""
+
+import json
+import argparse
+import importlib
+from collections import Counter, defaultdict, namedtuple
+
+from metadata_store import open_store
+
+# Une transformation : `func(metadata, context)` → True si le document a changé ;
+# `prepare(context)` (facultatif) est appelé une fois, tous les documents chargés.
+Transform = namedtuple('Transform', ['name', 'func', 'description', 'prepare'])
+
+TRANSFORMS = {}
+
+# Modules déclarant des transformations, dans l'ordre historique d'exécution
+TRANSFORM_MODULES = [
+    'fix_quality_issues',
+    'fix_remaining_dates',
+    'fix_3digit_filinfos',
+    'fix_2025_dates',
+    'fix_final_dates',
+    'fix_classifications',
+    'fix_remaining_warnings',
+    'final_quality_fixes',
+    'remove_questions_typiques',
+]
+
+
+def register(name, description=None, prepare=None):
+    """Décorateur : enregistre une transformation sous `name`."""
+    def decorator(func):
+        summary = description or (func.__doc__ or "").strip().split("\n")[0]
+        # Réenregistrer un nom remplace la transformation sans changer sa place
+        TRANSFORMS[name] = Transform(name, func, summary, prepare)
+        return func
+    return decorator
+
+
+def load_transforms():
+    """Importe les modules de correction (ce qui enregistre leurs transformations)."""
+    for module in TRANSFORM_MODULES:
+        importlib.import_module(module)
+    return TRANSFORMS
+
+
+def select_transforms(names=None):
+    """Transformations à appliquer, dans l'ordre d'enregistrement."""
+    if not names:
+        return list(TRANSFORMS.values())
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Transformation(s) inconnue(s) : {', '.join(unknown)}")
+    return [transform for transform in TRANSFORMS.values() if transform.name in names]
+
+
+class PipelineContext:
+    """État partagé d'une exécution de la chaîne.
+
+    Les fonctions `prepare` peuvent y ajouter leurs propres attributs
+    (index calculés sur l'ensemble des documents).
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.by_id = {metadata['document_id']: metadata for metadata in documents}
+        # Documents modifiés par transformation
+        self.applied = Counter()
+        # Compteurs et listes libres des transformations (rapports des scripts)
+        self.counts = Counter()
+        self.report = defaultdict(list)
+        self.changed = []
+
+
+def _snapshot(metadata):
+    return json.dumps(metadata, ensure_ascii=False, sort_keys=True)
+
+
+def run_pipeline(names=None, dry_run=False):
+    """Charge les documents, applique les transformations, écrit les documents modifiés.
+
+    Retourne le `PipelineContext` de l'exécution.
+    """
+    transforms = select_transforms(names)
+
+    with open_store() as store:
+        context = PipelineContext(store.load_all())
+
+        for transform in transforms:
+            if transform.prepare is not None:
+                transform.prepare(context)
+
+        for metadata in context.documents:
+            before = _snapshot(metadata)
+            for transform in transforms:
+                if transform.func(metadata, context):
+                    context.applied[transform.name] += 1
+            if _snapshot(metadata) != before:
+                context.changed.append(metadata)
+
+        if not dry_run:
+            store.save_many(context.changed)
+
+    return context
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Corrections des métadonnées en une passe.")
+    parser.add_argument('transforms', nargs='*', help="Transformations à appliquer (défaut : toutes)")
+    parser.add_argument('--list', action='store_true', help="Lister les transformations disponibles")
+    parser.add_argument('--dry-run', action='store_true', help="Ne rien écrire")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_transforms()
+
+    if args.list:
+        for transform in TRANSFORMS.values():
+            print(f"  {transform.name:32} {transform.description}")
+        return
+
+    context = run_pipeline(args.transforms, dry_run=args.dry_run)
+
+    print()
+    print("=" * 60)
+    print("RÉSUMÉ")
+    print("=" * 60)
+    for transform in select_transforms(args.transforms):
+        print(f"  {transform.name:32} {context.applied[transform.name]} documents")
+    action = "à modifier (--dry-run)" if args.dry_run else "écrits"
+    print(f"Documents {action} : {len(context.changed)} sur {len(context.documents)}")
+
+
+if __name__ == "__main__":
+    # Le registre partagé est celui du module importé par les scripts de correction
+    from metadata_pipeline import main
+    main()
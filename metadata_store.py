@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage des métadonnées documentaires
+
+Deux backends exposent la même API (`load`, `load_all`, `iter_documents`,
+`save`, `save_many`, `delete`, `ids`) :
+
+- `json`   : un fichier `<document_id>.metadata.json` par document dans
+             `_metadata/documents/` (format historique) ;
+- `sqlite` : une base `_metadata/metadata.sqlite`, une ligne par document
+             (JSON complet) avec colonnes indexées pour les filtres courants.
+
+Les fichiers JSON restent le format d'échange : `import` alimente la base
+depuis les fichiers, `export` régénère les fichiers depuis la base.
+
+Le backend par défaut est choisi par la variable d'environnement
+`BIBLE_METADATA_BACKEND` (`json` si absente).
+
+Usage :
+    python3 metadata_store.py import   # JSON → SQLite
+    python3 metadata_store.py export   # SQLite → JSON
+    python3 metadata_store.py stats    # répartition par colonne indexée
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+from atomic_files import BatchWriter
+
+BASE_DIR = Path(__file__).parent
+METADATA_DIR = BASE_DIR / "_metadata"
+DOCS_METADATA_DIR = METADATA_DIR / "documents"
+SQLITE_FILE = METADATA_DIR / "metadata.sqlite"
+
+BACKEND_ENV_VAR = "BIBLE_METADATA_BACKEND"
+DEFAULT_BACKEND = "json"
+
+# Colonnes indexées → champ de `classification` correspondant
+INDEXED_FIELDS = (
+    'type_document',
+    'sources_document',
+    'domaine_metier_principal',
+    'annee_reference',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    type_document TEXT,
+    sources_document TEXT,
+    domaine_metier_principal TEXT,
+    annee_reference INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_type_document ON documents(type_document);
+CREATE INDEX IF NOT EXISTS idx_documents_sources_document ON documents(sources_document);
+CREATE INDEX IF NOT EXISTS idx_documents_domaine_metier_principal ON documents(domaine_metier_principal);
+CREATE INDEX IF NOT EXISTS idx_documents_annee_reference ON documents(annee_reference);
+"""
+
+
+def indexed_values(document):
+    """Valeurs des colonnes indexées d'un document (None si absentes)."""
+    classification = document.get('classification', {})
+    return {field: classification.get(field) for field in INDEXED_FIELDS}
+
+
+def dumps_document(document):
+    """JSON d'un document tel que stocké dans la base SQLite."""
+    return json.dumps(document, ensure_ascii=False)
+
+
+def check_filters(filters):
+    """Vérifie que les filtres portent sur des colonnes indexées."""
+    unknown = set(filters) - set(INDEXED_FIELDS)
+    if unknown:
+        raise ValueError(f"Filtre(s) non indexé(s) : {', '.join(sorted(unknown))}")
+
+
+def matches_filters(document, filters):
+    """Vrai si le document satisfait les filtres (valeur ou liste de valeurs)."""
+    values = indexed_values(document)
+    for field, expected in filters.items():
+        if isinstance(expected, (list, tuple, set, frozenset)):
+            if values[field] not in expected:
+                return False
+        elif values[field] != expected:
+            return False
+    return True
+
+
+class JsonMetadataStore:
+    """Un fichier JSON par document (format historique)."""
+
+    backend = 'json'
+
+    def __init__(self, docs_dir=DOCS_METADATA_DIR):
+        self.docs_dir = Path(docs_dir)
+
+    def path_for(self, document_id):
+        return self.docs_dir / f"{document_id}.metadata.json"
+
+    def ids(self):
+        suffix = ".metadata.json"
+        return [p.name[:-len(suffix)] for p in self.docs_dir.glob(f"*{suffix}")]
+
+    def count(self, **filters):
+        """Nombre de documents ; les filtres imposent de parser chaque fichier."""
+        if not filters:
+            return len(self.ids())
+        return sum(1 for _ in self.iter_documents(**filters))
+
+    def load(self, document_id):
+        """Charge un document, ou None s'il n'existe pas."""
+        filepath = self.path_for(document_id)
+        if not filepath.exists():
+            return None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iter_documents(self, **filters):
+        """Itère les documents ; les filtres imposent de parser chaque fichier."""
+        check_filters(filters)
+        for meta_file in self.docs_dir.glob("*.metadata.json"):
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if not filters or matches_filters(document, filters):
+                yield document
+
+    def load_all(self, **filters):
+        return list(self.iter_documents(**filters))
+
+    def save(self, document):
+        self.save_many([document])
+
+    def save_many(self, documents, batch=None):
+        """Écrit les documents modifiés en un lot atomique ; retourne le nombre de fichiers écrits.
+
+        Un document identique au fichier existant n'est pas réécrit. Avec
+        `batch` (un `BatchWriter` ou une `metadata_journal.Transaction`), les
+        documents sont ajoutés à ce lot, validé par l'appelant ; le nombre
+        retourné est alors celui des documents à écrire.
+        """
+        if batch is not None:
+            return sum(batch.write_json(self.path_for(document['document_id']), document)
+                       for document in documents)
+        with BatchWriter() as batch:
+            for document in documents:
+                batch.write_json(self.path_for(document['document_id']), document)
+        return batch.written
+
+    def delete(self, document_id):
+        """Supprime un document ; retourne True s'il existait."""
+        filepath = self.path_for(document_id)
+        if filepath.exists():
+            filepath.unlink()
+            return True
+        return False
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SqliteMetadataStore:
+    """Base SQLite locale, une ligne par document."""
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path=SQLITE_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _where(filters):
+        check_filters(filters)
+        clauses = []
+        params = []
+        for field, expected in filters.items():
+            if isinstance(expected, (list, tuple, set, frozenset)):
+                expected = list(expected)
+                clauses.append(f"{field} IN ({', '.join('?' * len(expected))})")
+                params.extend(expected)
+            elif expected is None:
+                clauses.append(f"{field} IS NULL")
+            else:
+                clauses.append(f"{field} = ?")
+                params.append(expected)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def ids(self):
+        return [row[0] for row in self.conn.execute("SELECT document_id FROM documents ORDER BY rowid")]
+
+    def count(self, **filters):
+        where, params = self._where(filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM documents{where}", params).fetchone()[0]
+
+    def load(self, document_id):
+        data = self.load_data(document_id)
+        return json.loads(data) if data is not None else None
+
+    def iter_documents(self, **filters):
+        """Itère les documents (ordre d'insertion) ; filtres résolus par index."""
+        where, params = self._where(filters)
+        for (data,) in self.conn.execute(f"SELECT data FROM documents{where} ORDER BY rowid", params):
+            yield json.loads(data)
+
+    def load_all(self, **filters):
+        return list(self.iter_documents(**filters))
+
+    def save(self, document):
+        self.save_many([document])
+
+    def save_many(self, documents, batch=None):
+        """Écrit les documents dans une seule transaction.
+
+        Avec une `metadata_journal.Transaction`, les lignes sont ajoutées à la
+        génération et écrites à sa validation (retour arrière possible) ; le
+        nombre retourné est celui des documents à écrire. Un simple
+        `BatchWriter` est ignoré : la transaction SQLite tient lieu de lot.
+        """
+        if batch is not None and hasattr(batch, 'write_rows'):
+            return batch.write_rows(self, documents)
+        rows = [self._row(document, dumps_document(document)) for document in documents]
+        self._write_rows(rows)
+        return len(rows)
+
+    def load_data(self, document_id):
+        """JSON tel que stocké pour un document, ou None."""
+        row = self.conn.execute(
+            "SELECT data FROM documents WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def write_data(self, data_by_id):
+        """Écrit (ou supprime si None) le JSON de chaque document, en une transaction.
+
+        Retourne le nombre de lignes traitées.
+        """
+        rows = []
+        deleted = []
+        for document_id, data in data_by_id.items():
+            if data is None:
+                deleted.append(document_id)
+            else:
+                rows.append(self._row(json.loads(data), data))
+        self._write_rows(rows, deleted)
+        return len(rows) + len(deleted)
+
+    @staticmethod
+    def _row(document, data):
+        values = indexed_values(document)
+        return (document['document_id'], *(values[field] for field in INDEXED_FIELDS), data)
+
+    def _write_rows(self, rows, deleted=()):
+        with self.conn:
+            self.conn.executemany(
+                f"""INSERT INTO documents (document_id, {', '.join(INDEXED_FIELDS)}, data)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(document_id) DO UPDATE SET
+                    {', '.join(f'{f} = excluded.{f}' for f in INDEXED_FIELDS)},
+                    data = excluded.data""",
+                rows,
+            )
+            self.conn.executemany("DELETE FROM documents WHERE document_id = ?",
+                                  [(document_id,) for document_id in deleted])
+
+    def delete(self, document_id):
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+        return cursor.rowcount > 0
+
+    def distinct_counts(self, field):
+        """Nombre de documents par valeur d'une colonne indexée."""
+        check_filters({field: None})
+        return dict(self.conn.execute(
+            f"SELECT {field}, COUNT(*) FROM documents GROUP BY {field} ORDER BY COUNT(*) DESC"
+        ))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(backend=None, path=None):
+    """Ouvre le backend demandé (ou celui de BIBLE_METADATA_BACKEND)."""
+    backend = backend or os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND)
+    if backend == 'json':
+        return JsonMetadataStore(path or DOCS_METADATA_DIR)
+    if backend == 'sqlite':
+        return SqliteMetadataStore(path or SQLITE_FILE)
+    raise ValueError(f"Backend de métadonnées inconnu : {backend}")
+
+
+def import_json(store, docs_dir=DOCS_METADATA_DIR):
+    """Importe les fichiers JSON dans un store ; retourne le nombre de documents."""
+    return store.save_many(JsonMetadataStore(docs_dir).iter_documents())
+
+
+def export_json(store, docs_dir=DOCS_METADATA_DIR):
+    """Exporte un store vers des fichiers JSON ; retourne le nombre de documents."""
+    return JsonMetadataStore(docs_dir).save_many(store.iter_documents())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import/export du stockage SQLite des métadonnées.")
+    parser.add_argument('action', choices=['import', 'export', 'stats'])
+    parser.add_argument('--db', type=Path, default=SQLITE_FILE,
+                        help="Base SQLite (défaut : _metadata/metadata.sqlite)")
+    parser.add_argument('--docs-dir', type=Path, default=DOCS_METADATA_DIR,
+                        help="Dossier des fichiers .metadata.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with SqliteMetadataStore(args.db) as store:
+        if args.action == 'import':
+            count = import_json(store, args.docs_dir)
+            print(f"{count} documents importés dans {args.db}")
+        elif args.action == 'export':
+            count = export_json(store, args.docs_dir)
+            print(f"{count} documents exportés vers {args.docs_dir}")
+        else:
+            print(f"{store.count()} documents dans {args.db}")
+            for field in INDEXED_FIELDS:
+                print()
+                print(f"{field} :")
+                for value, count in store.distinct_counts(field).items():
+                    print(f"  {value}: {count}")
+
+
+if __name__ == "__main__":
+    main()
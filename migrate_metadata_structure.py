@@ -13,9 +13,15 @@ Transforme l'ancienne structure vers la nouvelle :
 
 import os
 import json
+from datetime import datetime
 from pathlib import Path
 from collections import Counter
 
+from atomic_files import write_json_if_changed
+from index_reader import ndjson_path_for, write_ndjson
+from metadata_journal import Journal, describe
+from metadata_store import open_store
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 METADATA_DIR = BASE_DIR / "_metadata"
@@ -45,9 +51,11 @@ REMOVED_DOMAINS = {'IMMOBILIER', 'PROCEDURE', 'FISCAL_SUCCESSION'}
 def extract_thematiques(metadata):
     """
     Extrait les thématiques du vocabulaire_specifique
+    (par poids TF-IDF décroissant si `term_weights.py apply` l'a pondéré)
     """
     thematiques = []
-    vocab = metadata.get('vocabulaire_specifique', [])
+    vocab = sorted(metadata.get('vocabulaire_specifique', []),
+                   key=lambda item: item.get('poids', 0), reverse=True)
 
     for item in vocab:
         terme = item.get('terme', '')
@@ -60,13 +68,11 @@ def extract_thematiques(metadata):
     return thematiques[:10]  # Max 10 thématiques
 
 
-def migrate_metadata_file(filepath):
+def migrate_metadata(metadata):
     """
-    Migre un fichier metadata.json vers la nouvelle structure
+    Migre les métadonnées d'un document vers la nouvelle structure
+    (modifiées en place, sauvegarde à la charge de l'appelant)
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-
     classification = metadata.get('classification', {})
 
     # 1. Sauvegarder l'ancien type_document comme sources_document
@@ -111,10 +117,6 @@ def migrate_metadata_file(filepath):
     classification.pop('categories_metier', None)
     classification.pop('categorie_metier_principale', None)
 
-    # Sauvegarder
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
     return {
         'document_id': metadata.get('document_id', ''),
         'old_type': old_type,
@@ -127,20 +129,25 @@ def migrate_metadata_file(filepath):
     }
 
 
-def migrate_index_complet():
+def migrate_index_complet(batch=None):
     """
     Migre l'index complet
+
+    Avec `batch` (transaction de `main`), l'index JSON est ajouté au lot et la
+    variante NDJSON n'est pas écrite : elle l'est après validation. Retourne
+    les documents migrés, ou None si l'index est absent ou inchangé.
     """
     if not INDEX_FILE.exists():
         print(f"⚠️  Index complet non trouvé : {INDEX_FILE}")
-        return
+        return None
 
     print(f"\n📄 Migration de l'index complet...")
 
+    # Index modifié en place : les autres clés de premier niveau sont conservées
     with open(INDEX_FILE, 'r', encoding='utf-8') as f:
         index_data = json.load(f)
-
     documents = index_data.get('documents', [])
+    before = json.dumps(documents, sort_keys=True)
     migrated_count = 0
 
     for doc in documents:
@@ -186,11 +193,21 @@ def migrate_index_complet():
 
         migrated_count += 1
 
-    # Sauvegarder l'index mis à jour
-    with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
+    if json.dumps(documents, sort_keys=True) == before:
+        print(f"✅ Index complet déjà à jour : {migrated_count} documents")
+        return None
+
+    # Sauvegarder l'index mis à jour (JSON puis variante NDJSON)
+    index_data['total_documents'] = len(documents)
+    index_data['generated_at'] = datetime.now().isoformat()
+    if batch is not None:
+        batch.write_json(INDEX_FILE, index_data)
+    else:
+        write_json_if_changed(INDEX_FILE, index_data)
+        write_ndjson(documents, ndjson_path_for(INDEX_FILE))
 
     print(f"✅ Index complet migré : {migrated_count} documents")
+    return documents
 
 
 def generate_migration_report(results):
@@ -254,23 +271,38 @@ def main():
     print(f"\n🚀 Démarrage de la migration des métadonnées...")
     print(f"📁 Répertoire metadata : {DOCS_METADATA_DIR}")
 
-    # Lister tous les fichiers metadata.json
-    metadata_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    print(f"📄 {len(metadata_files)} fichiers metadata trouvés\n")
+    # Documents et index validés ensemble en une génération du journal,
+    # ou laissés intacts si la migration échoue
+    with open_store() as store, Journal().transaction("migrate_metadata_structure") as transaction:
+        documents = store.load_all()
+        print(f"📄 {len(documents)} fichiers metadata trouvés\n")
+
+        # Migrer tous les documents
+        results = []
+        for i, metadata in enumerate(documents, 1):
+            if i % 50 == 0:
+                print(f"  Traitement en cours : {i}/{len(documents)}...")
 
-    # Migrer tous les fichiers
-    results = []
-    for i, filepath in enumerate(metadata_files, 1):
-        if i % 50 == 0:
-            print(f"  Traitement en cours : {i}/{len(metadata_files)}...")
+            result = migrate_metadata(metadata)
+            results.append(result)
 
-        result = migrate_metadata_file(filepath)
-        results.append(result)
+        # Sauvegarder en une seule passe (une transaction avec le backend SQLite)
+        store.save_many(documents, batch=transaction)
+
+        # Migrer l'index complet
+        index_documents = migrate_index_complet(batch=transaction)
 
     print(f"\n✅ {len(results)} fichiers migrés")
 
-    # Migrer l'index complet
-    migrate_index_complet()
+    # Variante NDJSON, une fois l'index validé (après un retour arrière, elle
+    # est plus ancienne que l'index et donc ignorée par index_reader)
+    if index_documents is not None:
+        write_ndjson(index_documents, ndjson_path_for(INDEX_FILE))
+
+    if transaction.generation is not None:
+        print(f"🗂️  Génération {transaction.generation['id']} journalisée "
+              f"({describe(transaction.generation)}) — "
+              f"annulation : python3 metadata_journal.py rollback")
 
     # Générer le rapport
     generate_migration_report(results)
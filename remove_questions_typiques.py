@@ -9,6 +9,9 @@ import os
 import json
 from pathlib import Path
 
+from atomic_files import write_json_if_changed
+from metadata_pipeline import register, run_pipeline
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 METADATA_DIR = BASE_DIR / "_metadata"
@@ -16,21 +19,13 @@ DOCS_METADATA_DIR = METADATA_DIR / "documents"
 INDEX_FILE = METADATA_DIR / "index_complet.json"
 
 
-def remove_questions_from_metadata_file(filepath):
+@register('suppression_questions_typiques')
+def remove_questions(metadata, context):
     """
-    Supprime le champ questions_typiques d'un fichier metadata.json
+    Supprime le champ questions_typiques d'un document
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-
-    # Supprimer le champ questions_typiques s'il existe
     if 'questions_typiques' in metadata:
         del metadata['questions_typiques']
-
-        # Sauvegarder
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
-
         return True
 
     return False
@@ -43,18 +38,10 @@ def main():
     print(f"\n🚀 Suppression des questions_typiques génériques...")
     print(f"📁 Répertoire metadata : {DOCS_METADATA_DIR}")
 
-    # Lister tous les fichiers metadata.json
-    metadata_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    print(f"📄 {len(metadata_files)} fichiers metadata trouvés\n")
-
-    # Supprimer questions_typiques de tous les fichiers
-    removed_count = 0
-    for i, filepath in enumerate(metadata_files, 1):
-        if i % 50 == 0:
-            print(f"  Traitement en cours : {i}/{len(metadata_files)}...")
-
-        if remove_questions_from_metadata_file(filepath):
-            removed_count += 1
+    # Supprimer questions_typiques de tous les documents (chargés et écrits une fois)
+    context = run_pipeline(['suppression_questions_typiques'])
+    print(f"📄 {len(context.documents)} fichiers metadata trouvés\n")
+    removed_count = context.applied['suppression_questions_typiques']
 
     print(f"\n✅ {removed_count} fichiers modifiés (champ questions_typiques supprimé)")
 
@@ -72,8 +59,7 @@ def main():
                 modified_index_count += 1
 
         # Sauvegarder l'index mis à jour
-        with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        write_json_if_changed(INDEX_FILE, index_data)
 
         print(f"✅ Index complet mis à jour : {modified_index_count} documents modifiés")
         print(f"   Fichier : {INDEX_FILE}")
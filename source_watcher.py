@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Surveillance d'une arborescence de fichiers sources
+
+Deux implémentations exposent `wait(timeout)` et `close()` :
+
+- `InotifyWatcher` : inotify (Linux) via ctypes, surveillance récursive,
+  sans dépendance externe ;
+- `PollingWatcher` : comparaison périodique (taille, mtime) de l'arborescence,
+  portable.
+
+`wait` retourne l'ensemble des chemins absolus modifiés (vide si le délai
+expire), ou None lorsqu'un rescan complet est nécessaire (débordement de la
+file inotify). `iter_change_batches` regroupe les rafales d'événements
+(copie d'un dossier entier, synchronisation…) en un seul lot.
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Constantes inotify (linux/inotify.h)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def merge_changes(pending, changes):
+    """Fusionne deux lots de changements (None = rescan complet)."""
+    if pending is None or changes is None:
+        return None
+    pending.update(changes)
+    return pending
+
+
+class InotifyWatcher:
+    """Surveillance récursive par inotify."""
+
+    name = 'inotify'
+
+    def __init__(self, root):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc introuvable")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify non disponible")
+        self.root = Path(root)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs = {}
+        self._add_tree(self.root)
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch {directory}")
+        self._dirs[wd] = Path(directory)
+
+    def _add_tree(self, directory):
+        """Surveille un dossier et ses sous-dossiers ; retourne les fichiers déjà présents."""
+        found = set()
+        for root, dirs, files in os.walk(directory):
+            self._add_watch(root)
+            found.update(Path(root) / filename for filename in files)
+        return found
+
+    def _remove_tree(self, directory):
+        for wd, path in list(self._dirs.items()):
+            if path == directory or directory in path.parents:
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+
+    def _read_events(self):
+        changes = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changes
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = directory / name if name else directory
+
+            if mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    # Dossier déplacé : ses surveillances pointeraient vers l'ancien chemin
+                    self._remove_tree(path)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Nouveau dossier : le surveiller et prendre en compte son contenu
+                    changes.update(self._add_tree(path))
+                changes.add(path)
+            elif mask & IN_CREATE:
+                # Fichier en cours d'écriture : attendre IN_CLOSE_WRITE
+                continue
+            else:
+                changes.add(path)
+        return changes
+
+    def wait(self, timeout=None):
+        """Attend des changements ; retourne un ensemble vide si le délai expire."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            changes = self._read_events()
+            if changes is None or changes:
+                return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Surveillance par comparaison périodique de l'arborescence."""
+
+    name = 'polling'
+
+    def __init__(self, root, interval=DEFAULT_POLL_INTERVAL):
+        self.root = Path(root)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        stack = [str(self.root)]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except FileNotFoundError:
+                        continue
+        return snapshot
+
+    def poll(self):
+        """Compare l'arborescence au dernier relevé ; retourne les chemins modifiés."""
+        snapshot = self._scan()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        changes = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changes.update(path for path in previous if path not in snapshot)
+        return {Path(path) for path in changes}
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            changes = self.poll()
+            if changes:
+                return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, polling=False, interval=DEFAULT_POLL_INTERVAL):
+    """inotify si disponible, sinon scrutation périodique."""
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval)
+
+
+def iter_change_batches(watcher, debounce=DEFAULT_DEBOUNCE):
+    """Génère des lots de changements séparés par au moins `debounce` secondes de calme."""
+    while True:
+        pending = watcher.wait()
+        while True:
+            changes = watcher.wait(debounce)
+            if changes is not None and not changes:
+                break
+            pending = merge_changes(pending, changes)
+        yield pending
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recherche multi-termes en une passe (automate d'Aho-Corasick)
+
+Les termes et synonymes sont compilés une fois dans un automate ; le texte
+est ensuite parcouru une seule fois, quel que soit le nombre de termes.
+
+La comparaison se fait sur un texte « replié » :
+- casse et accents ignorés (« Prévoyance » = « prevoyance ») ;
+- apostrophes typographiques ramenées à « ' » ;
+- suites d'espaces (retours à la ligne compris) réduites à une espace.
+
+Seules les occurrences de mots entiers sont retenues (« minute » ne
+correspond pas dans « minuterie »), un pluriel en -s ou -x étant accepté.
+"""
+
+import unicodedata
+from collections import Counter
+
+APOSTROPHES = "’‘`ʼ"
+PLURAL_SUFFIXES = "sx"
+
+_FOLDED_CHARS = {}
+
+
+def fold_char(char):
+    """Forme repliée d'un caractère (peut être vide ou en compter plusieurs)."""
+    folded = _FOLDED_CHARS.get(char)
+    if folded is None:
+        if char.isspace():
+            folded = " "
+        elif char in APOSTROPHES:
+            folded = "'"
+        else:
+            decomposed = unicodedata.normalize('NFKD', char.casefold())
+            folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+        _FOLDED_CHARS[char] = folded
+    return folded
+
+
+def fold_text(text):
+    """Replie un texte ; retourne (texte replié, position d'origine de chaque caractère replié)."""
+    chars = []
+    positions = []
+    previous_space = True
+    for position, char in enumerate(text):
+        folded = fold_char(char)
+        if folded == " ":
+            if previous_space:
+                continue
+            previous_space = True
+        elif folded:
+            previous_space = False
+        for c in folded:
+            chars.append(c)
+            positions.append(position)
+    return "".join(chars), positions
+
+
+def fold(text):
+    """Texte replié seul (pour les motifs)."""
+    return fold_text(text)[0].strip()
+
+
+class TermMatcher:
+    """Automate d'Aho-Corasick sur des motifs repliés.
+
+    `patterns` est une suite de couples (clé, expression) ; plusieurs clés
+    peuvent partager la même expression.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for key, phrase in patterns:
+            folded = fold(phrase)
+            if not folded:
+                continue
+            state = 0
+            for char in folded:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((key, len(folded)))
+
+        # Liens d'échec en largeur ; les sorties héritent de celles du suffixe
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    @staticmethod
+    def _is_word_end(folded, end):
+        if end >= len(folded) or not folded[end].isalnum():
+            return True
+        # Pluriel : « avenants », « travaux »
+        return folded[end] in PLURAL_SUFFIXES and (end + 1 >= len(folded) or not folded[end + 1].isalnum())
+
+    def finditer(self, text):
+        """Génère (clé, début, fin) pour chaque occurrence, positions dans `text`."""
+        folded, positions = fold_text(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for index, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for key, length in outputs[state]:
+                start = index - length + 1
+                if start > 0 and folded[start - 1].isalnum():
+                    continue
+                if not self._is_word_end(folded, index + 1):
+                    continue
+                yield key, positions[start], positions[index] + 1
+
+    def counts(self, text):
+        """Nombre d'occurrences par clé."""
+        return Counter(key for key, _, _ in self.finditer(text))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matrice documents × termes et pondération TF-IDF du vocabulaire notarial
+
+Les occurrences des termes de la terminologie (`enrich_metadata.TERMINOLOGY`,
+synonymes compris) sont comptées sur le texte intégral du corpus
+(`corpus_store.py build`), puis pondérées en TF-IDF :
+- tf  = 1 + log(occurrences) ;
+- idf = log((1 + N) / (1 + nombre de documents contenant le terme)) + 1 ;
+- chaque ligne (document) est normalisée (norme euclidienne).
+
+Un terme présent partout pèse peu ; un terme fréquent dans un document et
+rare ailleurs pèse beaucoup. Les poids sont calculés en une fois pour tout
+le corpus, avec NumPy (et SciPy pour `to_sparse`) si disponibles, en
+Python pur sinon.
+
+La matrice de comptage est conservée au format CSR dans
+`_metadata/corpus/term_matrix.json` (lisible sans NumPy).
+
+`apply` reclasse ensuite, pour chaque document, `vocabulaire_specifique`
+(les 10 termes de plus fort poids, champ « poids »),
+`classification.thematiques` et `mots_cles` (les mots-clés qui sont des
+termes pondérés d'abord, par poids décroissant ; les autres ensuite, dans
+leur ordre), à lancer après `enrich_metadata.py`.
+
+Usage :
+    python3 term_weights.py build
+    python3 term_weights.py top <document_id> [--limit N]
+    python3 term_weights.py apply
+"""
+
+import json
+import math
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Calcul en Python pur
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from atomic_files import atomic_write
+from corpus_store import CorpusStore
+from enrich_metadata import TERM_MATCHER, TERMINOLOGY
+from metadata_store import open_store
+from migrate_metadata_structure import extract_thematiques
+from term_matcher import fold
+
+BASE_DIR = Path(__file__).parent
+MATRIX_FILE = BASE_DIR / "_metadata" / "corpus" / "term_matrix.json"
+MATRIX_VERSION = 1
+
+MAX_VOCABULAIRE = 10
+
+
+class TermMatrix:
+    """Comptage des termes par document (CSR : une ligne par document)."""
+
+    def __init__(self, documents, terms, indptr, indices, counts):
+        self.documents = documents
+        self.terms = terms
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self._rows = {document_id: row for row, document_id in enumerate(documents)}
+        self._weights = None
+
+    @classmethod
+    def from_corpus(cls, corpus, terminology=TERMINOLOGY, matcher=TERM_MATCHER):
+        """Compte les termes (terme principal et synonymes) dans chaque document du corpus."""
+        documents = sorted(corpus.ids())
+        indptr = [0]
+        indices = []
+        counts = []
+        for document_id in documents:
+            row = {}
+            for page in corpus.iter_pages(document_id):
+                for (term_index, _), count in matcher.counts(page).items():
+                    row[term_index] = row.get(term_index, 0) + count
+            for term_index in sorted(row):
+                indices.append(term_index)
+                counts.append(row[term_index])
+            indptr.append(len(indices))
+        return cls(documents, [term for term, _ in terminology], indptr, indices, counts)
+
+    @classmethod
+    def load(cls, path=MATRIX_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['documents'], data['terms'], data['indptr'], data['indices'], data['counts'])
+
+    def save(self, path=MATRIX_FILE):
+        atomic_write(path, json.dumps({
+            'version': MATRIX_VERSION,
+            'documents': self.documents,
+            'terms': self.terms,
+            'indptr': list(self.indptr),
+            'indices': list(self.indices),
+            'counts': list(self.counts),
+        }, ensure_ascii=False))
+
+    def __contains__(self, document_id):
+        return document_id in self._rows
+
+    def document_frequencies(self):
+        """Nombre de documents contenant chaque terme."""
+        df = [0] * len(self.terms)
+        for term_index in self.indices:
+            df[term_index] += 1
+        return df
+
+    def idf(self):
+        n = len(self.documents)
+        return [math.log((1 + n) / (1 + df)) + 1 for df in self.document_frequencies()]
+
+    def weights(self):
+        """Poids TF-IDF, alignés sur `indices` (calculés une fois pour tout le corpus)."""
+        if self._weights is None:
+            self._weights = self._weights_numpy() if np is not None else self._weights_python()
+        return self._weights
+
+    def _weights_numpy(self):
+        indptr = np.asarray(self.indptr, dtype=np.int64)
+        indices = np.asarray(self.indices, dtype=np.int64)
+        counts = np.asarray(self.counts, dtype=np.float64)
+        if not len(counts):
+            return []
+        data = (1.0 + np.log(counts)) * np.asarray(self.idf())[indices]
+        rows = np.repeat(np.arange(len(self.documents)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(self.documents)))
+        return (data / norms[rows]).tolist()
+
+    def _weights_python(self):
+        idf = self.idf()
+        weights = []
+        for row in range(len(self.documents)):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            data = [(1.0 + math.log(self.counts[k])) * idf[self.indices[k]] for k in range(start, end)]
+            norm = math.sqrt(sum(w * w for w in data))
+            weights.extend(w / norm for w in data)
+        return weights
+
+    def to_sparse(self):
+        """Matrice TF-IDF documents × termes au format `scipy.sparse.csr_matrix`."""
+        if sparse is None:
+            raise RuntimeError("SciPy n'est pas installé")
+        return sparse.csr_matrix((self.weights(), self.indices, self.indptr),
+                                 shape=(len(self.documents), len(self.terms)))
+
+    def document_terms(self, document_id):
+        """Termes d'un document : liste de (terme, poids, occurrences), par poids décroissant."""
+        row = self._rows.get(document_id)
+        if row is None:
+            return []
+        weights = self.weights()
+        result = [
+            (self.terms[self.indices[k]], weights[k], self.counts[k])
+            for k in range(self.indptr[row], self.indptr[row + 1])
+        ]
+        result.sort(key=lambda t: (-t[1], t[0]))
+        return result
+
+
+def rank_vocabulary(metadata, matrix, limit=MAX_VOCABULAIRE):
+    """Reclasse `vocabulaire_specifique` et `mots_cles` d'un document par poids TF-IDF.
+
+    Les termes du document dans la matrice et les entrées déjà présentes
+    (poids nul si absentes de la matrice) sont classés par poids ; les
+    `limit` premiers sont retenus, les entrées existantes gardent leur
+    définition. Les mots-clés sont triés avec les mêmes poids (nul pour un
+    mot-clé hors terminologie, tri stable). Retourne True si le document change.
+    """
+    document_terms = matrix.document_terms(metadata['document_id'])
+    if not document_terms:
+        return False
+
+    synonyms = dict(TERMINOLOGY)
+    existing = {fold(item.get('terme', '')): item for item in metadata.get('vocabulaire_specifique', [])}
+    vocab = []
+    for term, weight, count in document_terms:
+        item = dict(existing.pop(fold(term), None) or {
+            "terme": term,
+            "synonymes": synonyms.get(term, []),
+            "definition": "",  # À enrichir manuellement
+        })
+        item["contexte_utilisation"] = f"Mentionné {count} fois dans le document"
+        item["poids"] = round(weight, 4)
+        vocab.append(item)
+    vocab.extend(dict(item, poids=0) for item in existing.values())
+    vocab = vocab[:limit]
+
+    weights = {fold(term): weight for term, weight, _ in document_terms}
+    mots_cles = sorted(metadata.get('mots_cles', []), key=lambda mot: -weights.get(fold(mot), 0))
+
+    classification = metadata.setdefault('classification', {})
+    thematiques = extract_thematiques({'vocabulaire_specifique': vocab})
+    if (vocab == metadata.get('vocabulaire_specifique')
+            and thematiques == classification.get('thematiques')
+            and mots_cles == metadata.get('mots_cles', [])):
+        return False
+    metadata['vocabulaire_specifique'] = vocab
+    classification['thematiques'] = thematiques
+    if 'mots_cles' in metadata:
+        metadata['mots_cles'] = mots_cles
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pondération TF-IDF du vocabulaire notarial.")
+    parser.add_argument('action', choices=['build', 'top', 'apply'])
+    parser.add_argument('document_id', nargs='?')
+    parser.add_argument('--limit', type=int, default=MAX_VOCABULAIRE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.action == 'build':
+        with CorpusStore() as corpus:
+            matrix = TermMatrix.from_corpus(corpus)
+        matrix.save()
+        print(f"Matrice : {len(matrix.documents)} documents × {len(matrix.terms)} termes, "
+              f"{len(matrix.indices)} valeurs non nulles ({'NumPy' if np is not None else 'Python pur'})")
+        return
+
+    if not MATRIX_FILE.exists():
+        print("Matrice absente : lancer 'python3 term_weights.py build'")
+        return
+    matrix = TermMatrix.load()
+
+    if args.action == 'top':
+        if args.document_id not in matrix:
+            print(f"Document absent de la matrice : {args.document_id}")
+            return
+        for term, weight, count in matrix.document_terms(args.document_id)[:args.limit]:
+            print(f"  {weight:.4f}  {term} ({count})")
+        return
+
+    with open_store() as store:
+        documents = store.load_all()
+        changed = [metadata for metadata in documents if rank_vocabulary(metadata, matrix, args.limit)]
+        store.save_many(changed)
+    print(f"{len(changed)} documents reclassés sur {len(documents)}")
+
+
+if __name__ == "__main__":
+    main()
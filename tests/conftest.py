@@ -0,0 +1,8 @@
+"""Les scripts sont des modules à la racine du dépôt : rendus importables pour les tests."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
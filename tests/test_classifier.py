@@ -0,0 +1,113 @@
+"""Classification des documents : `PriorityMatcher` contre la cascade séquentielle d'origine."""
+
+import random
+import re
+
+import pytest
+
+from index_bible_notariale import (DOCUMENT_TYPES, SOURCES_DIR, DocumentClassifier, PriorityMatcher,
+                                   literal_prefix)
+
+
+def legacy_classify(filename, folder_path):
+    """Cascade d'origine (règle par règle), référence de l'équivalence."""
+    folder_name = folder_path.name if folder_path != SOURCES_DIR else ""
+
+    if 'fil-info' in folder_name.lower() or 'fil-info' in filename.lower():
+        return 'fil_info'
+
+    if 'convention collective' in folder_name.lower():
+        if re.search(r'avenant', filename, re.IGNORECASE):
+            return 'avenant_ccn'
+        return 'accord_branche'
+
+    if re.match(r'CSN\d{4}', folder_name):
+        if re.search(r'[Cc]irculaire', filename):
+            return 'circulaire_csn'
+        if re.search(r'[Aa]venant', filename):
+            return 'avenant_ccn'
+        if re.search(r'[Aa]ccord', filename):
+            return 'accord_branche'
+        return 'circulaire_csn'
+
+    if 'assurance' in folder_name.lower():
+        return 'assurance'
+    if 'observatoire' in folder_name.lower() or 'immobilier' in folder_name.lower():
+        return 'immobilier'
+    if 'rpn' in folder_name.lower():
+        return 'guide_pratique'
+    if 'bonnes pratiques' in folder_name.lower() or 'fiche' in folder_name.lower():
+        return 'guide_pratique'
+
+    for doc_type, config in DOCUMENT_TYPES.items():
+        for pattern in config['patterns']:
+            if re.search(pattern, filename):
+                return doc_type
+    return 'guide_pratique'
+
+
+def sequential_first(rules, text):
+    for result, pattern in rules:
+        if re.search(pattern, text):
+            return result
+    return None
+
+
+FILENAME_RULES = [
+    (doc_type, pattern)
+    for doc_type, config in DOCUMENT_TYPES.items()
+    for pattern in config['patterns']
+]
+
+FOLDERS = ["", "fil-infos", "Convention Collective", "CSN2024", "csn2024", "Assurances",
+           "Observatoire immobilier", "rpn", "FICHES BONNES PRATIQUES", "Divers", "xCSN2021"]
+
+FRAGMENTS = ["Circulaire", "CIRCULAIRE", "circulaire", "avenant", "Avenant n°53", "avenant_n12", "Accord",
+             "accord de branche", "accord salaires", "fil-info-2850", "Fil-Info", "guide", "Manuel",
+             "brochure", "fiche pratique", "fiche", "décret", "Decret", "Ordonnance", "d_56-220", "JO ORDO",
+             "JO  ORDO", "assurance", "CSN", "2024", "note", "_", "-", " ", "°", "İ", "ẞ"]
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r'[Cc]irculaire', 'circulaire'),
+    (r'(?i:fil-info)', 'fil-info'),
+    (r'\ACSN\d{4}', 'csn'),
+    (r'[Aa]venant\s*n?[°º]?\s*\d+', 'avenant'),
+    (r'avenant_n\d+', 'avenant_n'),
+    (r'[Dd][ée]cret', 'd'),
+    (r'JO\s*ORDO', 'jo'),
+    (r'(?i:observatoire|immobilier)', ''),
+    (r'accord.*branche', 'accord'),
+    (r'colou?r', 'colo'),
+])
+def test_literal_prefix(pattern, expected):
+    assert literal_prefix(pattern) == expected
+
+
+@pytest.mark.parametrize("rules", [FILENAME_RULES, DocumentClassifier.FOLDER_RULES])
+def test_priority_matcher_matches_sequential_search(rules):
+    matcher = PriorityMatcher(rules)
+    rng = random.Random(3)
+    for _ in range(5000):
+        text = "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", "_"])
+                       for _ in range(rng.randint(0, 6)))
+        assert matcher.first(text) == sequential_first(rules, text), text
+
+
+def test_classifier_matches_legacy_cascade_on_synthetic_names():
+    classifier = DocumentClassifier()
+    rng = random.Random(7)
+    for _ in range(5000):
+        folder = SOURCES_DIR / rng.choice(FOLDERS) if rng.random() < 0.8 else SOURCES_DIR
+        filename = "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", "_"])
+                           for _ in range(rng.randint(0, 5))) + ".pdf"
+        assert classifier.classify(filename, folder) == legacy_classify(filename, folder), (folder, filename)
+
+
+def test_classifier_matches_legacy_cascade_on_sources():
+    classifier = DocumentClassifier()
+    files = [path for path in SOURCES_DIR.rglob('*') if path.is_file()]
+    if not files:
+        pytest.skip("Aucun fichier source")
+    for path in files:
+        assert classifier.classify(path.name, path.parent) == legacy_classify(path.name, path.parent), path
@@ -0,0 +1,69 @@
+"""Identifiants de documents : résolution des collisions et stabilité des suffixes."""
+
+import random
+
+from index_bible_notariale import (DOCUMENT_ID_MAX_LENGTH, SOURCES_DIR, generate_document_id,
+                                   resolve_id_collisions, suffix_document_id)
+
+
+def make_documents(paths):
+    documents = []
+    for path in paths:
+        folder, _, filename = path.rpartition('/')
+        folder_path = SOURCES_DIR / folder if folder else SOURCES_DIR
+        documents.append({
+            'document_id': generate_document_id(filename, folder_path),
+            'fichier': f"sources_documentaires/{path}",
+        })
+    return documents
+
+
+def test_generate_document_id_folds_accents_and_separators():
+    assert generate_document_id("Décret n° 2024-906 (note).pdf", SOURCES_DIR) == "decret_n_2024_906_note"
+    assert generate_document_id("avenant_n53.pdf", SOURCES_DIR / "Convention Collective") == \
+        "convention_collective_avenant_n53"
+
+
+def test_colliding_documents_get_unique_ids():
+    long_name = "x" * 120
+    documents = make_documents([f"{long_name}_a.pdf", f"{long_name}_b.pdf", "unique.pdf"])
+    assert documents[0]['document_id'] == documents[1]['document_id']
+
+    collisions = resolve_id_collisions(documents)
+
+    ids = [doc['document_id'] for doc in documents]
+    assert len(set(ids)) == 3
+    assert all(len(doc_id) <= DOCUMENT_ID_MAX_LENGTH for doc_id in ids)
+    assert len(collisions) == 1
+    assert [d['fichier'] for d in collisions[0]['documents']] == sorted(d['fichier'] for d in documents[:2])
+
+
+def test_first_path_keeps_the_id_and_suffixes_depend_only_on_the_path():
+    paths = [f"dossier/{'y' * 110}_{i}.pdf" for i in range(5)] + ["autre.pdf"]
+    reference = make_documents(paths)
+    resolve_id_collisions(reference)
+    expected = {doc['fichier']: doc['document_id'] for doc in reference}
+
+    base_id = generate_document_id(f"{'y' * 110}_0.pdf", SOURCES_DIR / "dossier")
+    first = min(doc['fichier'] for doc in reference if 'y' in doc['fichier'])
+    assert expected[first] == base_id
+    for fichier, doc_id in expected.items():
+        if fichier != first and 'y' in fichier:
+            assert doc_id == suffix_document_id(base_id, fichier)
+
+    # Même résultat quel que soit l'ordre de parcours des fichiers
+    rng = random.Random(1)
+    for _ in range(10):
+        shuffled = paths[:]
+        rng.shuffle(shuffled)
+        documents = make_documents(shuffled)
+        resolve_id_collisions(documents)
+        assert {doc['fichier']: doc['document_id'] for doc in documents} == expected
+
+
+def test_resolution_is_idempotent():
+    documents = make_documents([f"{'z' * 120}_{i}.pdf" for i in range(3)])
+    resolve_id_collisions(documents)
+    ids = [doc['document_id'] for doc in documents]
+    assert resolve_id_collisions(documents) == []
+    assert [doc['document_id'] for doc in documents] == ids
@@ -0,0 +1,127 @@
+"""Journal des mises à jour : deltas inverses, retour arrière et reprise après interruption."""
+
+import json
+import random
+
+import pytest
+
+from metadata_journal import Journal, apply_delta, reverse_delta
+from metadata_store import SqliteMetadataStore
+
+
+@pytest.mark.parametrize("old, new", [
+    (b"a\nb\nc\n", b"a\nB\nc\nd\n"),
+    (b"", b"x\n"),
+    (b"x\n", b""),
+    (b"sans fin de ligne", b"sans fin de ligne\nmais plus longue"),
+    ("é\nà\n".encode('utf-8'), "é\nù\n".encode('utf-8')),
+])
+def test_reverse_delta_round_trip(old, new):
+    assert apply_delta(new, reverse_delta(old, new)) == old
+
+
+def test_reverse_delta_round_trip_random():
+    rng = random.Random(2)
+    lines = [f"ligne {i}\n" for i in range(20)]
+    for _ in range(200):
+        old = "".join(rng.choice(lines) for _ in range(rng.randint(0, 30))).encode('utf-8')
+        new = "".join(rng.choice(lines) for _ in range(rng.randint(0, 30))).encode('utf-8')
+        assert apply_delta(new, reverse_delta(old, new)) == old
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return Journal(directory=tmp_path / "journal", root=tmp_path)
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def test_rollback_restores_modified_and_removes_created_files(journal, tmp_path):
+    existing = tmp_path / "a.json"
+    write(existing, {'v': 1})
+    created = tmp_path / "b.json"
+
+    with journal.transaction("test") as transaction:
+        transaction.write_json(existing, {'v': 2})
+        transaction.write_json(created, {'v': 3})
+    assert transaction.generation['id'] == 1
+    assert json.loads(existing.read_text())['v'] == 2
+
+    undone = journal.rollback()
+    assert [generation['id'] for generation in undone] == [1]
+    assert json.loads(existing.read_text()) == {'v': 1}
+    assert not created.exists()
+    assert journal.generations() == []
+
+
+def test_rollback_refuses_files_modified_since(journal, tmp_path):
+    path = tmp_path / "a.json"
+    write(path, {'v': 1})
+    with journal.transaction("test") as transaction:
+        transaction.write_json(path, {'v': 2})
+    write(path, {'v': 'modifié à la main'})
+
+    with pytest.raises(RuntimeError):
+        journal.rollback()
+    assert json.loads(path.read_text()) == {'v': 'modifié à la main'}
+
+
+def test_recover_undoes_an_interrupted_generation(journal, tmp_path, monkeypatch):
+    path = tmp_path / "a.json"
+    write(path, {'v': 1})
+
+    def crash(generation):
+        raise SystemExit("arrêt brutal")
+
+    monkeypatch.setattr(journal, 'validate', crash)
+    with pytest.raises(SystemExit):
+        with journal.transaction("test") as transaction:
+            transaction.write_json(path, {'v': 2})
+    monkeypatch.undo()
+
+    assert json.loads(path.read_text()) == {'v': 2}
+    assert journal.generations()[0]['etat'] == 'en_cours'
+    assert journal.recover() == 1
+    assert json.loads(path.read_text()) == {'v': 1}
+    assert journal.generations() == []
+
+
+def test_failed_transaction_writes_nothing(journal, tmp_path):
+    path = tmp_path / "a.json"
+    write(path, {'v': 1})
+    with pytest.raises(ValueError):
+        with journal.transaction("test") as transaction:
+            transaction.write_json(path, {'v': 2})
+            raise ValueError("échec")
+    assert json.loads(path.read_text()) == {'v': 1}
+    assert journal.generations() == []
+
+
+def test_generation_ids_are_not_reused_after_rollback(journal, tmp_path):
+    path = tmp_path / "a.json"
+    for value in (1, 2):
+        with journal.transaction("test") as transaction:
+            transaction.write_json(path, {'v': value})
+    journal.rollback()
+    with journal.transaction("test") as transaction:
+        transaction.write_json(path, {'v': 3})
+    assert [generation['id'] for generation in journal.generations()] == [1, 3]
+
+
+def test_rollback_restores_sqlite_rows(journal, tmp_path):
+    db_path = tmp_path / "metadata.sqlite"
+    with SqliteMetadataStore(db_path) as store:
+        store.save_many([{'document_id': 'a', 'classification': {'type_document': 'x'}}])
+        with journal.transaction("test") as transaction:
+            store.save_many([{'document_id': 'a', 'classification': {'type_document': 'y'}},
+                             {'document_id': 'b', 'classification': {}}], batch=transaction)
+            # Lignes écrites seulement à la validation
+            assert store.load('a')['classification']['type_document'] == 'x'
+        assert transaction.generation['lignes'] == 2
+        assert store.load('a')['classification']['type_document'] == 'y'
+
+        journal.rollback()
+        assert store.load('a')['classification']['type_document'] == 'x'
+        assert store.load('b') is None
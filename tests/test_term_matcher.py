@@ -0,0 +1,69 @@
+"""`TermMatcher` (Aho-Corasick) contre une recherche par expression régulière, terme par terme."""
+
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from enrich_metadata import TERM_MATCHER, TERMINOLOGY
+from term_matcher import TermMatcher, fold, fold_text
+
+
+def regex_counts(patterns, text):
+    """Référence : une expression par terme sur le texte replié, mots entiers, pluriel en -s/-x."""
+    folded = fold_text(text)[0]
+    counts = Counter()
+    for key, phrase in patterns:
+        phrase = fold(phrase)
+        if not phrase:
+            continue
+        regex = re.compile(r'(?<![^\W_])(?=' + re.escape(phrase) + r'[sx]?(?![^\W_]))')
+        counts[key] += sum(1 for _ in regex.finditer(folded))
+    return +counts
+
+
+TERMINOLOGY_PATTERNS = [
+    ((index, variant), phrase)
+    for index, (term, synonyms) in enumerate(TERMINOLOGY)
+    for variant, phrase in enumerate([term, *synonyms])
+]
+
+
+@pytest.mark.parametrize("text, phrase, expected", [
+    ("Les Avenants et l'avenant", "avenant", 2),
+    ("PRÉVOYANCE, prevoyance et Prévoyances", "prévoyance", 3),
+    ("la minuterie de la minute", "minute", 1),
+    ("travaux et travail", "travail", 1),
+    ("droit\n  de   préemption", "droit de préemption", 1),
+    ("l’office et l'office", "l'office", 2),
+    ("acte_authentique", "acte", 1),
+])
+def test_accents_case_plurals_and_word_boundaries(text, phrase, expected):
+    matcher = TermMatcher([('terme', phrase)])
+    assert matcher.counts(text)['terme'] == expected
+    assert regex_counts([('terme', phrase)], text)['terme'] == expected
+
+
+def test_terminology_counts_match_regex_search():
+    phrases = [phrase for _, phrase in TERMINOLOGY_PATTERNS]
+    filler = ["le", "la", "des", "notaire", "minuterie", "é", "É", ",", ".", "'", "’", "\n", "s", "x", "2024"]
+    rng = random.Random(5)
+    for _ in range(300):
+        words = []
+        for _ in range(rng.randint(1, 40)):
+            word = rng.choice(phrases) if rng.random() < 0.4 else rng.choice(filler)
+            if rng.random() < 0.2:
+                word = word.upper()
+            if rng.random() < 0.2:
+                word += rng.choice(["s", "x", "e", ""])
+            words.append(word)
+        text = rng.choice([" ", "  ", "\n"]).join(words)
+        assert TERM_MATCHER.counts(text) == regex_counts(TERMINOLOGY_PATTERNS, text), text
+
+
+def test_finditer_positions_point_into_original_text():
+    text = "Une  Prévoyance\nde   l’Office"
+    matcher = TermMatcher([('p', "prevoyance"), ('o', "l'office")])
+    spans = {key: text[start:end] for key, start, end in matcher.finditer(text)}
+    assert spans == {'p': "Prévoyance", 'o': "l’Office"}
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache disque du texte extrait des documents sources
+
+L'extraction PDF (PyPDF2) est l'opération la plus coûteuse des scripts
+d'enrichissement. Le texte extrait est conservé compressé dans `.cache/text/`,
+sous une clé dérivée :
+- de l'empreinte SHA-256 du contenu du fichier source (un fichier renommé ou
+  déplacé reste en cache, un fichier modifié est réextrait) ;
+- du nom de l'extracteur et de ses paramètres (pages, limite de caractères…).
+
+Les entrées les moins récemment utilisées sont supprimées lorsque le cache
+dépasse sa taille maximale.
+
+Usage :
+    python3 text_cache.py stats
+    python3 text_cache.py prune --max-size 50   # Mo
+    python3 text_cache.py clear
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import argparse
+from pathlib import Path
+
+from atomic_files import atomic_write
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / ".cache" / "text"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+ENTRY_SUFFIX = ".txt.gz"
+
+
+def file_sha256(file_path):
+    """Empreinte SHA-256 du contenu d'un fichier."""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class TextCache:
+    """Cache de texte extrait, adressé par contenu."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        # Empreintes déjà calculées : chemin → (taille, mtime, sha256)
+        self._digests = {}
+
+    def _digest(self, file_path):
+        stat = os.stat(file_path)
+        known = self._digests.get(str(file_path))
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        digest = file_sha256(file_path)
+        self._digests[str(file_path)] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def key(self, file_path, extractor, params=None, sha256=None):
+        """Clé de cache : contenu du fichier + extracteur + paramètres.
+
+        `sha256` : empreinte du fichier si l'appelant l'a déjà calculée.
+        """
+        digest = sha256 or self._digest(file_path)
+        payload = json.dumps([digest, extractor, params or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, key):
+        """Texte en cache pour la clé, ou None."""
+        entry = self._entry_path(key)
+        try:
+            with gzip.open(entry, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Horodatage d'utilisation pour l'éviction LRU
+        os.utime(entry)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Stocke le texte (écriture atomique)."""
+        # Pas de fsync : une entrée perdue sera simplement réextraite
+        atomic_write(self._entry_path(key), gzip.compress(text.encode('utf-8'), mtime=0), fsync=False)
+        self.writes += 1
+
+    def get_or_extract(self, file_path, extractor, params, extract, sha256=None):
+        """Texte en cache, sinon `extract()` puis mise en cache.
+
+        Une exception levée par `extract` est propagée et rien n'est mis en
+        cache : un échec d'extraction sera retenté à la prochaine exécution.
+        """
+        key = self.key(file_path, extractor, params, sha256)
+        text = self.get(key)
+        if text is None:
+            text = extract()
+            self.put(key, text)
+        return text
+
+    def entries(self):
+        """Entrées du cache : liste de (chemin, taille, dernière utilisation)."""
+        result = []
+        for entry in self.cache_dir.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            result.append((entry, stat.st_size, stat.st_mtime))
+        return result
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"Cache texte : {stats['hits']} succès, {stats['misses']} échecs "
+                f"({stats['hit_ratio']:.0%}), {stats['entries']} entrées, "
+                f"{stats['bytes'] / 1024 / 1024:.1f} Mo / {stats['max_bytes'] / 1024 / 1024:.0f} Mo")
+
+    def prune(self, max_bytes=None):
+        """Supprime les entrées les moins récemment utilisées au-delà de `max_bytes`.
+
+        Retourne le nombre d'entrées supprimées.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for entry, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= max_bytes:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        return self.prune(0)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gestion du cache de texte extrait.")
+    parser.add_argument('action', choices=['stats', 'prune', 'clear'])
+    parser.add_argument('--max-size', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="Taille maximale en Mo pour 'prune'")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = TextCache(max_bytes=int(args.max_size * 1024 * 1024))
+
+    if args.action == 'prune':
+        print(f"{cache.prune()} entrées supprimées")
+    elif args.action == 'clear':
+        print(f"{cache.clear()} entrées supprimées")
+
+    stats = cache.stats()
+    print(f"{stats['entries']} entrées, {stats['bytes'] / 1024 / 1024:.1f} Mo dans {CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
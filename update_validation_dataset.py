@@ -5,11 +5,12 @@ Script pour mettre à jour le fichier Excel validation_dataset_20questions.xlsx
 Ajoute des onglets de référence et des listes déroulantes
 """
 
-import json
 import openpyxl
 from openpyxl.worksheet.datavalidation import DataValidation
 from pathlib import Path
 
+from metadata_corpus import Corpus
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 METADATA_DIR = BASE_DIR / "_metadata"
@@ -22,55 +23,15 @@ def extract_reference_data():
     """
     Extrait les données de référence depuis l'index complet
     """
-    with open(INDEX_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    documents = data.get('documents', [])
-
-    # 1. Types de document
-    types_doc = set()
-    for doc in documents:
-        type_doc = doc.get('classification', {}).get('type_document', '')
-        if type_doc:
-            types_doc.add(type_doc)
-
-    # 2. Thématiques
-    thematiques = set()
-    for doc in documents:
-        themes = doc.get('classification', {}).get('thematiques', [])
-        for theme in themes:
-            if theme:
-                thematiques.add(theme)
-
-    # 3. Mots-clés
-    mots_cles = set()
-    for doc in documents:
-        mots = doc.get('mots_cles', [])
-        for mot in mots:
-            if mot:
-                mots_cles.add(mot)
-
-    # 4. Sources de document
-    sources = set()
-    for doc in documents:
-        source = doc.get('classification', {}).get('sources_document', '')
-        if source:
-            sources.add(source)
-
-    # 5. Domaines métier
-    domaines = set()
-    for doc in documents:
-        doms = doc.get('classification', {}).get('domaines_metier', [])
-        for dom in doms:
-            if dom:
-                domaines.add(dom)
+    # Valeurs distinctes lues directement dans les index inversés du corpus
+    corpus = Corpus.from_index(INDEX_FILE)
 
     return {
-        'types_document': sorted(types_doc),
-        'thematiques': sorted(thematiques),
-        'mots_cles': sorted(mots_cles),
-        'sources_document': sorted(sources),
-        'domaines_metier': sorted(domaines)
+        'types_document': corpus.values('type_document'),
+        'thematiques': corpus.values('thematiques'),
+        'mots_cles': corpus.values('mots_cles'),
+        'sources_document': corpus.values('sources_document'),
+        'domaines_metier': corpus.values('domaines_metier')
     }
 
 
@@ -2,38 +2,156 @@
 # -*- coding: utf-8 -*-
 """
 Validation de cohérence des métadonnées
+
+Chaque contrôle est une règle enregistrée (`@rule`) ; les listes de valeurs
+admises sont des ensembles calculés une fois au chargement du module. Les
+champs utilisés par plusieurs règles (classification, titre en minuscules…)
+sont extraits une fois par document (`DocumentFields`), puis les règles sont
+évaluées dans l'ordre d'enregistrement.
+
+La validation peut être répartie sur plusieurs processus (`--workers`) :
+chaque processus charge et valide un lot de documents. Le temps passé et le
+nombre d'échecs par règle figurent dans le rapport (`regles`).
+
+L'existence des fichiers sources est vérifiée sur une liste construite en un
+seul parcours de `sources_documentaires/` au début de la validation (et non
+par un accès disque par document). Le rapport liste aussi les fichiers
+manquants et les fichiers sources orphelins (sans métadonnées).
+
+Usage :
+    python3 validate_metadata.py [--workers N] [--strict]
+    python3 validate_metadata.py --list
 """
 
 import os
-import json
+import sys
+import time
+import argparse
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_files import write_json_if_changed
+from metadata_store import open_store
 
 BASE_DIR = Path(__file__).parent
 METADATA_DIR = BASE_DIR / "_metadata"
 DOCS_METADATA_DIR = METADATA_DIR / "documents"
 SOURCES_DIR = BASE_DIR / "sources_documentaires"
 
-
-def validate_document(metadata):
-    """Valide la cohérence d'un document."""
-    issues = []
-    warnings = []
-
-    # 1. Vérifier que le fichier existe
-    file_path = BASE_DIR / metadata['fichier']
-    if not file_path.exists():
-        issues.append(f"Fichier manquant: {metadata['fichier']}")
-
-    # 2. Vérifier la cohérence des dates
-    date_pub = metadata['metadata'].get('date_publication', '')
+VALID_TYPES = frozenset([
+    'Directives CSN', 'Convention collectives Notariat', 'Actualités',
+    'Lois et règlements', 'Assurances'
+])
+VALID_SOURCES = frozenset([
+    'circulaire_csn', 'avenant_ccn', 'accord_branche', 'fil_info',
+    'guide_pratique', 'decret_ordonnance', 'assurance', 'immobilier',
+    'formation', 'conformite'
+])
+VALID_DOMAINS = frozenset(['RH', 'DEONTOLOGIE', 'ASSURANCES'])
+
+# Mot attendu dans le titre pour une source donnée
+SOURCE_TITLE_WORDS = {
+    'avenant_ccn': 'avenant',
+    'circulaire_csn': 'circulaire',
+}
+
+# Lots de documents par processus
+CHUNKS_PER_WORKER = 4
+
+# Chemins des fichiers sources (relatifs à BASE_DIR), listés une fois par exécution
+SOURCE_FILES = None
+
+# Une règle : `func(fields, issues, warnings)` ajoute ses erreurs et avertissements
+Rule = namedtuple('Rule', ['name', 'func', 'description'])
+
+RULES = {}
+
+# Champs d'un document partagés par les règles, extraits une fois
+DocumentFields = namedtuple('DocumentFields', [
+    'document', 'meta', 'classification', 'titre', 'titre_minuscules',
+    'nom_fichier', 'source_doc',
+])
+
+
+def rule(name, description=None):
+    """Décorateur : enregistre une règle de validation sous `name`."""
+    def decorator(func):
+        summary = description or (func.__doc__ or "").strip().split("\n")[0]
+        RULES[name] = Rule(name, func, summary)
+        return func
+    return decorator
+
+
+def list_source_files(directory=SOURCES_DIR):
+    """Chemins (relatifs à BASE_DIR) des fichiers sous `directory`, en un seul parcours."""
+    files = set()
+    for root, dirs, names in os.walk(directory):
+        relative = Path(root).relative_to(BASE_DIR)
+        files.update(str(relative / name) for name in names)
+    return frozenset(files)
+
+
+def set_source_files(files):
+    """Fixe la liste des fichiers sources (initialisation des processus du pool)."""
+    global SOURCE_FILES
+    SOURCE_FILES = files
+
+
+def source_exists(fichier):
+    """Vrai si le fichier source existe, d'après la liste de l'exécution."""
+    global SOURCE_FILES
+    if SOURCE_FILES is None:
+        SOURCE_FILES = list_source_files()
+    if fichier in SOURCE_FILES:
+        return True
+    # Hors de sources_documentaires : non couvert par la liste
+    sources_dir = str(SOURCES_DIR.relative_to(BASE_DIR))
+    if not fichier.startswith(sources_dir + os.sep):
+        return (BASE_DIR / fichier).exists()
+    return False
+
+
+def find_orphans(source_files, referenced):
+    """Fichiers sources (hors fichiers cachés) qu'aucune métadonnée ne référence."""
+    return sorted(
+        path for path in source_files - set(referenced)
+        if not os.path.basename(path).startswith('.')
+    )
+
+
+def document_fields(metadata):
+    meta = metadata.get('metadata', {})
+    classification = metadata.get('classification', {})
+    titre = meta.get('titre', '')
+    return DocumentFields(
+        metadata, meta, classification, titre, titre.lower(),
+        metadata.get('nom_fichier', ''), classification.get('sources_document', ''),
+    )
+
+
+@rule('fichier')
+def check_fichier(fields, issues, warnings):
+    """Le fichier source existe."""
+    fichier = fields.document['fichier']
+    if not source_exists(fichier):
+        issues.append(f"Fichier manquant: {fichier}")
+
+
+@rule('date_publication')
+def check_date_publication(fields, issues, warnings):
+    """Date de publication présente et plausible."""
+    date_pub = fields.meta.get('date_publication', '')
     if not date_pub or date_pub == 'N/A':
         issues.append("Date de publication manquante")
     elif date_pub < '2018-01-01' or date_pub > '2026-01-01':
         warnings.append(f"Date suspecte: {date_pub}")
 
-    # 3. Vérifier le résumé
-    resume = metadata.get('resume', '')
+
+@rule('resume')
+def check_resume(fields, issues, warnings):
+    """Résumé enrichi, de longueur raisonnable."""
+    resume = fields.document.get('resume', '')
     if not resume or resume.startswith('Document de type'):
         warnings.append("Résumé générique non enrichi")
     elif len(resume) < 50:
@@ -41,88 +159,208 @@ def validate_document(metadata):
     elif len(resume) > 1000:
         warnings.append(f"Résumé trop long ({len(resume)} chars)")
 
-    # 4. Vérifier les questions typiques
-    questions = metadata.get('questions_typiques', [])
-    if len(questions) < 3:
-        warnings.append(f"Peu de questions ({len(questions)})")
-    elif len(questions) > 10:
-        warnings.append(f"Trop de questions ({len(questions)})")
-
-    # 5. Vérifier la classification - type_document (catégorie business)
-    doc_type = metadata['classification'].get('type_document', '')
-    valid_types = [
-        'Directives CSN', 'Convention collectives Notariat', 'Actualités',
-        'Lois et règlements', 'Assurances'
-    ]
-    if doc_type not in valid_types:
+
+@rule('questions_typiques')
+def check_questions(fields, issues, warnings):
+    """Entre 3 et 10 questions typiques."""
+    count = len(fields.document.get('questions_typiques', []))
+    if count < 3:
+        warnings.append(f"Peu de questions ({count})")
+    elif count > 10:
+        warnings.append(f"Trop de questions ({count})")
+
+
+@rule('type_document')
+def check_type_document(fields, issues, warnings):
+    """type_document est une catégorie business connue."""
+    doc_type = fields.classification.get('type_document', '')
+    if doc_type not in VALID_TYPES:
         issues.append(f"Type de document invalide: {doc_type}")
 
-    # Vérifier sources_document
-    source_doc = metadata['classification'].get('sources_document', '')
-    valid_sources = [
-        'circulaire_csn', 'avenant_ccn', 'accord_branche', 'fil_info',
-        'guide_pratique', 'decret_ordonnance', 'assurance', 'immobilier',
-        'formation', 'conformite'
-    ]
-    if source_doc not in valid_sources:
-        issues.append(f"Source de document invalide: {source_doc}")
-
-    # Vérifier domaines_metier
-    domaines = metadata['classification'].get('domaines_metier', [])
-    valid_domains = ['RH', 'DEONTOLOGIE', 'ASSURANCES']
-    for domaine in domaines:
-        if domaine not in valid_domains:
-            issues.append(f"Domaine métier invalide: {domaine}")
 
-    # Vérifier domaine_metier_principal
-    domaine_principal = metadata['classification'].get('domaine_metier_principal', '')
-    if domaine_principal and domaine_principal not in valid_domains:
+@rule('sources_document')
+def check_sources_document(fields, issues, warnings):
+    """sources_document est une source connue."""
+    if fields.source_doc not in VALID_SOURCES:
+        issues.append(f"Source de document invalide: {fields.source_doc}")
+
+
+@rule('domaines_metier')
+def check_domaines_metier(fields, issues, warnings):
+    """Domaines métier (et domaine principal) connus."""
+    for domaine in fields.classification.get('domaines_metier', []):
+        if domaine not in VALID_DOMAINS:
+            issues.append(f"Domaine métier invalide: {domaine}")
+    domaine_principal = fields.classification.get('domaine_metier_principal', '')
+    if domaine_principal and domaine_principal not in VALID_DOMAINS:
         issues.append(f"Domaine métier principal invalide: {domaine_principal}")
 
-    # 6. Vérifier la cohérence source/contenu
-    titre = metadata['metadata'].get('titre', '').lower()
-    if source_doc == 'avenant_ccn' and 'avenant' not in titre:
-        warnings.append("Source avenant mais 'avenant' absent du titre")
-    if source_doc == 'circulaire_csn' and 'circulaire' not in titre:
-        warnings.append("Source circulaire mais 'circulaire' absent du titre")
-    if source_doc == 'fil_info' and 'fil-info' not in metadata['nom_fichier'].lower():
+
+@rule('coherence_source')
+def check_coherence_source(fields, issues, warnings):
+    """Source cohérente avec le titre ou le nom de fichier."""
+    word = SOURCE_TITLE_WORDS.get(fields.source_doc)
+    if word and word not in fields.titre_minuscules:
+        warnings.append(f"Source {word} mais '{word}' absent du titre")
+    if fields.source_doc == 'fil_info' and 'fil-info' not in fields.nom_fichier.lower():
         warnings.append("Source fil_info mais pattern absent du nom de fichier")
 
-    # 7. Vérifier les mots-clés
-    mots_cles = metadata.get('mots_cles', [])
-    if len(mots_cles) < 2:
-        warnings.append(f"Peu de mots-clés ({len(mots_cles)})")
 
-    # 8. Vérifier le vocabulaire spécifique
-    vocab = metadata.get('vocabulaire_specifique', [])
-    if vocab:
-        for term in vocab:
-            if not term.get('synonymes'):
-                warnings.append(f"Terme sans synonymes: {term.get('terme')}")
+@rule('mots_cles')
+def check_mots_cles(fields, issues, warnings):
+    """Au moins 2 mots-clés."""
+    count = len(fields.document.get('mots_cles', []))
+    if count < 2:
+        warnings.append(f"Peu de mots-clés ({count})")
+
+
+@rule('vocabulaire')
+def check_vocabulaire(fields, issues, warnings):
+    """Chaque terme du vocabulaire a des synonymes."""
+    for term in fields.document.get('vocabulaire_specifique', []):
+        if not term.get('synonymes'):
+            warnings.append(f"Terme sans synonymes: {term.get('terme')}")
 
-    # 9. Vérifier l'année de référence
-    annee = metadata['classification'].get('annee_reference', 0)
+
+@rule('annee_reference')
+def check_annee_reference(fields, issues, warnings):
+    """Année de référence entre 2019 et 2025."""
+    annee = fields.classification.get('annee_reference', 0)
     if annee < 2019 or annee > 2025:
         warnings.append(f"Année de référence suspecte: {annee}")
 
-    # 10. Vérifier la cohérence titre/nom_fichier
-    if metadata['metadata']['titre'] == metadata['nom_fichier']:
+
+@rule('titre_nettoye')
+def check_titre_nettoye(fields, issues, warnings):
+    """Le titre n'est pas le nom de fichier brut."""
+    if fields.titre == fields.nom_fichier:
         warnings.append("Titre identique au nom de fichier (non nettoyé)")
 
+
+def select_rules(names=None):
+    """Règles à appliquer, dans l'ordre d'enregistrement."""
+    if not names:
+        return list(RULES.values())
+    unknown = [name for name in names if name not in RULES]
+    if unknown:
+        raise ValueError(f"Règle(s) inconnue(s) : {', '.join(unknown)}")
+    return [r for r in RULES.values() if r.name in names]
+
+
+def new_rule_stats(rules):
+    """Statistiques par règle : documents évalués, documents en échec, messages, durée (s)."""
+    return {r.name: {'documents': 0, 'echecs': 0, 'messages': 0, 'duree': 0.0} for r in rules}
+
+
+def merge_rule_stats(total, stats):
+    for name, values in stats.items():
+        for key, value in values.items():
+            total[name][key] += value
+    return total
+
+
+def validate_document(metadata, rules=None, stats=None):
+    """Valide la cohérence d'un document ; retourne (erreurs, avertissements).
+
+    Avec `stats` (voir `new_rule_stats`), le temps et les échecs de chaque
+    règle y sont cumulés.
+    """
+    rules = rules or RULES.values()
+    fields = document_fields(metadata)
+    issues = []
+    warnings = []
+    if stats is None:
+        for r in rules:
+            r.func(fields, issues, warnings)
+        return issues, warnings
+
+    clock = time.perf_counter
+    for r in rules:
+        found = len(issues) + len(warnings)
+        start = clock()
+        r.func(fields, issues, warnings)
+        rule_stats = stats[r.name]
+        rule_stats['duree'] += clock() - start
+        rule_stats['documents'] += 1
+        found = len(issues) + len(warnings) - found
+        if found:
+            rule_stats['echecs'] += 1
+            rule_stats['messages'] += found
     return issues, warnings
 
 
-def analyze_all_documents():
-    """Analyse tous les documents et génère un rapport."""
+def validate_documents(document_ids, rule_names=None):
+    """Charge et valide un lot de documents (exécuté dans un processus du pool).
+
+    Retourne (résultats, statistiques par règle) ; un résultat est
+    (document_id, fichier, type_document, titre, erreurs, avertissements).
+    """
+    rules = select_rules(rule_names)
+    stats = new_rule_stats(rules)
+    results = []
+    with open_store() as store:
+        for document_id in document_ids:
+            metadata = store.load(document_id)
+            if metadata is None:
+                continue
+            issues, warnings = validate_document(metadata, rules, stats)
+            results.append((
+                document_id,
+                metadata['fichier'],
+                metadata['classification'].get('type_document', ''),
+                metadata['metadata'].get('titre', '')[:50],
+                issues,
+                warnings,
+            ))
+    return results, stats
+
+
+def validate_corpus(workers=1, rule_names=None, source_files=None):
+    """Valide tous les documents du store, sur `workers` processus.
+
+    `source_files` : liste des fichiers sources (`list_source_files()` si
+    absente), transmise une fois à chaque processus.
+    Retourne (résultats dans l'ordre du store, statistiques par règle).
+    """
+    if source_files is None:
+        source_files = list_source_files()
+    set_source_files(source_files)
+
+    with open_store() as store:
+        document_ids = store.ids()
+
+    if workers <= 1 or len(document_ids) < 2:
+        return validate_documents(document_ids, rule_names)
+
+    size = max(1, -(-len(document_ids) // (workers * CHUNKS_PER_WORKER)))
+    chunks = [document_ids[i:i + size] for i in range(0, len(document_ids), size)]
+    results = []
+    stats = new_rule_stats(select_rules(rule_names))
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_source_files,
+                             initargs=(source_files,)) as executor:
+        for chunk_results, chunk_stats in executor.map(validate_documents, chunks, [rule_names] * len(chunks)):
+            results.extend(chunk_results)
+            merge_rule_stats(stats, chunk_stats)
+    return results, stats
+
+
+def analyze_all_documents(workers=1, rule_names=None):
+    """Analyse tous les documents et génère un rapport.
+
+    Retourne le nombre de documents avec erreurs critiques.
+    """
 
     print("Validation de cohérence des métadonnées")
     print("=" * 60)
     print()
 
-    metadata_files = list(DOCS_METADATA_DIR.glob("*.metadata.json"))
-    total = len(metadata_files)
+    start = time.perf_counter()
+    source_files = list_source_files()
+    results, rule_stats = validate_corpus(workers, rule_names, source_files)
+    elapsed = time.perf_counter() - start
+    total = len(results)
 
-    print(f"Documents à valider : {total}")
+    print(f"Documents à valider : {total} ({workers} processus)")
     print()
 
     # Statistiques
@@ -134,19 +372,18 @@ def analyze_all_documents():
     # Statistiques par type
     type_stats = defaultdict(lambda: {'count': 0, 'issues': 0, 'warnings': 0})
 
-    for meta_file in metadata_files:
-        with open(meta_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        issues, warnings = validate_document(metadata)
-        doc_type = metadata['classification']['type_document']
+    missing_files = []
+    for document_id, fichier, doc_type, title, issues, warnings in results:
+        meta_name = f"{document_id}.metadata.json"
 
         type_stats[doc_type]['count'] += 1
+        if not source_exists(fichier):
+            missing_files.append({'file': meta_name, 'fichier': fichier})
 
         if issues:
             docs_with_issues.append({
-                'file': meta_file.name,
-                'title': metadata['metadata']['titre'][:50],
+                'file': meta_name,
+                'title': title,
                 'issues': issues
             })
             type_stats[doc_type]['issues'] += 1
@@ -155,8 +392,8 @@ def analyze_all_documents():
 
         if warnings:
             docs_with_warnings.append({
-                'file': meta_file.name,
-                'title': metadata['metadata']['titre'][:50],
+                'file': meta_name,
+                'title': title,
                 'warnings': warnings
             })
             type_stats[doc_type]['warnings'] += 1
@@ -207,6 +444,26 @@ def analyze_all_documents():
                 print(f"    ❌ {issue}")
             print()
 
+    # Cohérence métadonnées ↔ fichiers sources
+    orphans = find_orphans(source_files, (result[1] for result in results))
+    print("## Fichiers sources")
+    print()
+    print(f"- Fichiers sources : {len(source_files)}")
+    print(f"- Métadonnées pointant vers un fichier manquant : {len(missing_files)}")
+    for missing in missing_files[:20]:
+        print(f"    ❌ {missing['fichier']} ({missing['file']})")
+    print(f"- Fichiers sources sans métadonnées : {len(orphans)}")
+    for orphan in orphans[:20]:
+        print(f"    ⚠️  {orphan}")
+    print()
+
+    print("## Règles")
+    print()
+    for name, stats in rule_stats.items():
+        print(f"  {name:20} {stats['echecs']:5} échecs  {stats['duree'] * 1000:8.2f} ms")
+    print(f"  Durée totale : {elapsed:.2f} s")
+    print()
+
     # Sauvegarder le rapport
     report = {
         'total': total,
@@ -216,14 +473,40 @@ def analyze_all_documents():
         'warnings': dict(all_warnings),
         'type_stats': {k: dict(v) for k, v in type_stats.items()},
         'documents_with_issues': docs_with_issues,
-        'documents_with_warnings': docs_with_warnings[:50]  # Limiter
+        'documents_with_warnings': docs_with_warnings[:50],  # Limiter
+        'missing_files': missing_files,
+        'orphan_files': orphans,
+        'regles': {name: dict(stats, duree=round(stats['duree'], 6)) for name, stats in rule_stats.items()},
     }
 
-    with open(METADATA_DIR / "validation_report.json", 'w', encoding='utf-8') as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_json_if_changed(METADATA_DIR / "validation_report.json", report)
 
     print(f"Rapport sauvegardé dans _metadata/validation_report.json")
+    return len(docs_with_issues)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validation de cohérence des métadonnées")
+    parser.add_argument('rules', nargs='*', help="Règles à appliquer (défaut : toutes)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus de validation (défaut : 1)")
+    parser.add_argument('--strict', action='store_true',
+                        help="Code de sortie 1 si un document a une erreur critique")
+    parser.add_argument('--list', action='store_true', help="Lister les règles disponibles")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.list:
+        for r in RULES.values():
+            print(f"  {r.name:20} {r.description}")
+        return 0
+
+    with_issues = analyze_all_documents(args.workers, args.rules)
+    return 1 if args.strict and with_issues else 0
 
 
 if __name__ == "__main__":
-    analyze_all_documents()
+    sys.exit(main())